@@ -0,0 +1,128 @@
+"""
+Cost of building red_light_green_light.py's 1920x1080 window image each
+frame: the title bar and the 2x2 grid stacked together from freshly
+allocated pieces with np.hstack/np.vstack (as the game used to) against
+drawing into a Canvas allocated once. Uses synthetic camera frames of a
+few common sizes, with a moving block to give the overlay some contours;
+motion detection itself isn't timed.
+
+Reports milliseconds and frames per second for building one image, and
+how much memory the build allocates (tracemalloc's peak over one frame):
+every one of those bytes is written and then thrown away again, so it is
+memory bandwidth the canvas no longer spends.
+
+Run from the repository root:
+    python -m benchmarks.bench_canvas
+"""
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from canvas import Canvas
+
+FRAMES = 60
+REPEAT = 5
+SCREEN = (1920, 1080)
+TITLE_HEIGHT = 120
+CAMERAS = [(640, 480), (1280, 720), (1920, 1080)]
+TITLE = ("State: Red Light | Time Left: 42s", (50, 80), 2, (255, 255, 255), 4)
+
+
+def camera_frames(width, height):
+    """FRAMES of (frame, foreground mask, contours) with a block sliding across."""
+    fgbg = cv2.createBackgroundSubtractorMOG2(history=5, varThreshold=40)
+    frames = []
+    for i in range(FRAMES):
+        frame = np.full((height, width, 3), 90, dtype=np.uint8)
+        x = i * (width - width // 8) // FRAMES
+        frame[height // 4:height // 2, x:x + width // 8] = 250
+        fgmask = fgbg.apply(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        contours, _ = cv2.findContours(fgmask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        frames.append((frame, fgmask, contours))
+    return frames
+
+
+def stacked():
+    """One frame the way game_loop used to build it."""
+    width, height = SCREEN
+    cell_width, cell_height = width // 2, (height - TITLE_HEIGHT) // 2
+
+    def build(frame, fgmask, contours):
+        title_bar = np.full((TITLE_HEIGHT, width, 3), (30, 30, 30), dtype=np.uint8)
+        detection_display = frame.copy()
+        cv2.drawContours(detection_display, contours, -1, (0, 0, 255), 2)
+        frame_resized = cv2.resize(frame, (cell_width, cell_height))
+        fgmask_bgr = cv2.cvtColor(fgmask, cv2.COLOR_GRAY2BGR)
+        fgmask_resized = cv2.resize(fgmask_bgr, (cell_width, cell_height))
+        detection_resized = cv2.resize(detection_display, (cell_width, cell_height))
+        bottom_right_cell = np.zeros((cell_height, cell_width, 3), dtype=np.uint8)
+        bottom_right_cell[:] = (0, 0, 255)
+        text, origin, scale, color, thickness = TITLE
+        cv2.putText(title_bar, text, origin, cv2.FONT_HERSHEY_SIMPLEX,
+                    scale, color, thickness, cv2.LINE_AA)
+        top_row = np.hstack([frame_resized, fgmask_resized])
+        bottom_row = np.hstack([detection_resized, bottom_right_cell])
+        grid = np.vstack([top_row, bottom_row])
+        return np.vstack([title_bar, grid])
+    return build
+
+
+def canvas():
+    """One frame the way game_loop builds it now."""
+    canvas = Canvas(*SCREEN, TITLE_HEIGHT)
+
+    def build(frame, fgmask, contours):
+        canvas.draw_frame(0, frame)
+        canvas.draw_mask(1, fgmask)
+        canvas.copy_cell(0, 2)
+        canvas.draw_contours(2, contours, (frame.shape[1], frame.shape[0]), (0, 0, 255), 2)
+        canvas.set_title(TITLE)
+        canvas.fill(3, (0, 0, 255))
+        return canvas.image
+    return build
+
+
+def seconds_per_frame(build, frames):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for frame in frames:
+            build(*frame)
+        best = min(best, (time.perf_counter() - start) / len(frames))
+    return best
+
+
+def allocated_per_frame(build, frames):
+    build(*frames[0])  # anything made once, up front
+    tracemalloc.start()
+    peak = 0
+    for frame in frames:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        build(*frame)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    print(f"{'camera':>10} {'build':>8} {'ms/frame':>9} {'fps':>7} {'MB allocated':>13}")
+    for width, height in CAMERAS:
+        frames = camera_frames(width, height)
+        for name, make in (("stacked", stacked), ("canvas", canvas)):
+            seconds = seconds_per_frame(make(), frames)
+            allocated = allocated_per_frame(make(), frames)
+            print(f"{f'{width}x{height}':>10} {name:>8} {seconds*1000:>9.2f} "
+                  f"{1/seconds:>7.0f} {allocated/1e6:>13.2f}")
+        # Same picture, apart from the overlay cell (bottom left), whose
+        # outlines are drawn at cell size now rather than camera size
+        old, new = stacked()(*frames[-1]), canvas()(*frames[-1])
+        overlay = slice((SCREEN[1] + TITLE_HEIGHT) // 2, None), slice(None, SCREEN[0] // 2)
+        old[overlay] = new[overlay] = 0
+        assert np.array_equal(old, new), "the canvas draws a different picture"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Enemy updates with one Enemy object each ("objects") and with the NumPy
+EnemyBatch ("batch"), for hundreds to thousands of enemies on a generated
+map with the player standing still and shooting. Both engines run the same
+seed and must end in exactly the same state.
+
+Run from the repository root:
+    python -m benchmarks.bench_enemies
+"""
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import game_with_ai as game
+
+FRAMES = 120
+DT = 1 / 60
+MAP = {"MAP_SIZE": (256, 256), "MAP_SEED": 1, "TIME_LIMIT": 1000,
+       "PLAYER_SPEED": 0.0, "ENEMY_SPAWN_INTERVAL": 10**9}
+COUNTS = [100, 1000, 5000]
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+
+class NoKeys:
+    def __getitem__(self, key):
+        return False
+
+
+def run(engine, n_enemies):
+    """Returns (seconds in update_enemies, final state digest)."""
+    with game.config_overrides(dict(MAP, ENEMY_ENGINE=engine)):
+        world = game.GameWorld(3)
+        rng = random.Random(5)
+        world.player.ammo = 10**6
+        pr, pc = world.player.get_tile_pos()
+        free = [(r, c) for r, c in zip(*(world.grid != 1).nonzero())
+                if abs(r - pr) + abs(c - pc) > game.CONFIG["DETECTION_RADIUS"]]
+        for _ in range(n_enemies):
+            r, c = rng.choice(free)
+            world.enemies.append(game.Enemy(int(r), int(c)))
+
+        elapsed = 0.0
+        update_enemies = world.update_enemies
+        def timed(dt, keys):
+            nonlocal elapsed
+            start = time.perf_counter()
+            update_enemies(dt, keys)
+            elapsed += time.perf_counter() - start
+        world.update_enemies = timed
+
+        keys = NoKeys()
+        for _ in range(FRAMES):
+            world.player.dir_r, world.player.dir_c = rng.choice(DIRECTIONS)
+            world.shoot()
+            world.step(DT, keys)
+            if world.result is not None:
+                break
+        return elapsed, world.state_digest()
+
+
+def main():
+    print(f"{'enemies':>8} {'objects ms/frame':>17} {'batch ms/frame':>15} {'speedup':>8}")
+    for n in COUNTS:
+        objects_t, objects_state = run("objects", n)
+        batch_t, batch_state = run("batch", n)
+        assert objects_state == batch_state, "EnemyBatch changed the outcome"
+        print(f"{n:>8} {objects_t/FRAMES*1000:>17.2f} {batch_t/FRAMES*1000:>15.2f} "
+              f"{objects_t/batch_t:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
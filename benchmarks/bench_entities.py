@@ -0,0 +1,122 @@
+"""
+Memory per instance, creation time and update throughput of the game's
+entity classes (Player, Bullet, Enemy), which use __slots__, against the
+same classes with a per-instance __dict__ instead (identical methods,
+built here). Updates run on a plain nested-list grid so NumPy indexing
+doesn't drown out the attribute access being measured.
+
+Run from the repository root:
+    python -m benchmarks.bench_entities
+"""
+import os
+import random
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import game_with_ai as game
+from collision import TileHash
+from particles import ParticlePool
+from simulation import KeyState
+
+N = 20_000
+REPEAT = 7
+
+
+def with_dict(cls):
+    """cls without __slots__: same methods and class attributes."""
+    slots = set(cls.__slots__)
+    namespace = {k: v for k, v in vars(cls).items()
+                 if k not in slots and k not in ("__slots__", "__weakref__")}
+    return type(cls.__name__, cls.__bases__, namespace)
+
+
+def bytes_per_instance(make):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = [make(i) for i in range(N)]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objs
+    return size / N
+
+
+def best_times(*runs):
+    """Fastest of REPEAT timings of each run, taking turns between them."""
+    best = [float("inf")] * len(runs)
+    for _ in range(REPEAT):
+        for k, run in enumerate(runs):
+            start = time.perf_counter()
+            run()
+            best[k] = min(best[k], time.perf_counter() - start)
+    return best
+
+
+def main():
+    grid = game.copy_map().tolist()
+    free = [(r, c) for r in range(game.GRID_ROWS) for c in range(game.GRID_COLS)
+            if grid[r][c] != 1]
+    explosions = ParticlePool(16, game.PARTICLE_COLORS)
+    no_enemies = TileHash(game.TILE_SIZE)
+    keys = KeyState()
+    player = game.Player(*free[0])
+
+    def tile(i):
+        return free[i % len(free)]
+
+    collision = game.CollisionIndex(grid, game.TILE_SIZE)
+
+    def player_make(cls):
+        return lambda i: cls(*tile(i))
+
+    def player_run(cls):
+        players = [cls(*tile(i)) for i in range(N)]
+        def run():
+            for p in players:
+                p.update(1 / 60, keys, grid, collision)
+        return run
+
+    def bullet_make(cls):
+        return lambda i: cls(*game.tile_center(*tile(i)), 0, 1)
+
+    def bullet_run(cls):
+        # Fire, then fly until the wall or the lifetime stops the bullet
+        def run():
+            for i in range(N):
+                b = cls(*game.tile_center(*tile(i)), 0, 1)
+                while b.alive:
+                    b.update(1 / 60, (), explosions, grid, no_enemies)
+        return run
+
+    def enemy_make(cls):
+        return lambda i: cls(*tile(i))
+
+    def enemy_run(cls):
+        enemies = [cls(*tile(i)) for i in range(N)]
+        def run():
+            random.seed(0)
+            for e in enemies:
+                e.move_cooldown = 0
+                e.update(grid, player, 1 / 60, ())
+        return run
+
+    print(f"{'class':>7} {'B/obj dict':>11} {'slots':>6} {'us/create dict':>15} {'slots':>6} "
+          f"{'us/update dict':>15} {'slots':>6}")
+    for cls, make, run in ((game.Player, player_make, player_run),
+                           (game.Bullet, bullet_make, bullet_run),
+                           (game.Enemy, enemy_make, enemy_run)):
+        plain = with_dict(cls)
+        mem = [bytes_per_instance(make(c)) for c in (plain, cls)]
+        makers = [make(c) for c in (plain, cls)]
+        create = [t / N * 1e6 for t in best_times(
+            *[lambda m=m: [m(i) for i in range(N)] for m in makers])]
+        update = [t / N * 1e6 for t in best_times(run(plain), run(cls))]
+        print(f"{cls.__name__:>7} {mem[0]:>11.0f} {mem[1]:>6.0f} {create[0]:>15.3f} "
+              f"{create[1]:>6.3f} {update[0]:>15.3f} {update[1]:>6.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Environment steps per second for a single GameEnv, a VecEnv and a
+SubprocVecEnv, with random actions and no rendering.
+
+Run from the repository root:
+    python -m benchmarks.bench_env
+"""
+import multiprocessing
+import time
+
+import numpy as np
+
+from env import GameEnv, SubprocVecEnv, VecEnv
+
+SECONDS = 1
+REPEAT = 5  # the fastest of this many SECONDS-long runs is reported
+N_ENVS = 64
+
+
+def steps_per_second(step, batch):
+    best = 0.0
+    for _ in range(REPEAT):
+        steps = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < SECONDS:
+            step()
+            steps += batch
+        best = max(best, steps / (time.perf_counter() - start))
+    return best
+
+
+def main():
+    rng = np.random.default_rng(0)
+
+    env = GameEnv(seed=0)
+    env.reset()
+    def single():
+        _, _, terminated, truncated, _ = env.step(int(rng.integers(env.n_actions)))
+        if terminated or truncated:
+            env.reset()
+
+    vec = VecEnv(N_ENVS, seed=0)
+    vec.reset()
+    sub = SubprocVecEnv(N_ENVS, seed=0)
+    sub.reset()
+
+    print(f"{'env':>22} {'steps/s':>10}")
+    print(f"{'GameEnv':>22} {steps_per_second(single, 1):>10.0f}")
+    print(f"{f'VecEnv({N_ENVS})':>22} "
+          f"{steps_per_second(lambda: vec.step(rng.integers(vec.n_actions, size=N_ENVS)), N_ENVS):>10.0f}")
+    print(f"{f'SubprocVecEnv({N_ENVS}, {multiprocessing.cpu_count()} procs)':>22} "
+          f"{steps_per_second(lambda: sub.step(rng.integers(vec.n_actions, size=N_ENVS)), N_ENVS):>10.0f}")
+    sub.close()
+
+
+if __name__ == "__main__":
+    main()
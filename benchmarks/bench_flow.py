@@ -0,0 +1,85 @@
+"""
+A swarm of enemies chasing the player across a 512x512 generated map,
+following paths from the shared distance field (PATHFINDING "bfs") against
+stepping along a flow field (PATHFINDING "flow"). Every enemy sees the
+player, so they all hunt at once; the player walks about at random.
+
+The flow field runs with both enemy engines, which must end in the same
+state. Also reports how long one flow field rebuild takes.
+
+Run from the repository root:
+    python -m benchmarks.bench_flow
+"""
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import game_with_ai as game
+from maps import generate_map
+from pathfinding import FlowField
+from simulation import RandomPolicy
+
+FRAMES = 120
+DT = 1 / 60
+ENEMIES = 10_000
+MIN_DISTANCE = 64  # enemies start at least this far from the player
+MAP = {"MAP_SIZE": (512, 512), "MAP_SEED": 1, "TIME_LIMIT": 1000,
+       "DETECTION_RADIUS": 10**6, "ENEMY_SPAWN_INTERVAL": 10**9}
+RUNS = [("batch", "bfs"), ("objects", "flow"), ("batch", "flow")]
+
+
+def run(engine, pathfinding):
+    """Returns (seconds in update_enemies, frames played, final state digest)."""
+    with game.config_overrides(dict(MAP, ENEMY_ENGINE=engine, PATHFINDING=pathfinding)):
+        world = game.GameWorld(3)
+        rng = random.Random(5)
+        pr, pc = world.player.get_tile_pos()
+        free = [(r, c) for r, c in zip(*(world.grid != 1).nonzero())
+                if abs(r - pr) + abs(c - pc) >= MIN_DISTANCE]
+        for _ in range(ENEMIES):
+            r, c = rng.choice(free)
+            world.enemies.append(game.Enemy(int(r), int(c)))
+
+        elapsed = 0.0
+        update_enemies = world.update_enemies
+        def timed(dt, keys):
+            nonlocal elapsed
+            start = time.perf_counter()
+            update_enemies(dt, keys)
+            elapsed += time.perf_counter() - start
+        world.update_enemies = timed
+
+        policy = RandomPolicy(7, shoot_chance=0)
+        for _ in range(FRAMES):
+            keys, _ = policy(world)
+            if world.step(DT, keys) is not None:
+                break
+        return elapsed, world.frames, world.state_digest()
+
+
+def main():
+    print(f"{ENEMIES} enemies on {MAP['MAP_SIZE'][0]}x{MAP['MAP_SIZE'][1]}")
+    print(f"{'engine':>8} {'pathfinding':>12} {'ms/frame':>9}")
+    results = {}
+    for engine, pathfinding in RUNS:
+        elapsed, frames, digest = run(engine, pathfinding)
+        results[(engine, pathfinding)] = digest
+        print(f"{engine:>8} {pathfinding:>12} {elapsed/frames*1000:>9.2f}")
+    assert results[("objects", "flow")] == results[("batch", "flow")], \
+        "EnemyBatch changed the outcome"
+
+    grid = generate_map(*MAP["MAP_SIZE"], seed=MAP["MAP_SEED"])
+    field = FlowField(grid)
+    goals = random.Random(1).choices(list(zip(*(grid != 1).nonzero())), k=20)
+    start = time.perf_counter()
+    for r, c in goals:
+        field.update((int(r), int(c)))
+    print(f"flow field rebuild: {(time.perf_counter() - start) / 20 * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+HierarchicalPlanner (HPA*) against find_path() with BFS and A* on a large
+generated map: the time to build the abstraction and to load it back from
+the cache directory, the time per query, how much longer its paths are than
+the shortest ones, and the time to rebuild after a wall is placed.
+
+Run from the repository root:
+    python -m benchmarks.bench_hpa
+"""
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import hpa
+from hpa import HierarchicalPlanner
+from maps import generate_map
+from pathfinding import find_path
+
+SIZE = 1024
+CLUSTER_SIZE = 16
+QUERIES = 40
+EDITS = 200
+
+
+def timed(call, *args):
+    start = time.perf_counter()
+    result = call(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    grid = generate_map(SIZE, SIZE, seed=1)
+    rng = random.Random(2)
+    free = [tuple(rc) for rc in np.argwhere(grid != 1).tolist()]
+    cache_dir = tempfile.mkdtemp()
+    try:
+        planner, build_t = timed(HierarchicalPlanner, grid, CLUSTER_SIZE, cache_dir)
+        hpa._built.clear()  # make the next one read the file
+        loaded, load_t = timed(HierarchicalPlanner, grid, CLUSTER_SIZE, cache_dir)
+        assert loaded.loaded and loaded.intra == planner.intra, "cache load differs"
+    finally:
+        shutil.rmtree(cache_dir)
+    print(f"{SIZE}x{SIZE} map, {CLUSTER_SIZE}x{CLUSTER_SIZE} clusters, "
+          f"{len(planner.intra)} abstract nodes")
+    print(f"build {build_t:.2f}s, load from cache {load_t:.2f}s")
+
+    times = {"bfs": 0.0, "astar": 0.0, "hpa": 0.0}
+    ratios = []
+    for _ in range(QUERIES):
+        start, goal = rng.choice(free), rng.choice(free)
+        shortest = None
+        for method in ("bfs", "astar"):
+            shortest, t = timed(find_path, grid, start, goal, method)
+            times[method] += t
+        path, t = timed(planner.path, start, goal)
+        times["hpa"] += t
+        assert bool(path) == bool(shortest), "reachability differs"
+        if shortest:
+            ratios.append(len(path) / len(shortest))
+
+    print(f"{'method':>7} {'ms/query':>9}")
+    for method, t in times.items():
+        print(f"{method:>7} {t/QUERIES*1000:>9.1f}")
+    print(f"hpa {times['astar']/times['hpa']:.1f}x faster than astar, "
+          f"paths {np.mean(ratios):.3f}x shortest on average ({max(ratios):.2f}x worst)")
+
+    elapsed = 0.0
+    for _ in range(EDITS):
+        r, c = rng.randrange(1, SIZE - 1), rng.randrange(1, SIZE - 1)
+        grid[r][c] = 0 if grid[r][c] == 1 else 1
+        _, t = timed(planner.tile_changed, r, c)
+        elapsed += t
+    print(f"tile_changed {elapsed/EDITS*1000:.2f} ms/edit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Repairing paths with IncrementalPlanner (D* Lite) against searching again
+from scratch with find_path(), on generated maps while walls are built and
+knocked down every step.
+
+Chasers walk their path one tile per step towards a player who wanders at
+half their speed (as with the game's default speeds), and every step a few
+random tiles are flipped between wall and floor. Each chaser re-plans every
+step; the first chaser's paths are checked (untimed) to be as short as the
+ones a fresh BFS finds.
+
+Run from the repository root:
+    python -m benchmarks.bench_incremental
+"""
+import random
+import time
+
+import numpy as np
+
+from maps import generate_map
+from pathfinding import IncrementalPlanner, find_path, tile_changed
+
+SIZES = [128, 256, 512]
+CHASERS = 8
+STEPS = 200
+EDITS_PER_STEP = 4
+PLAYER_EVERY = 2  # steps per player move
+MOVES = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+class Chaser:
+    def __init__(self, tile):
+        self.tile = tile
+
+
+def run(size, method):
+    """Returns the seconds spent planning in one scenario."""
+    grid = generate_map(size, size, seed=1)
+    rng = random.Random(2)
+    free = [tuple(rc) for rc in np.argwhere(grid != 1).tolist()]
+    player = rng.choice(free)
+    chasers = [Chaser(rng.choice(free)) for _ in range(CHASERS)]
+    planner = IncrementalPlanner(grid) if method == "dstar" else None
+
+    elapsed = 0.0
+    for step in range(STEPS):
+        # Flip a few tiles that nobody is standing on
+        for _ in range(EDITS_PER_STEP):
+            r, c = rng.randrange(1, size - 1), rng.randrange(1, size - 1)
+            if (r, c) == player or any(ch.tile == (r, c) for ch in chasers):
+                continue
+            grid[r][c] = 0 if grid[r][c] == 1 else 1
+            tile_changed(grid, r, c)
+            if planner is not None:
+                planner.tile_changed(r, c)
+
+        dr, dc = rng.choice(MOVES)
+        if step % PLAYER_EVERY == 0 and grid[player[0] + dr][player[1] + dc] != 1:
+            player = (player[0] + dr, player[1] + dc)
+
+        for ch in chasers:
+            start = time.perf_counter()
+            if planner is not None:
+                path = planner.path(ch.tile, player, ch)
+            else:
+                path = find_path(grid, ch.tile, player, method)
+            elapsed += time.perf_counter() - start
+            if method != "bfs" and ch is chasers[0]:
+                assert len(path) == len(find_path(grid, ch.tile, player)), "not a shortest path"
+            if len(path) > 1:
+                ch.tile = path[1]
+    return elapsed
+
+
+def main():
+    print(f"{'map':>9} {'bfs ms/path':>12} {'astar ms/path':>14} {'dstar ms/path':>14} {'vs astar':>9}")
+    plans = STEPS * CHASERS
+    for size in SIZES:
+        times = {method: run(size, method) for method in ("bfs", "astar", "dstar")}
+        print(f"{f'{size}x{size}':>9} {times['bfs']/plans*1000:>12.3f} "
+              f"{times['astar']/plans*1000:>14.3f} {times['dstar']/plans*1000:>14.3f} "
+              f"{times['astar']/times['dstar']:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
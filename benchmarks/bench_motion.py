@@ -0,0 +1,162 @@
+"""
+Accuracy against speed of red_light_green_light.py's motion detection at
+different detection widths (DETECTION_WIDTH). Every frame of a clip goes
+through a MotionDetector at each width, and its lose/not-lose decision
+(movement over DETECTION_AREA) is compared with the one made at the
+camera's full resolution: how often they agree, how many moves were missed
+and how many were seen that full resolution didn't see.
+
+Then, at DETECTION_WIDTH, the same comparison for the ways of scoring
+movement (MOTION_SCORE) against the contour area: counting moving pixels,
+with and without also finding the contours for the on-screen outline, and
+counting them per grid cell.
+
+Give it video files recorded with the game's camera, or record one first
+(--record, from camera 0). Without clips it makes up a 1080p one: a figure
+that stands still, sways, walks and waves in turns, with sensor noise.
+
+Run from the repository root:
+    python -m benchmarks.bench_motion [CLIP ...]
+    python -m benchmarks.bench_motion --record clip.avi --seconds 30
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from motion import MotionDetector
+
+SENSITIVITY_THRESHOLD = 40
+DETECTION_AREA = 2000
+WIDTHS = [None, 960, 640, 480, 320, 240, 160]
+DETECTION_WIDTH = 960
+# (label, MOTION_SCORE, outline for the display)
+SCORES = [("contours", "contours", True), ("pixels", "pixels", False),
+          ("pixels+outline", "pixels", True), ("grid", "grid", False)]
+GRID = {"grid": (6, 8), "edge_cells": 1, "noise": 0.02}
+WARMUP = 10  # first frames, while the background model settles, aren't scored
+REPEAT = 3   # the fastest of this many passes over the clip is reported
+# Synthetic clip: (frames, what the figure does)
+SCRIPT = [(30, "still"), (30, "sway"), (30, "walk"), (30, "still"), (30, "wave"),
+          (30, "still"), (30, "creep"), (30, "still")]
+
+
+def synthetic_clip(width=1920, height=1080, seed=0):
+    rng = np.random.default_rng(seed)
+    texture = rng.integers(0, 255, (height // 16, width // 16, 3), dtype=np.uint8)
+    background = cv2.GaussianBlur(cv2.resize(texture, (width, height)), (31, 31), 0)
+    background = background // 2 + 60
+    noisy = [np.clip(background + rng.normal(0, 3, (height, width, 1)), 0, 255).astype(np.uint8)
+             for _ in range(4)]
+
+    x, y = width // 3, height // 2
+    frame_index = 0
+    for frames, action in SCRIPT:
+        for i in range(frames):
+            if action == "sway":
+                x += 1 if i % 10 < 5 else -1
+            elif action == "walk":
+                x += 6
+            elif action == "creep":
+                x += 2
+            hand = (x + 120, y - 150 + (40 if action == "wave" and i % 8 < 4 else 0))
+            frame = noisy[frame_index % len(noisy)].copy()
+            frame_index += 1
+            cv2.ellipse(frame, (x, y), (90, 260), 0, 0, 360, (40, 50, 70), -1)
+            cv2.circle(frame, (x, y - 320), 60, (120, 150, 200), -1)
+            cv2.ellipse(frame, hand, (25, 80), 0, 0, 360, (40, 50, 70), -1)
+            yield frame
+
+
+def video_clip(path):
+    cap = cv2.VideoCapture(path)
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                return
+            yield frame
+    finally:
+        cap.release()
+
+
+def record(path, seconds):
+    cap = cv2.VideoCapture(0)
+    if not cap.isOpened():
+        raise SystemExit("Could not open camera.")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    writer = None
+    end = time.time() + seconds
+    while time.time() < end:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if writer is None:
+            height, width = frame.shape[:2]
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+        writer.write(frame)
+    cap.release()
+    if writer is not None:
+        writer.release()
+    print(f"saved {path}")
+
+
+def run(clip, width, score="contours", outline=True):
+    """(seconds per frame, list of movement per frame) for one way of detecting."""
+    best = float("inf")
+    for _ in range(REPEAT):
+        detector = MotionDetector(SENSITIVITY_THRESHOLD, width, score=score, **GRID)
+        detector.outline = outline
+        movements = []
+        elapsed = 0.0
+        for frame in clip():
+            start = time.perf_counter()
+            _, _, movement, _ = detector.detect(frame)
+            elapsed += time.perf_counter() - start
+            movements.append(movement)
+        best = min(best, elapsed / len(movements))
+    return best, movements
+
+
+def compare(clip, runs):
+    """Prints a row per (label, run arguments); the first row is the reference."""
+    reference = None
+    print(f"{'':>14} {'ms/frame':>9} {'speedup':>8} {'agree':>7} {'missed':>7} {'extra':>6}")
+    for label, args in runs:
+        seconds, movements = run(clip, *args)
+        moved = np.array(movements[WARMUP:]) > DETECTION_AREA
+        if reference is None:
+            reference, reference_seconds = moved, seconds
+        missed = int(np.sum(reference & ~moved))
+        extra = int(np.sum(moved & ~reference))
+        print(f"{label:>14} {seconds*1000:>9.2f} {reference_seconds/seconds:>7.1f}x "
+              f"{np.mean(moved == reference):>7.1%} {missed:>7} {extra:>6}")
+    print(f"{len(reference)} frames scored, {int(reference.sum())} with movement in the first row")
+
+
+def compare_all(name, clip):
+    print(f"{name}: detection width")
+    compare(clip, [(f"{width or 'full'}", (width,)) for width in WIDTHS])
+    print(f"{name}: score at width {DETECTION_WIDTH}")
+    compare(clip, [(label, (DETECTION_WIDTH, score, outline)) for label, score, outline in SCORES])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("clips", nargs="*", help="video files to score (default: a made-up clip)")
+    parser.add_argument("--record", metavar="PATH", help="record a clip from the camera instead")
+    parser.add_argument("--seconds", type=float, default=30, help="length of the recording")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.seconds)
+        return
+    if not args.clips:
+        compare_all("synthetic 1920x1080", synthetic_clip)
+    for path in args.clips:
+        compare_all(path, lambda path=path: video_clip(path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compare the original path-copying BFS with the flat-buffer BFS and A* in
+pathfinding.py on random maps up to 500x500.
+
+Run from the repository root:
+    python -m benchmarks.bench_pathfinding
+"""
+import random
+import time
+from collections import deque
+
+from pathfinding import find_path
+
+SIZES = [50, 100, 250, 500]
+WALL_DENSITY = 0.25
+QUERIES = 5
+
+
+def legacy_bfs(grid, start, goal):
+    """The original bfs_pathfinding, kept here as the baseline."""
+    rows, cols = len(grid), len(grid[0])
+    if start == goal:
+        return [start]
+    visited = set([start])
+    queue = deque([(start, [])])
+    while queue:
+        (cr, cc), path = queue.popleft()
+        for (nr, nc) in [(cr-1,cc),(cr+1,cc),(cr,cc-1),(cr,cc+1)]:
+            if 0 <= nr < rows and 0 <= nc < cols and grid[nr][nc] != 1:
+                if (nr, nc) not in visited:
+                    visited.add((nr, nc))
+                    new_path = path + [(cr, cc)]
+                    if (nr, nc) == goal:
+                        return new_path + [(nr, nc)]
+                    queue.append(((nr, nc), new_path))
+    return []
+
+
+def random_map(size, rng):
+    grid = [[1 if rng.random() < WALL_DENSITY else 0 for _ in range(size)]
+            for _ in range(size)]
+    grid[0][0] = grid[size-1][size-1] = 0
+    return grid
+
+
+def time_queries(fn, grid, queries):
+    start = time.perf_counter()
+    paths = [fn(grid, s, g) for s, g in queries]
+    return (time.perf_counter() - start) / len(queries), paths
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'size':>9} {'legacy ms':>10} {'bfs ms':>9} {'astar ms':>9} {'bfs x':>7} {'astar x':>8}")
+    for size in SIZES:
+        grid = random_map(size, rng)
+        queries = [((0, 0), (size-1, size-1))]
+        free = [(r, c) for r in range(size) for c in range(size) if grid[r][c] != 1]
+        queries += [(rng.choice(free), rng.choice(free)) for _ in range(QUERIES - 1)]
+
+        legacy_t, legacy_paths = time_queries(legacy_bfs, grid, queries)
+        bfs_t, bfs_paths = time_queries(find_path, grid, queries)
+        astar_t, astar_paths = time_queries(
+            lambda g, s, e: find_path(g, s, e, "astar"), grid, queries)
+
+        assert bfs_paths == legacy_paths
+        assert [len(p) for p in astar_paths] == [len(p) for p in legacy_paths]
+
+        print(f"{size:>4}x{size:<4} {legacy_t*1000:>10.2f} {bfs_t*1000:>9.2f} "
+              f"{astar_t*1000:>9.2f} {legacy_t/bfs_t:>6.1f}x {legacy_t/astar_t:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
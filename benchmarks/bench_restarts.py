@@ -0,0 +1,71 @@
+"""
+Soak test for restarting: plays 10,000 short rounds in one GameSession,
+restarting with ENTER after each, and checks that memory stays flat. It
+prints the interpreter's allocated blocks and the number of objects the
+garbage collector tracks every 1,000 restarts, along with how many
+bullets and enemies the pools ever had to create.
+
+Run from the repository root:
+    python -m benchmarks.bench_restarts
+"""
+import gc
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+import game_with_ai as game
+from simulation import RandomPolicy
+
+RESTARTS = 10_000
+FRAMES = 30        # frames played per round
+REPORT_EVERY = 1_000
+WARMUP = 1_000     # restarts before memory is expected to have settled
+ALLOWED_GROWTH = 0.01
+DT = 1 / 60
+ENTER = pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RETURN)
+
+
+def main():
+    game.CONFIG.update(ENEMY_SPAWN_INTERVAL=5, RECORD_DIR=None, PROFILE=False)
+    session = game.GameSession()
+    policy = RandomPolicy(0, shoot_chance=0.3)
+    start = time.perf_counter()
+    baseline = None
+
+    print(f"{'restarts':>9} {'blocks':>10} {'gc objects':>11} "
+          f"{'bullets made':>13} {'enemies made':>13}")
+    for n in range(1, RESTARTS + 1):
+        session.handle_event(ENTER)  # menu -> play
+        for _ in range(FRAMES):
+            keys, shoot = policy(session.world)
+            if shoot:
+                session.world.shoot()
+            session.update(DT, keys)
+            session.draw(time.perf_counter())
+            if session.state != "PLAY":
+                break
+        session.state = "GAMEOVER"   # as if the round had ended
+        session.handle_event(ENTER)  # restart
+
+        if n % REPORT_EVERY == 0:
+            gc.collect()
+            blocks, objects = sys.getallocatedblocks(), len(gc.get_objects())
+            world = session.world
+            print(f"{n:>9} {blocks:>10} {objects:>11} "
+                  f"{world.bullet_pool.created:>13} {world.enemy_pool.created:>13}")
+            if n == WARMUP:
+                baseline = blocks
+    growth = blocks / baseline - 1
+    print(f"{(time.perf_counter() - start) / RESTARTS * 1000:.2f} ms per round, "
+          f"{growth:+.2%} allocated blocks since restart {WARMUP}")
+    assert growth < ALLOWED_GROWTH, "memory keeps growing across restarts"
+
+
+if __name__ == "__main__":
+    main()
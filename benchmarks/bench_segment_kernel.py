@@ -0,0 +1,68 @@
+"""
+Scalar line_rect_intersect loops versus the batched segments_hit_rects kernel
+for the check dodge_bullets_if_possible does: every bullet against an enemy's
+tile and its four neighbours.
+
+Run from the repository root:
+    python -m benchmarks.bench_segment_kernel
+"""
+import os
+import random
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+from collision import segments_hit_rects
+from game_with_ai import TILE_SIZE, line_rect_intersect
+
+BULLET_COUNTS = [1, 10, 100, 1000]
+REPEATS = 200
+
+
+def tile_rects(r, c):
+    tiles = [(r, c), (r-1, c), (r+1, c), (r, c-1), (r, c+1)]
+    return [(cc*TILE_SIZE, rr*TILE_SIZE, TILE_SIZE, TILE_SIZE) for rr, cc in tiles]
+
+
+def random_segments(rng, n, r, c):
+    segments = []
+    for _ in range(n):
+        x = c*TILE_SIZE + rng.uniform(-2*TILE_SIZE, 3*TILE_SIZE)
+        y = r*TILE_SIZE + rng.uniform(-2*TILE_SIZE, 3*TILE_SIZE)
+        dr, dc = rng.choice([(-1, 0), (1, 0), (0, -1), (0, 1)])
+        segments.append((x, y, x + dc*4, y + dr*4))
+    return segments
+
+
+def scalar(segments, rects):
+    pg_rects = [pygame.Rect(rect) for rect in rects]
+    return [[line_rect_intersect(*seg, rect) for rect in pg_rects] for seg in segments]
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'bullets':>8} {'scalar us':>10} {'kernel us':>10} {'speedup':>8}")
+    for n in BULLET_COUNTS:
+        rects = tile_rects(5, 5)
+        segments = random_segments(rng, n, 5, 5)
+        assert (np.array(scalar(segments, rects), dtype=bool).reshape(n, 5)
+                == segments_hit_rects(segments, rects)).all()
+
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            scalar(segments, rects)
+        scalar_t = (time.perf_counter() - start) / REPEATS
+
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            segments_hit_rects(segments, rects)
+        kernel_t = (time.perf_counter() - start) / REPEATS
+
+        print(f"{n:>8} {scalar_t*1e6:>10.1f} {kernel_t*1e6:>10.1f} {scalar_t/kernel_t:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Bullet hit tests and enemy dodging with and without the per-frame TileHash,
+using hundreds of bullets and enemies on the game map. Both runs use the same
+random seed and must end in exactly the same state.
+
+Run from the repository root:
+    python -m benchmarks.bench_spatial_hash
+"""
+import os
+import random
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import game_with_ai as game
+from collision import TileHash
+from particles import ParticlePool
+
+FRAMES = 60
+DT = 1 / 60
+SCENES = [(50, 50), (200, 200), (500, 500)]  # (enemies, bullets)
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+
+def free_tiles(grid):
+    return [(r, c) for r in range(len(grid)) for c in range(len(grid[0]))
+            if grid[r][c] != 1]
+
+
+def new_bullet(rng, free):
+    r, c = rng.choice(free)
+    x, y = game.tile_center(r, c)
+    dr, dc = rng.choice(DIRECTIONS)
+    return game.Bullet(x + rng.uniform(-15, 15), y + rng.uniform(-15, 15), dr, dc)
+
+
+def run(n_enemies, n_bullets, use_hash):
+    """Returns (seconds, final state) for FRAMES frames of bullets + dodging."""
+    rng = random.Random(7)       # scene setup and respawns
+    random.seed(11)              # the game's own stream (dodge shuffles)
+    grid = game.copy_map()
+    free = free_tiles(grid)
+    enemies = [game.Enemy(*rng.choice(free)) for _ in range(n_enemies)]
+    bullets = [new_bullet(rng, free) for _ in range(n_bullets)]
+    explosions = ParticlePool(100000, game.PARTICLE_COLORS, seed=0)
+    enemy_hash = TileHash(game.TILE_SIZE)
+    bullet_hash = TileHash(game.TILE_SIZE)
+
+    elapsed = 0.0
+    for _ in range(FRAMES):
+        start = time.perf_counter()
+        if use_hash:
+            enemy_hash.clear()
+            for i, e in enumerate(enemies):
+                if not e.dead:
+                    enemy_hash.add(e.r, e.c, (i, e))
+        for b in bullets:
+            b.update(DT, enemies, explosions, grid, enemy_hash if use_hash else None)
+        bullets = [b for b in bullets if b.alive]
+
+        if use_hash:
+            bullet_hash.clear()
+            for b in bullets:
+                bullet_hash.add_segment(b.old_x, b.old_y, b.x, b.y, b)
+        for e in enemies:
+            if not e.dead:
+                e.dodge_bullets_if_possible(bullets, grid, bullet_hash if use_hash else None)
+        elapsed += time.perf_counter() - start
+
+        # Keep the numbers up (outside the timed section)
+        enemies = [e for e in enemies if not e.dead]
+        enemies += [game.Enemy(*rng.choice(free)) for _ in range(n_enemies - len(enemies))]
+        bullets += [new_bullet(rng, free) for _ in range(n_bullets - len(bullets))]
+
+    state = ([(e.r, e.c) for e in enemies], [(b.x, b.y) for b in bullets], len(explosions))
+    return elapsed, state
+
+
+def main():
+    print(f"{'enemies':>8} {'bullets':>8} {'scan ms/frame':>14} {'hash ms/frame':>14} {'speedup':>8}")
+    for n_enemies, n_bullets in SCENES:
+        scan_t, scan_state = run(n_enemies, n_bullets, use_hash=False)
+        hash_t, hash_state = run(n_enemies, n_bullets, use_hash=True)
+        assert scan_state == hash_state, "spatial hash changed the outcome"
+        print(f"{n_enemies:>8} {n_bullets:>8} {scan_t/FRAMES*1000:>14.2f} "
+              f"{hash_t/FRAMES*1000:>14.2f} {scan_t/hash_t:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Picking a spawn tile far from the player with SpawnIndex.pick_far() against
+filtering every free tile by distance and choosing among the candidates, on
+generated maps. Both must pick the same tiles from the same random numbers.
+
+Run from the repository root:
+    python -m benchmarks.bench_spawning
+"""
+import random
+import time
+
+import numpy as np
+
+from maps import generate_map
+from spawning import SpawnIndex
+
+SIZES = [64, 256, 1024]
+PICKS = 2000
+MIN_DISTANCE = 8
+
+
+def pick_by_filter(free_spots, cols, pr, pc, rng):
+    rows, cs = np.divmod(free_spots, cols)
+    candidates = free_spots[np.abs(rows - pr) + np.abs(cs - pc) >= MIN_DISTANCE]
+    if not len(candidates):
+        candidates = free_spots
+    return divmod(int(rng.choice(candidates)), cols)
+
+
+def main():
+    print(f"{'map':>9} {'filter us/pick':>15} {'index us/pick':>14} {'speedup':>8}")
+    for size in SIZES:
+        grid = generate_map(size, size, seed=1)
+        free_spots = np.flatnonzero(grid != 1)
+        players = [divmod(int(i), size) for i in random.Random(2).choices(free_spots, k=PICKS)]
+        index = SpawnIndex(free_spots, size)
+
+        rng = random.Random(3)
+        start = time.perf_counter()
+        expected = [pick_by_filter(free_spots, size, pr, pc, rng) for pr, pc in players]
+        filter_t = time.perf_counter() - start
+
+        rng = random.Random(3)
+        start = time.perf_counter()
+        picked = [index.pick_far(pr, pc, MIN_DISTANCE, rng) for pr, pc in players]
+        index_t = time.perf_counter() - start
+
+        assert picked == expected, "SpawnIndex picked different tiles"
+        print(f"{f'{size}x{size}':>9} {filter_t/PICKS*1e6:>15.1f} {index_t/PICKS*1e6:>14.1f} "
+              f"{filter_t/index_t:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
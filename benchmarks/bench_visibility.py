@@ -0,0 +1,102 @@
+"""
+Enemy detection with the Manhattan radius check against line of sight from
+FieldOfView (shadowcasting, cached per player tile), for enemies scattered
+around a player wandering a generated map. Detection is timed one enemy at
+a time (Enemy.see_player) and for all enemies at once (as EnemyBatch does).
+
+Also reports how often line of sight turns down an enemy the radius check
+would have let see the player, and what computing one field of view costs.
+
+Run from the repository root:
+    python -m benchmarks.bench_visibility
+"""
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+import game_with_ai as game
+from maps import generate_map
+from visibility import FieldOfView
+
+SIZE = 256
+FRAMES = 600
+PLAYER_EVERY = 8  # frames per player step
+SPREAD = 12       # enemies are placed within this many tiles of the player
+COUNTS = [10, 100, 1000]
+MOVES = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+def scenario(n_enemies):
+    """Player tile for each frame, and enemy tiles near the start."""
+    grid = generate_map(SIZE, SIZE, seed=1)
+    rng = random.Random(2)
+    free = [tuple(rc) for rc in np.argwhere(grid != 1).tolist()]
+    player = rng.choice(free)
+    near = [t for t in free if abs(t[0] - player[0]) + abs(t[1] - player[1]) <= SPREAD]
+    enemies = [rng.choice(near) for _ in range(n_enemies)]
+    tiles = []
+    for frame in range(FRAMES):
+        dr, dc = rng.choice(MOVES)
+        if frame % PLAYER_EVERY == 0 and grid[player[0] + dr][player[1] + dc] != 1:
+            player = (player[0] + dr, player[1] + dc)
+        tiles.append(player)
+    return grid, tiles, enemies
+
+
+def run(grid, tiles, enemies, vision):
+    """Returns (seconds one by one, seconds batched, detections)."""
+    objects = [game.Enemy(r, c) for r, c in enemies]
+    rows = np.array([r for r, _ in enemies])
+    cols = np.array([c for _, c in enemies])
+    radius = game.CONFIG["DETECTION_RADIUS"]
+
+    start = time.perf_counter()
+    seen = 0
+    for pr, pc in tiles:
+        for e in objects:
+            seen += e.see_player(pr, pc, vision)
+    one_by_one = time.perf_counter() - start
+
+    if vision is not None:
+        vision.cache.clear()
+    start = time.perf_counter()
+    for pr, pc in tiles:
+        if vision is not None:
+            vision.sees_many(pr, pc, rows, cols)
+        else:
+            (np.abs(rows - pr) + np.abs(cols - pc)) <= radius
+    batched = time.perf_counter() - start
+    return one_by_one, batched, seen
+
+
+def main():
+    radius = game.CONFIG["DETECTION_RADIUS"]
+    print(f"{'enemies':>8} {'radius us/frame':>16} {'los us/frame':>13} "
+          f"{'radius batch':>13} {'los batch':>10} {'hidden':>7}")
+    for n in COUNTS:
+        grid, tiles, enemies = scenario(n)
+        r1, rb, seen_radius = run(grid, tiles, enemies, None)
+        l1, lb, seen_los = run(grid, tiles, enemies, FieldOfView(grid, radius))
+        hidden = 1 - seen_los / seen_radius if seen_radius else 0.0
+        print(f"{n:>8} {r1/FRAMES*1e6:>16.1f} {l1/FRAMES*1e6:>13.1f} "
+              f"{rb/FRAMES*1e6:>13.1f} {lb/FRAMES*1e6:>10.1f} {hidden:>6.0%}")
+
+    grid, tiles, _ = scenario(0)
+    vision = FieldOfView(grid, radius)
+    start = time.perf_counter()
+    for pr, pc in tiles:
+        vision.cache.clear()
+        vision.from_tile(pr, pc)
+    print(f"one field of view (radius {radius}): "
+          f"{(time.perf_counter() - start)/FRAMES*1e6:.0f} us, "
+          f"{len(set(tiles))} player tiles in {FRAMES} frames")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Camera pipeline for red_light_green_light.py: a capture thread and a motion
+detection worker that hand frames on through small latest-frame-wins
+buffers, so the display (on the main thread) always works from the freshest
+camera frame however long any one stage takes.
+"""
+import threading
+import time
+from collections import deque
+
+
+class FrameBuffer:
+    """
+    Bounded ring buffer between two pipeline stages. put() never blocks:
+    when the buffer is full the oldest item is dropped. get() hands back the
+    newest item and discards the older ones, so a slow reader skips frames
+    instead of falling further and further behind.
+
+    backlog is how many items were waiting at the last get(), dropped how
+    many items were thrown away unread.
+    """
+    def __init__(self, size=2):
+        self.items = deque(maxlen=size)
+        self.closed = False
+        self.backlog = 0
+        self.dropped = 0
+        self._ready = threading.Condition()
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, item):
+        with self._ready:
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+            self.items.append(item)
+            self._ready.notify()
+
+    def get(self, timeout=None):
+        """Newest item, or None if none arrived within timeout or the buffer is closed."""
+        with self._ready:
+            self._ready.wait_for(lambda: self.items or self.closed, timeout)
+            if not self.items:
+                return None
+            self.backlog = len(self.items)
+            self.dropped += self.backlog - 1
+            item = self.items.pop()
+            self.items.clear()
+            return item
+
+    def close(self):
+        """No more items are coming: wakes up a waiting get()."""
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+
+
+class StageStats:
+    """
+    Frames per second of one pipeline stage over roughly the last 'window'
+    seconds, and the depth of its queue at its latest frame. Call tick()
+    once per frame; fps and str() can be read from any thread.
+    """
+    def __init__(self, name, window=1.0):
+        self.name = name
+        self.window = window
+        self.times = deque()
+        self.depth = 0
+        self.frames = 0
+
+    def tick(self, depth=0):
+        now = time.perf_counter()
+        self.times.append(now)
+        while now - self.times[0] > self.window:
+            self.times.popleft()
+        self.depth = depth
+        self.frames += 1
+
+    @property
+    def fps(self):
+        times = self.times
+        if len(times) < 2:
+            return 0.0
+        # Measured up to now rather than the last tick, so a stalled stage shows it
+        return (len(times) - 1) / max(time.perf_counter() - times[0], 1e-9)
+
+    def __str__(self):
+        return f"{self.name} {self.fps:.0f} fps, queue {self.depth}"
+
+
+class CaptureThread(threading.Thread):
+    """
+    Reads frames from cap (a cv2.VideoCapture) as fast as the camera
+    delivers them and puts them in output. If a read fails it sets failed;
+    either way output is closed when the thread ends. Its queue depth is the
+    number of frames waiting in output for the detection worker.
+    """
+    def __init__(self, cap, output):
+        super().__init__(name="capture", daemon=True)
+        self.cap = cap
+        self.output = output
+        self.stats = StageStats("capture")
+        self.failed = False
+        self._stopping = threading.Event()
+
+    def run(self):
+        try:
+            while not self._stopping.is_set():
+                ret, frame = self.cap.read()
+                if not ret:
+                    self.failed = True
+                    break
+                self.output.put(frame)
+                self.stats.tick(len(self.output))
+        finally:
+            self.output.close()
+
+    def stop(self):
+        self._stopping.set()
+
+
+class DetectionWorker(threading.Thread):
+    """
+    Takes the newest frame from source, runs detect(frame) on it and puts
+    the result in output, until source is closed or stop() is called. Its
+    queue depth is how many frames were waiting in source when it took one.
+    """
+    def __init__(self, source, output, detect):
+        super().__init__(name="detection", daemon=True)
+        self.source = source
+        self.output = output
+        self.detect = detect
+        self.stats = StageStats("detect")
+        self._stopping = threading.Event()
+
+    def run(self):
+        try:
+            while not self._stopping.is_set():
+                frame = self.source.get(timeout=0.1)
+                if frame is None:
+                    if self.source.closed:
+                        break
+                    continue
+                self.output.put(self.detect(frame))
+                self.stats.tick(self.source.backlog)
+        finally:
+            self.output.close()
+
+    def stop(self):
+        self._stopping.set()
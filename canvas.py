@@ -0,0 +1,62 @@
+"""
+The window image for red_light_green_light.py, allocated once and drawn into
+in place every frame.
+"""
+import cv2
+import numpy as np
+
+
+class Canvas:
+    """
+    A title bar over a 2x2 grid of cells, all NumPy views into one image
+    (cells are numbered 0-3 left to right, top to bottom). Frames are
+    resized straight into their cell and the title is only redrawn when its
+    text changes, so building a frame allocates nothing. Show image with
+    cv2.imshow().
+    """
+    def __init__(self, width, height, title_height, title_color=(30, 30, 30)):
+        cell_width = width // 2
+        cell_height = (height - title_height) // 2
+        self.image = np.zeros((title_height + 2 * cell_height, 2 * cell_width, 3), dtype=np.uint8)
+        self.title = self.image[:title_height]
+        self.cells = [self.image[title_height + row * cell_height:title_height + (row + 1) * cell_height,
+                                 col * cell_width:(col + 1) * cell_width]
+                      for row in range(2) for col in range(2)]
+        self.cell_size = (cell_width, cell_height)
+        self.title_color = title_color
+        self._gray = np.empty((cell_height, cell_width), dtype=np.uint8)
+        self._lines = None
+
+    def set_title(self, *lines):
+        """
+        Title bar text, one (text, origin, scale, color, thickness) tuple per
+        line. Nothing is drawn if the lines are the same as last time.
+        """
+        if lines == self._lines:
+            return
+        self._lines = lines
+        self.title[:] = self.title_color
+        for text, origin, scale, color, thickness in lines:
+            cv2.putText(self.title, text, origin, cv2.FONT_HERSHEY_SIMPLEX,
+                        scale, color, thickness, cv2.LINE_AA)
+
+    def draw_frame(self, index, frame):
+        """Fits a BGR frame into cell index."""
+        cv2.resize(frame, self.cell_size, dst=self.cells[index])
+
+    def draw_mask(self, index, mask):
+        """Fits a single-channel mask into cell index (resized before it becomes BGR)."""
+        cv2.resize(mask, self.cell_size, dst=self._gray)
+        cv2.cvtColor(self._gray, cv2.COLOR_GRAY2BGR, dst=self.cells[index])
+
+    def copy_cell(self, source, index):
+        np.copyto(self.cells[index], self.cells[source])
+
+    def draw_contours(self, index, contours, frame_size, color, thickness):
+        """Outlines contours found in a frame_size (width, height) frame over cell index."""
+        scale = np.divide(self.cell_size, frame_size)
+        scaled = [(c * scale).astype(np.int32) for c in contours]
+        cv2.drawContours(self.cells[index], scaled, -1, color, thickness)
+
+    def fill(self, index, color):
+        self.cells[index][:] = color
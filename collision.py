@@ -0,0 +1,134 @@
+"""
+Collision helpers used by game_with_ai.py.
+"""
+import numpy as np
+
+
+class CollisionIndex:
+    """
+    Boolean wall mask built once from the grid.
+
+    A box can only overlap the 1-4 tiles under its corners, so a collision test
+    looks those up in the mask instead of building a pygame.Rect for the box
+    and for every nearby wall. Coordinates are truncated the same way pygame.Rect
+    truncates them, so the answers match Rect.colliderect exactly.
+    """
+    def __init__(self, grid, tile_size):
+        self.solid = np.asarray(grid) == 1
+        self.rows, self.cols = self.solid.shape
+        self.tile_size = tile_size
+
+    def set_tile(self, r, c, value):
+        """Keep the mask in sync when a grid tile changes."""
+        self.solid[r, c] = value == 1
+
+    def box_hits_wall(self, x, y, half_size):
+        """True if the box of 'half_size' centred on (x, y) overlaps a wall."""
+        size = int(half_size * 2)
+        if size <= 0:
+            return False
+        left = int(x - half_size)
+        top = int(y - half_size)
+
+        # Pixels covered are left .. left+size-1 (Rect edges that only touch
+        # a wall don't count as a collision).
+        t = self.tile_size
+        c0 = max(left // t, 0)
+        c1 = min((left + size - 1) // t, self.cols - 1)
+        r0 = max(top // t, 0)
+        r1 = min((top + size - 1) // t, self.rows - 1)
+        solid = self.solid
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                if solid[r, c]:
+                    return True
+        return False
+
+
+def _orientation(px, py, qx, qy, rx, ry):
+    # Same formula and tolerance as orientation() in game_with_ai.py, so the
+    # float results (and therefore the answers) are identical. Returns -1, 0
+    # or 1 instead of 2, 0 or 1; only equality between results matters.
+    val = (qy - py) * (rx - qx) - (qx - px) * (ry - qy)
+    return np.sign(val) * (np.abs(val) >= 1e-9)
+
+def segments_hit_rects(segments, rects):
+    """
+    Batched line_rect_intersect.
+
+    segments is an (N, 4) array of (x0, y0, x1, y1), rects an (M, 4) array of
+    (left, top, width, height). Returns an (N, M) boolean matrix where [i, j]
+    is True when segment i crosses one of rect j's four edges, exactly as
+    line_rect_intersect(x0, y0, x1, y1, pygame.Rect(rect)) would report.
+    """
+    seg = np.asarray(segments, dtype=float).reshape(-1, 4)
+    rect = np.asarray(rects, dtype=float).reshape(-1, 4)
+
+    # Edge end points as (1, 4*M) rows, four edges per rect in pygame.Rect
+    # corner order: topleft -> topright -> bottomright -> bottomleft -> topleft
+    left, top = rect[:, 0], rect[:, 1]
+    right, bottom = left + rect[:, 2], top + rect[:, 3]
+    ax = np.stack([left, right, right, left], axis=1).reshape(1, -1)
+    ay = np.stack([top, top, bottom, bottom], axis=1).reshape(1, -1)
+    bx = np.stack([right, right, left, left], axis=1).reshape(1, -1)
+    by = np.stack([top, bottom, bottom, top], axis=1).reshape(1, -1)
+    # Segment end points as (N, 1) columns
+    x0, y0, x1, y1 = seg[:, 0:1], seg[:, 1:2], seg[:, 2:3], seg[:, 3:4]
+
+    o1 = _orientation(x0, y0, x1, y1, ax, ay)
+    o2 = _orientation(x0, y0, x1, y1, bx, by)
+    o3 = _orientation(ax, ay, bx, by, x0, y0)
+    o4 = _orientation(ax, ay, bx, by, x1, y1)
+    hit = (o1 != o2) & (o3 != o4)
+    return hit.reshape(len(seg), len(rect), 4).any(axis=2)
+
+
+class TileHash:
+    """
+    Uniform grid of buckets keyed by tile, meant to be cleared and refilled
+    once per frame. Lets a lookup touch only the items near one tile instead
+    of every bullet or enemy in the game.
+    """
+    def __init__(self, tile_size):
+        self.tile_size = tile_size
+        self.buckets = {}
+
+    def clear(self):
+        self.buckets.clear()
+
+    def add(self, r, c, item):
+        bucket = self.buckets.get((r, c))
+        if bucket is None:
+            self.buckets[(r, c)] = [item]
+        else:
+            bucket.append(item)
+
+    def add_segment(self, x0, y0, x1, y1, item, pad=1e-3):
+        """
+        Add item to every tile under the bounding box of the segment
+        (x0, y0) -> (x1, y1), which for the game's axis-aligned bullets is
+        exactly the tiles it swept through. Tiles count as closed squares
+        (touching an edge counts) and the box is padded slightly, so no tile
+        an exact intersection test could report is missed.
+        """
+        t = self.tile_size
+        c0 = int((min(x0, x1) - pad) // t)
+        c1 = int((max(x0, x1) + pad) // t)
+        r0 = int((min(y0, y1) - pad) // t)
+        r1 = int((max(y0, y1) + pad) // t)
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                self.add(r, c, item)
+
+    def get(self, r, c):
+        return self.buckets.get((r, c), ())
+
+    def around(self, r, c):
+        """Items in (r, c) and its four neighbours, each listed once."""
+        get = self.buckets.get
+        found = {}
+        for key in ((r, c), (r-1, c), (r+1, c), (r, c-1), (r, c+1)):
+            bucket = get(key)
+            if bucket:
+                found.update(dict.fromkeys(bucket))
+        return list(found)
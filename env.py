@@ -0,0 +1,329 @@
+"""
+Gym-style reinforcement learning environments around game_with_ai.py.
+
+The player is the agent; enemies, coins, ammo and the clock follow the
+normal game rules. Nothing is drawn and no sound is played.
+
+    env = GameEnv(seed=0)
+    obs, info = env.reset()
+    obs, reward, terminated, truncated, info = env.step(env.sample_action())
+
+VecEnv steps many environments in lockstep in this process, SubprocVecEnv
+spreads them over worker processes. Both take and return batched arrays and
+reset finished environments automatically.
+"""
+import multiprocessing
+import os
+import random
+from contextlib import contextmanager
+
+# Keep SDL away from real video/audio devices
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+import game_with_ai
+from recording import RecordedKeys
+
+# Action index -> (direction key bits, shoot). Bits as in recording.KEY_BITS.
+ACTIONS = [(bits, shoot) for shoot in (False, True) for bits in (0, 1, 2, 4, 8)]
+ACTION_NAMES = [name + ("+shoot" if shoot else "")
+                for shoot in (False, True)
+                for name in ("stay", "up", "down", "left", "right")]
+
+# Observation channels, each a 0/1 (rows, cols) layer
+CHANNELS = ("wall", "coin", "ammo", "player", "enemy", "bullet")
+# Tile values of the first three channels, shaped to broadcast over a window
+TILE_CHANNELS = np.array([1, 2, 3]).reshape(3, 1, 1)
+
+REWARDS = {
+    "coin": 1.0,      # per coin picked up
+    "kill": 0.0,      # per enemy shot
+    "win": 10.0,      # all coins collected
+    "caught": -10.0,  # an enemy reached the player
+    "timeout": 0.0,   # TIME_LIMIT ran out
+}
+
+
+class GameEnv:
+    """
+    One game as a reset()/step(action) environment.
+
+    Observations are uint8 arrays of shape (len(CHANNELS), rows, cols): the
+    whole map, or with view=(rows, cols) a window centred on the player
+    (outside the map counts as wall). info carries "ammo", "time_left",
+    "coins_left" and, once the round is over, "result".
+
+    The game reads its settings from the module-wide CONFIG. config
+    overrides are applied only while this environment resets or steps, and
+    put back afterwards, as simulation.run_game() does; so is the map they
+    pick, with the grid size the game keeps in module globals, so
+    environments on different maps can run side by side. The game's random
+    numbers likewise come from the environment's own random.Random while it
+    resets or steps (game_with_ai's name "random" points at it), so a
+    seeded environment replays identically however many others run beside
+    it, and the random module's own state is left alone.
+    """
+    def __init__(self, seed=None, config=None, view=None, dt=None, rewards=None):
+        self.config = dict(config or {})
+        self.view = view
+        self.rewards = dict(REWARDS, **(rewards or {}))
+        self.n_actions = len(ACTIONS)
+        self.keys = {bits: RecordedKeys(bits) for bits, _ in ACTIONS}
+        self.seed = seed
+        self.world = None
+        self.rng = random.Random(seed)  # for sample_action()
+        self._random = random.Random()  # the game's, seeded by reset(); see configured()
+        self._map_state = None  # see configured()
+
+        with self.configured():
+            self.dt = dt if dt is not None else 1.0 / game_with_ai.CONFIG["FPS"]
+            rows, cols = view if view is not None else game_with_ai.current_map().shape
+        self.observation_shape = (len(CHANNELS), rows, cols)
+
+    @contextmanager
+    def configured(self):
+        """
+        This environment's CONFIG overrides, map and random number generator
+        made current, and put back on the way out.
+        """
+        game_with_ai.random = self._random
+        try:
+            if not self.config:
+                yield
+                return
+            with game_with_ai.config_overrides(self.config):
+                if self._map_state is not None:
+                    game_with_ai.set_map_state(self._map_state)
+                try:
+                    yield
+                finally:
+                    self._map_state = game_with_ai.map_state()
+        finally:
+            game_with_ai.random = random
+
+    def sample_action(self):
+        return self.rng.randrange(self.n_actions)
+
+    def reset(self, seed=None):
+        """Start a new round. Returns (observation, info)."""
+        if seed is not None:
+            self.seed = seed
+        elif self.world is not None and self.seed is not None:
+            self.seed += 1  # a new round each reset, still reproducible
+
+        with self.configured():
+            if self.world is None:
+                self.world = game_with_ai.GameWorld(self.seed)
+            else:
+                self.world.reset(self.seed)  # reuses the world's pools
+        return self.observe(), self.info()
+
+    def step(self, action):
+        """Returns (observation, reward, terminated, truncated, info)."""
+        reward, terminated, truncated = self.advance(action)
+        return self.observe(), reward, terminated, truncated, self.info()
+
+    def advance(self, action):
+        """step() without building the observation or info."""
+        world = self.world
+        bits, shoot = ACTIONS[action]
+        coins, kills = world.coins_collected, world.enemies_killed
+
+        with self.configured():
+            if shoot:
+                world.shoot()
+            world.step(self.dt, self.keys[bits])
+
+        rewards = self.rewards
+        reward = (rewards["coin"] * (world.coins_collected - coins)
+                  + rewards["kill"] * (world.enemies_killed - kills))
+        terminated = truncated = False
+        if world.result == "WIN":
+            reward += rewards["win"]
+            terminated = True
+        elif world.result == "GAMEOVER":
+            if world.time_left() <= 0:
+                reward += rewards["timeout"]
+                truncated = True
+            else:
+                reward += rewards["caught"]
+                terminated = True
+        return reward, terminated, truncated
+
+    def info(self):
+        world = self.world
+        info = {
+            "ammo": world.player.ammo,
+            "time_left": world.time_left(),
+            "coins_left": len(world.coins),
+        }
+        if world.result is not None:
+            info["result"] = world.result
+        return info
+
+    def observe(self, out=None):
+        """Fill 'out' (or a new array) with the current observation."""
+        world = self.world
+        grid = world.grid
+        rows, cols = grid.shape
+        _, vr, vc = self.observation_shape
+        if out is None:
+            out = np.empty(self.observation_shape, dtype=np.uint8)
+
+        # Window in map tiles (the whole map without a view)
+        pr, pc = world.player.get_tile_pos()
+        r0, c0 = (pr - vr // 2, pc - vc // 2) if self.view is not None else (0, 0)
+        sr0, sr1 = max(r0, 0), min(r0 + vr, rows)
+        sc0, sc1 = max(c0, 0), min(c0 + vc, cols)
+
+        out[3:] = 0
+        if (sr1 - sr0, sc1 - sc0) != (vr, vc):
+            out[0] = 1  # outside the map is wall
+            out[1:3] = 0
+        if sr0 < sr1 and sc0 < sc1:
+            # Wall, coin and ammo layers in one comparison
+            tiles = grid[sr0:sr1, sc0:sc1]
+            dr, dc = slice(sr0 - r0, sr1 - r0), slice(sc0 - c0, sc1 - c0)
+            np.equal(tiles, TILE_CHANNELS, out=out[:3, dr, dc], casting="unsafe")
+
+        out[3, pr - r0, pc - c0] = 1  # the window always holds the player
+        for e in world.enemies:
+            r, c = e.r - r0, e.c - c0
+            if 0 <= r < vr and 0 <= c < vc:
+                out[4, r, c] = 1
+        tile_size = game_with_ai.TILE_SIZE
+        for b in world.bullets:
+            r, c = int(b.y // tile_size) - r0, int(b.x // tile_size) - c0
+            if 0 <= r < vr and 0 <= c < vc:
+                out[5, r, c] = 1
+        return out
+
+
+class VecEnv:
+    """
+    n GameEnvs stepped one after another in this process. Environment i is
+    seeded with seed + i. step() takes one action per environment and returns
+    batched (observations, rewards, terminated, truncated, infos); finished
+    environments are reset straight away, and their last observation is
+    kept in infos[i]["final_observation"].
+    """
+    def __init__(self, n, seed=0, config=None, **kwargs):
+        self.envs = [GameEnv(None if seed is None else seed + i, config, **kwargs)
+                     for i in range(n)]
+        self.n = n
+        self.n_actions = self.envs[0].n_actions
+        self.observation_shape = self.envs[0].observation_shape
+        self.obs = np.zeros((n,) + self.observation_shape, dtype=np.uint8)
+        self.rewards = np.zeros(n, dtype=np.float32)
+        self.terminated = np.zeros(n, dtype=bool)
+        self.truncated = np.zeros(n, dtype=bool)
+
+    def __len__(self):
+        return self.n
+
+    def sample_actions(self):
+        return np.array([env.sample_action() for env in self.envs])
+
+    def reset(self):
+        infos = []
+        for i, env in enumerate(self.envs):
+            env.reset()
+            env.observe(self.obs[i])
+            infos.append(env.info())
+        return self.obs.copy(), infos
+
+    def step(self, actions):
+        infos = []
+        for i, (env, action) in enumerate(zip(self.envs, actions)):
+            reward, terminated, truncated = env.advance(int(action))
+            info = env.info()
+            if terminated or truncated:
+                info["final_observation"] = env.observe()
+                _, reset_info = env.reset()
+                info.update(reset_info)
+            env.observe(self.obs[i])
+            self.rewards[i] = reward
+            self.terminated[i] = terminated
+            self.truncated[i] = truncated
+            infos.append(info)
+        return (self.obs.copy(), self.rewards.copy(), self.terminated.copy(),
+                self.truncated.copy(), infos)
+
+    def close(self):
+        pass
+
+
+def _worker(conn, n, seed, config, kwargs):
+    env = VecEnv(n, seed, config, **kwargs)
+    conn.send(env.observation_shape)
+    while True:
+        command, data = conn.recv()
+        if command == "step":
+            conn.send(env.step(data))
+        elif command == "reset":
+            conn.send(env.reset())
+        elif command == "close":
+            conn.close()
+            return
+
+
+class SubprocVecEnv:
+    """
+    Same interface as VecEnv, with the n environments split over 'processes'
+    worker processes (all cores by default), each running its share in
+    lockstep. Worth it once a step costs more than the pipe round trip.
+    """
+    def __init__(self, n, seed=0, config=None, processes=None, **kwargs):
+        processes = min(processes or multiprocessing.cpu_count(), n)
+        sizes = [n // processes + (i < n % processes) for i in range(processes)]
+        self.n = n
+        self.conns = []
+        self.procs = []
+        first = 0
+        for size in sizes:
+            parent, child = multiprocessing.Pipe()
+            proc = multiprocessing.Process(
+                target=_worker, daemon=True,
+                args=(child, size, None if seed is None else seed + first, config, kwargs))
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+            first += size
+        self.bounds = np.cumsum([0] + sizes)
+        # Workers report their observation shape once they are ready; the
+        # map size is only known here if a view was given
+        shapes = [conn.recv() for conn in self.conns]
+        self.n_actions = len(ACTIONS)
+        view = kwargs.get("view")
+        self.observation_shape = (len(CHANNELS), *view) if view is not None else shapes[0]
+
+    def __len__(self):
+        return self.n
+
+    def reset(self):
+        for conn in self.conns:
+            conn.send(("reset", None))
+        results = [conn.recv() for conn in self.conns]
+        return (np.concatenate([obs for obs, _ in results]),
+                [info for _, infos in results for info in infos])
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        for conn, start, end in zip(self.conns, self.bounds[:-1], self.bounds[1:]):
+            conn.send(("step", actions[start:end]))
+        results = [conn.recv() for conn in self.conns]
+        return (np.concatenate([r[0] for r in results]),
+                np.concatenate([r[1] for r in results]),
+                np.concatenate([r[2] for r in results]),
+                np.concatenate([r[3] for r in results]),
+                [info for r in results for info in r[4]])
+
+    def close(self):
+        for conn in self.conns:
+            conn.send(("close", None))
+        for proc in self.procs:
+            proc.join()
@@ -1,11 +1,27 @@
 import pygame
+import os
 import sys
 import random
-import math
-import copy
-from collections import deque
+import time
+import hashlib
+from contextlib import contextmanager
 
-pygame.init()
+import numpy as np
+
+from collision import CollisionIndex, TileHash, segments_hit_rects
+from hpa import HierarchicalPlanner
+from particles import ParticlePool
+from maps import generate_map, load_map
+from pathfinding import (DistanceField, FlowField, IncrementalPlanner, find_path,
+                         manhattan_distance)
+from pathfinding import tile_changed as path_tile_changed
+from pathfinding import totals as path_totals
+from pickups import Pickups
+from pools import ObjectPool, compact
+from profiler import CountingRect, Profiler, rects_created
+from recording import Recording
+from spawning import SpawnIndex
+from visibility import FieldOfView
 
 # -----------------------------------------------------------------------------
 # PLEASE READ BEFORE YOU EDIT!
@@ -25,7 +41,16 @@ CONFIG = {
     "WANDER_MOVE_INTERVAL": 60,   # frames between steps when wandering (IDLE/SEARCH)
     "CHASE_MOVE_INTERVAL": 10,    # frames between steps when chasing
     "ENEMY_PATH_UPDATE_INTERVAL": 60,  # BFS path refresh
+    "PATHFINDING": "bfs",         # "bfs" (one shared search per player tile), "astar" (per enemy)
+                                  # "dstar" (incremental D* Lite per enemy, repaired after edits)
+                                  # "hpa" (hierarchical, near-shortest, for huge maps)
+                                  # or "flow" (no paths: enemies step along a shared
+                                  # direction grid, for thousands of enemies)
+    "HPA_CLUSTER_SIZE": 16,       # tiles per side of an "hpa" cluster
+    "HPA_CACHE_DIR": "hpa_cache", # where "hpa" saves each map's abstraction (None: don't)
     "DETECTION_RADIUS": 6,        # Enemies detect player within this Manhattan distance
+    "ENEMY_VISION": "radius",     # "radius" (through walls) or "shadowcast" (line of sight only)
+    "ENEMY_ENGINE": "objects",    # "objects" (Enemy.update each) or "batch" (EnemyBatch, NumPy)
     
     # Time & ammo
     "TIME_LIMIT": 60,             # Seconds to collect all coins
@@ -33,6 +58,10 @@ CONFIG = {
     
     # Map / tiles
     "TILE_SIZE": 40,
+    "MAP_FILE": None,             # .npy map to play on (see maps.py), None = CUSTOM_MAP
+    "MAP_SIZE": None,             # (rows, cols) to generate a random map instead
+    "MAP_SEED": 0,                # seed for the generated map
+    "VIEWPORT_TILES": (20, 20),   # (rows, cols) shown at once; bigger maps scroll
     
     # Enemy spawn
     "INITIAL_ENEMY_COUNT": 3,
@@ -44,6 +73,14 @@ CONFIG = {
     "PARTICLE_LIFETIME": 0.5,     # seconds
     "PARTICLE_SPEED_MIN": 50,     # px/s
     "PARTICLE_SPEED_MAX": 150,    # px/s
+    "PARTICLE_CAPACITY": 2000,    # max particles alive at once
+    
+    # Recording (see replay.py)
+    "RECORD_DIR": None,           # save every round's input here, None = off
+    
+    # Profiling overlay: F3 toggles it, F4 saves the stats to PROFILE_FILE
+    "PROFILE": False,             # start with the overlay on
+    "PROFILE_FILE": "profile.json",  # .json, or .csv for anything else
 }
 
 CUSTOM_MAP = [
@@ -69,24 +106,35 @@ CUSTOM_MAP = [
     [1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1],
 ]
 
-try:
-    shoot_sound = pygame.mixer.Sound("./assets/shoot.mp3")
-    empty_sound = pygame.mixer.Sound("./assets/empty.mp3")
-    coin_sound = pygame.mixer.Sound("./assets/coin.mp3")
-    ammo_sound = pygame.mixer.Sound("./assets/ammo.mp3")
-    win_sound = pygame.mixer.Sound("./assets/win.mp3")
-    lose_sound = pygame.mixer.Sound("./assets/lose.mp3")
-    start_sound = pygame.mixer.Sound("./assets/preparation.mp3")
-    explosion_sound = pygame.mixer.Sound("./assets/explosion.mp3")
-except:
-    shoot_sound = pygame.mixer.Sound(file=None)
-    empty_sound = pygame.mixer.Sound(file=None)
-    coin_sound = pygame.mixer.Sound(file=None)
-    ammo_sound = pygame.mixer.Sound(file=None)
-    win_sound = pygame.mixer.Sound(file=None)
-    lose_sound = pygame.mixer.Sound(file=None)
-    start_sound = pygame.mixer.Sound(file=None)
-    explosion_sound = pygame.mixer.Sound(file=None)
+class SilentSound:
+    """Stand-in for pygame sounds until load_sounds() runs (e.g. headless)."""
+    def play(self):
+        pass
+
+shoot_sound = empty_sound = coin_sound = ammo_sound = SilentSound()
+win_sound = lose_sound = start_sound = explosion_sound = SilentSound()
+
+def load_sounds():
+    global shoot_sound, empty_sound, coin_sound, ammo_sound
+    global win_sound, lose_sound, start_sound, explosion_sound
+    try:
+        shoot_sound = pygame.mixer.Sound("./assets/shoot.mp3")
+        empty_sound = pygame.mixer.Sound("./assets/empty.mp3")
+        coin_sound = pygame.mixer.Sound("./assets/coin.mp3")
+        ammo_sound = pygame.mixer.Sound("./assets/ammo.mp3")
+        win_sound = pygame.mixer.Sound("./assets/win.mp3")
+        lose_sound = pygame.mixer.Sound("./assets/lose.mp3")
+        start_sound = pygame.mixer.Sound("./assets/preparation.mp3")
+        explosion_sound = pygame.mixer.Sound("./assets/explosion.mp3")
+    except:
+        shoot_sound = pygame.mixer.Sound(file=None)
+        empty_sound = pygame.mixer.Sound(file=None)
+        coin_sound = pygame.mixer.Sound(file=None)
+        ammo_sound = pygame.mixer.Sound(file=None)
+        win_sound = pygame.mixer.Sound(file=None)
+        lose_sound = pygame.mixer.Sound(file=None)
+        start_sound = pygame.mixer.Sound(file=None)
+        explosion_sound = pygame.mixer.Sound(file=None)
 
 TILE_SIZE = CONFIG["TILE_SIZE"]
 GRID_ROWS = len(CUSTOM_MAP)
@@ -97,12 +145,99 @@ MAP_HEIGHT = GRID_ROWS * TILE_SIZE
 WINDOW_WIDTH = MAP_WIDTH
 WINDOW_HEIGHT = MAP_HEIGHT
 
-screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-pygame.display.set_caption("Game With AI Demonstration")
-clock = pygame.time.Clock()
+_map = None
+_map_key = None
+# The last few maps used, by key, so switching back to one (e.g. after
+# simulation.run_game() on another map) doesn't load or generate it again
+MAPS_KEPT = 2
+_maps = {}
+
+def current_map():
+    """
+    The map selected in CONFIG as a 2D uint8 array: MAP_FILE if set, else a
+    generated MAP_SIZE map, else CUSTOM_MAP. Loaded once and cached; the grid
+    and window sizes above are updated to match.
+    """
+    global _map, _map_key, GRID_ROWS, GRID_COLS, MAP_WIDTH, MAP_HEIGHT
+    global WINDOW_WIDTH, WINDOW_HEIGHT
+    key = (CONFIG["MAP_FILE"], CONFIG["MAP_SIZE"], CONFIG["MAP_SEED"])
+    if key == _map_key:
+        return _map
+
+    if key in _maps:
+        _map = _maps.pop(key)
+    elif CONFIG["MAP_FILE"]:
+        _map = load_map(CONFIG["MAP_FILE"])
+    elif CONFIG["MAP_SIZE"]:
+        rows, cols = CONFIG["MAP_SIZE"]
+        _map = generate_map(rows, cols, seed=CONFIG["MAP_SEED"])
+    else:
+        _map = np.array(CUSTOM_MAP, dtype=np.uint8)
+    _map_key = key
+    _maps[key] = _map
+    while len(_maps) > MAPS_KEPT:
+        del _maps[next(iter(_maps))]
+
+    GRID_ROWS, GRID_COLS = _map.shape
+    MAP_WIDTH = GRID_COLS * TILE_SIZE
+    MAP_HEIGHT = GRID_ROWS * TILE_SIZE
+    view_rows, view_cols = CONFIG["VIEWPORT_TILES"]
+    WINDOW_WIDTH = min(GRID_COLS, view_cols) * TILE_SIZE
+    WINDOW_HEIGHT = min(GRID_ROWS, view_rows) * TILE_SIZE
+    return _map
+
+def map_state():
+    """The current map and the grid and window sizes that go with it."""
+    return (_map, _map_key, GRID_ROWS, GRID_COLS, MAP_WIDTH, MAP_HEIGHT,
+            WINDOW_WIDTH, WINDOW_HEIGHT)
+
+def set_map_state(state):
+    """Make a map_state() current again."""
+    global _map, _map_key, GRID_ROWS, GRID_COLS, MAP_WIDTH, MAP_HEIGHT
+    global WINDOW_WIDTH, WINDOW_HEIGHT
+    (_map, _map_key, GRID_ROWS, GRID_COLS, MAP_WIDTH, MAP_HEIGHT,
+     WINDOW_WIDTH, WINDOW_HEIGHT) = state
+
+@contextmanager
+def config_overrides(overrides):
+    """
+    CONFIG updated with 'overrides' while inside. On the way out CONFIG and
+    the current map (with the grid and window sizes current_map() set) are
+    put back, and Bullet and Enemy, which keep some settings as class
+    attributes, are configured again both ways.
+    """
+    saved, saved_map = dict(CONFIG), map_state()
+    CONFIG.update(overrides)
+    Bullet.configure()
+    Enemy.configure()
+    try:
+        yield
+    finally:
+        CONFIG.clear()
+        CONFIG.update(saved)
+        set_map_state(saved_map)
+        Bullet.configure()
+        Enemy.configure()
+
+# Created by setup_pygame(), so importing this file doesn't open a window
+screen = None
+clock = None
+font = None
+big_font = None
 
-font = pygame.font.SysFont("arial", 20, bold=True)
-big_font = pygame.font.SysFont("arial", 40, bold=True)
+def setup_pygame():
+    global screen, clock, font, big_font
+    if screen is not None:
+        return
+    current_map()  # sizes the window
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption("Game With AI Demonstration")
+    clock = pygame.time.Clock()
+
+    font = pygame.font.SysFont("arial", 20, bold=True)
+    big_font = pygame.font.SysFont("arial", 40, bold=True)
+    load_sounds()
 
 WHITE = (255, 255, 255)
 GRAY = (150, 150, 150)
@@ -114,9 +249,19 @@ YELLOW = (255, 255, 0)
 BROWN = (139, 69, 19)
 GOLD = (255, 215, 0)
 
+# Every Rect the game makes is built through this name, which the profiler
+# points at CountingRect while it runs (see start_profiler())
+Rect = pygame.Rect
+
+PARTICLE_COLORS = [RED]
+EXPLOSION_COLOR = 0  # index into PARTICLE_COLORS
+
+# Below this many nearby bullets the scalar segment test beats the NumPy kernel
+DODGE_BATCH_MIN_BULLETS = 8
+
 def copy_map():
-    """Return a fresh, deep-copied version of CUSTOM_MAP."""
-    return copy.deepcopy(CUSTOM_MAP)
+    """Return a fresh copy of the current map (see current_map)."""
+    return current_map().copy()
 
 def in_bounds(r, c):
     return 0 <= r < GRID_ROWS and 0 <= c < GRID_COLS
@@ -125,10 +270,7 @@ def get_tile_from_xy(x, y):
     return int(y // TILE_SIZE), int(x // TILE_SIZE)
 
 def tile_rect(r, c):
-    return pygame.Rect(c*TILE_SIZE, r*TILE_SIZE, TILE_SIZE, TILE_SIZE)
-
-def manhattan_distance(a, b):
-    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+    return Rect(c*TILE_SIZE, r*TILE_SIZE, TILE_SIZE, TILE_SIZE)
 
 def tile_center(r, c):
     return (c*TILE_SIZE + TILE_SIZE/2, r*TILE_SIZE + TILE_SIZE/2)
@@ -138,7 +280,7 @@ def will_collide_with_wall(new_x, new_y, grid, half_size):
     Check if the bounding box around (new_x, new_y) with 'half_size'
     overlaps any wall tile (1).
     """
-    rect_player = pygame.Rect(new_x - half_size, new_y - half_size,
+    rect_player = Rect(new_x - half_size, new_y - half_size,
                               half_size*2, half_size*2)
     
     r0, c0 = get_tile_from_xy(new_x, new_y)
@@ -152,41 +294,13 @@ def will_collide_with_wall(new_x, new_y, grid, half_size):
 
 def bfs_pathfinding(grid, start, goal):
     """
-    BFS ignoring bullet logic, just walls.
+    BFS ignoring bullet logic, just walls (or A*, see CONFIG["PATHFINDING"]).
     Returns list of tiles from start->goal inclusive if found, else [].
     """
-    if start == goal:
-        return [start]
-    
-    visited = set([start])
-    queue = deque([(start, [])])
-    
-    while queue:
-        (cr, cc), path = queue.popleft()
-        for (nr, nc) in [(cr-1,cc),(cr+1,cc),(cr,cc-1),(cr,cc+1)]:
-            if in_bounds(nr, nc) and grid[nr][nc] != 1:
-                if (nr, nc) not in visited:
-                    visited.add((nr, nc))
-                    new_path = path + [(cr, cc)]
-                    if (nr, nc) == goal:
-                        return new_path + [(nr, nc)]
-                    queue.append(((nr, nc), new_
-class Particle:
-    def __init__(self, x, y, vx, vy, color, lifetime):
-        self.x = x
-        self.y = y
-        self.vx = vx
-        self.vy = vy
-        self.color = color
-        self.lifetime = lifetime
-    
-    def update(self, dt):
-        self.x += self.vx * dt
-        self.y += self.vy * dt
-        self.lifetime -= dt
-    
-    def draw(self, surface):
-        pygame.draw.circle(surface, self.color, (int(self.x), int(self.y)), 3)
+    return find_path(grid, start, goal, CONFIG["PATHFINDING"])
+
+class Player:
+    __slots__ = ("x", "y", "speed_px", "box_half", "dir_r", "dir_c", "ammo")
 
     def __init__(self, r, c):
         self.x = c * TILE_SIZE + TILE_SIZE/2
@@ -201,7 +315,7 @@ class Particle:
     def get_tile_pos(self):
         return get_tile_from_xy(self.x, self.y)
     
-    def update(self, dt, keys, grid):
+    def update(self, dt, keys, grid, collision=None):
         dist = self.speed_px * dt
         vx, vy = 0, 0
         
@@ -225,35 +339,58 @@ class Particle:
         elif right and not left:
             self.dir_r, self.dir_c = 0, 1
         
-        # Move (X then Y) with collision checks
+        # Move (X then Y) with collision checks; no check along an axis we
+        # aren't moving on
         new_x = self.x + vx
-        if not will_collide_with_wall(new_x, self.y, grid, self.box_half):
+        if vx and not self.hits_wall(new_x, self.y, grid, collision):
             self.x = new_x
         
         new_y = self.y + vy
-        if not will_collide_with_wall(self.x, new_y, grid, self.box_half):
+        if vy and not self.hits_wall(self.x, new_y, grid, collision):
             self.y = new_y
 
-    def draw(self, surface):
-        rect = pygame.Rect(0,0, self.box_half*2, self.box_half*2)
-        rect.center = (self.x, self.y)
+    def hits_wall(self, x, y, grid, collision):
+        # Precomputed wall mask if we have one, otherwise scan nearby tiles
+        if collision is not None:
+            return collision.box_hits_wall(x, y, self.box_half)
+        return will_collide_with_wall(x, y, grid, self.box_half)
+
+    def draw(self, surface, offset=(0, 0)):
+        rect = Rect(0,0, self.box_half*2, self.box_half*2)
+        rect.center = (int(self.x) - offset[0], int(self.y) - offset[1])
         pygame.draw.rect(surface, BLUE, rect)
         pygame.draw.rect(surface, WHITE, rect, 2)
+        return rect
 
 class Bullet:
+    __slots__ = ("x", "y", "dir_r", "dir_c", "lifetime", "alive", "old_x", "old_y")
+
+    # Read from CONFIG by configure(), not by every new bullet
+    speed_px = CONFIG["BULLET_SPEED"] * TILE_SIZE  # px/second
+    max_lifetime = CONFIG["BULLET_LIFETIME"]
+
+    @classmethod
+    def configure(cls):
+        """Pick up BULLET_SPEED / BULLET_LIFETIME (GameWorld.reset calls this)."""
+        cls.speed_px = CONFIG["BULLET_SPEED"] * TILE_SIZE
+        cls.max_lifetime = CONFIG["BULLET_LIFETIME"]
+
     def __init__(self, x, y, dir_r, dir_c):
+        self.reset(x, y, dir_r, dir_c)
+
+    def reset(self, x, y, dir_r, dir_c):
+        """(Re)start the bullet; pooled bullets are reused this way."""
         self.x = x
         self.y = y
         self.dir_r = dir_r
         self.dir_c = dir_c
-        self.speed_px = CONFIG["BULLET_SPEED"] * TILE_SIZE  # px/second
-        self.lifetime = CONFIG["BULLET_LIFETIME"]
+        self.lifetime = self.max_lifetime
         self.alive = True
 
         self.old_x = x
         self.old_y = y
 
-    def update(self, dt, enemies, explosions, grid):
+    def update(self, dt, enemies, explosions, grid, enemy_hash=None):
         # store old position
         self.old_x, self.old_y = self.x, self.y
         
@@ -278,11 +415,20 @@ class Bullet:
             return
         
         # Check collision with enemies
-        bullet_rect = pygame.Rect(self.x-4, self.y-4, 8, 8)
+        if enemy_hash is not None:
+            e = self.find_hit(enemy_hash)
+            if e is not None:
+                e.dead = True
+                e.spawn_explosion(explosions)
+                explosion_sound.play()
+                self.alive = False
+            return
+        
+        bullet_rect = Rect(self.x-4, self.y-4, 8, 8)
         for e in enemies:
             if not e.dead:
                 ex, ey = tile_center(e.r, e.c)
-                enemy_rect = pygame.Rect(ex - TILE_SIZE/2, ey - TILE_SIZE/2,
+                enemy_rect = Rect(ex - TILE_SIZE/2, ey - TILE_SIZE/2,
                                          TILE_SIZE, TILE_SIZE)
                 if bullet_rect.colliderect(enemy_rect):
                     e.dead = True
@@ -291,6 +437,22 @@ class Bullet:
                     self.alive = False
                     return
 
+    def find_hit(self, enemy_hash):
+        """
+        First live enemy (in list order) hit by the bullet, looking only at
+        enemies on the tiles the 8x8 bullet box overlaps. enemy_hash holds
+        (index, enemy) pairs keyed by the enemy's tile.
+        """
+        left = int(self.x - 4)  # truncated like pygame.Rect
+        top = int(self.y - 4)
+        best_i, best = -1, None
+        for r in range(top // TILE_SIZE, (top + 7) // TILE_SIZE + 1):
+            for c in range(left // TILE_SIZE, (left + 7) // TILE_SIZE + 1):
+                for i, e in enemy_hash.get(r, c):
+                    if not e.dead and (best is None or i < best_i):
+                        best_i, best = i, e
+        return best
+
     def will_collide_with_wall(self, grid):
         """
         Check if the bullet collides with any wall tile.
@@ -300,8 +462,8 @@ class Bullet:
             return True
         return False
 
-    def draw(self, surface):
-        pygame.draw.circle(surface, YELLOW, (int(self.x), int(self.y)), 4)
+    def draw(self, surface, offset=(0, 0)):
+        return pygame.draw.circle(surface, YELLOW, (int(self.x) - offset[0], int(self.y) - offset[1]), 4)
 
 class Enemy:
     """
@@ -310,7 +472,28 @@ class Enemy:
       - CHASE: BFS path to player, moves faster
       - SEARCH: BFS path to player's last known tile, same speed as IDLE
     """
+    __slots__ = ("r", "c", "state", "dead", "path", "path_index", "move_cooldown",
+                 "path_update_cooldown", "__weakref__")
+
+    # Read from CONFIG by configure(), not on every update
+    detection_radius = CONFIG["DETECTION_RADIUS"]
+    chase_interval = CONFIG["CHASE_MOVE_INTERVAL"]
+    wander_interval = CONFIG["WANDER_MOVE_INTERVAL"]
+    path_interval = CONFIG["ENEMY_PATH_UPDATE_INTERVAL"]
+
+    @classmethod
+    def configure(cls):
+        """Pick up the enemy CONFIG values (GameWorld.reset calls this)."""
+        cls.detection_radius = CONFIG["DETECTION_RADIUS"]
+        cls.chase_interval = CONFIG["CHASE_MOVE_INTERVAL"]
+        cls.wander_interval = CONFIG["WANDER_MOVE_INTERVAL"]
+        cls.path_interval = CONFIG["ENEMY_PATH_UPDATE_INTERVAL"]
+
     def __init__(self, r, c):
+        self.reset(r, c)
+
+    def reset(self, r, c):
+        """(Re)start as a fresh IDLE enemy on (r, c), e.g. from a pool."""
         self.r = r
         self.c = c
         self.state = "IDLE"
@@ -322,30 +505,33 @@ class Enemy:
         self.move_cooldown = 0
         self.path_update_cooldown = 0
 
-    def see_player(self, pr, pc):
+    def see_player(self, pr, pc, vision=None):
+        """vision: a FieldOfView, so walls block sight (ENEMY_VISION "shadowcast")."""
+        if vision is not None:
+            return vision.sees(pr, pc, self.r, self.c)
         dist = manhattan_distance((self.r, self.c), (pr, pc))
-        return dist <= CONFIG["DETECTION_RADIUS"]
+        return dist <= self.detection_radius
     
     def get_move_interval(self):
         """Return frames between moves depending on state."""
         if self.state == "CHASE":
-            return CONFIG["CHASE_MOVE_INTERVAL"]
+            return self.chase_interval
         else:
             # IDLE or SEARCH => slow move
-            return CONFIG["WANDER_MOVE_INTERVAL"]
+            return self.wander_interval
 
-    def update(self, grid, player, dt, bullets):
+    def update(self, grid, player, dt, bullets, distance_field=None, bullet_hash=None,
+               vision=None):
         if self.dead:
             return
         
         # Check collision with player => game over
-        if (self.r, self.c) == player.get_tile_pos():
-            raise_player_caught()
-        
         pr, pc = player.get_tile_pos()
+        if self.r == pr and self.c == pc:
+            raise_player_caught()
         
         # Basic detection
-        if self.see_player(pr, pc):
+        if self.see_player(pr, pc, vision):
             # If see player, go CHASE
             if self.state != "CHASE":
                 self.state = "CHASE"
@@ -356,13 +542,25 @@ class Enemy:
             elif self.state not in ("SEARCH", "CHASE"):
                 self.state = "IDLE"
         
-        # BFS path if CHASE or SEARCH
-        if self.state in ("CHASE", "SEARCH"):
+        # BFS path if CHASE or SEARCH ("flow": the next step, no path kept)
+        flow = distance_field if isinstance(distance_field, FlowField) else None
+        step = None
+        if self.state in ("CHASE", "SEARCH") and flow is not None:
+            flow.update((pr, pc))
+            step = flow.next_step(self.r, self.c)
+            if self.state == "SEARCH" and step is None:
+                self.state = "IDLE"
+        elif self.state in ("CHASE", "SEARCH"):
             if self.path_update_cooldown <= 0 or not self.path:
                 goal = (pr, pc)  # chase or search last known
-                self.path = bfs_pathfinding(grid, (self.r, self.c), goal)
+                if distance_field is not None:
+                    # Shared field: one search per player tile for all enemies
+                    # (or, for "dstar", this enemy's own search, repaired)
+                    self.path = distance_field.path((self.r, self.c), goal, self)
+                else:
+                    self.path = bfs_pathfinding(grid, (self.r, self.c), goal)
                 self.path_index = 0
-                self.path_update_cooldown = CONFIG["ENEMY_PATH_UPDATE_INTERVAL"]
+                self.path_update_cooldown = self.path_interval
         
             # If we finished a SEARCH path, revert to IDLE
             if self.state == "SEARCH" and self.path_index >= len(self.path):
@@ -374,12 +572,16 @@ class Enemy:
             return  # can't move yet
         
         # Attempt to dodge bullets if possible (for "smart" behavior)
-        if self.dodge_bullets_if_possible(bullets, grid):
+        if self.dodge_bullets_if_possible(bullets, grid, bullet_hash):
             self.move_cooldown = self.get_move_interval()
             return
         
         # If we have a path (CHASE/SEARCH), follow it
-        if self.path and self.path_index < len(self.path):
+        if flow is not None and self.state != "IDLE":
+            if step is not None:
+                self.r, self.c = step
+                self.move_cooldown = self.get_move_interval()
+        elif self.path and self.path_index < len(self.path):
             tr, tc = self.path[self.path_index]
             if (self.r, self.c) == (tr, tc):
                 self.path_index += 1
@@ -412,42 +614,47 @@ class Enemy:
         if self.path_update_cooldown > 0:
             self.path_update_cooldown -= 1
 
-    def dodge_bullets_if_possible(self, bullets, grid):
+    def dodge_bullets_if_possible(self, bullets, grid, bullet_hash=None):
         """
         If a bullet crosses our tile, we attempt to step away.
         Return True if dodged, else False.
+        With bullet_hash (bullets keyed by the tiles they just swept) only
+        bullets near our tile and its neighbours are checked.
         """
-        ex, ey = tile_center(self.r, self.c)
-        enemy_rect = pygame.Rect(ex - TILE_SIZE/2, ey - TILE_SIZE/2, TILE_SIZE, TILE_SIZE)
-        
-        threatening = False
-        bullet_paths = []
-        for b in bullets:
-            if not b.alive:
-                continue
-            if line_rect_intersect(b.old_x, b.old_y, b.x, b.y, enemy_rect):
-                threatening = True
-            bullet_paths.append((b.old_x, b.old_y, b.x, b.y))
-        
-        if not threatening:
+        if bullet_hash is not None:
+            bullets = bullet_hash.around(self.r, self.c)
+            if not bullets:
+                return False
+        
+        bullet_paths = [(b.old_x, b.old_y, b.x, b.y) for b in bullets if b.alive]
+        if not bullet_paths:
             return False
         
-        # Attempt to move to a safe adjacent tile
         neighbors = [(self.r-1,self.c),(self.r+1,self.c),
                      (self.r,self.c-1),(self.r,self.c+1)]
+        tiles = [(self.r, self.c)] + neighbors
+        rects = [(c*TILE_SIZE, r*TILE_SIZE, TILE_SIZE, TILE_SIZE) for (r, c) in tiles]
+        
+        if len(bullet_paths) >= DODGE_BATCH_MIN_BULLETS:
+            # Our tile and the four neighbours against every bullet in one go
+            crossed = segments_hit_rects(bullet_paths, rects).any(axis=0)
+        else:
+            crossed = None
+            tile_rects = [Rect(rect) for rect in rects]
+
+        def is_crossed(i):
+            if crossed is not None:
+                return crossed[i]
+            return any(line_rect_intersect(*path, tile_rects[i]) for path in bullet_paths)
+
+        if not is_crossed(0):
+            return False  # nothing threatening our tile
+        
+        # Attempt to move to a safe adjacent tile
         random.shuffle(neighbors)
         for (nr, nc) in neighbors:
             if in_bounds(nr, nc) and grid[nr][nc] != 1:
-                nx, ny = tile_center(nr, nc)
-                rect2 = pygame.Rect(nx - TILE_SIZE/2, ny - TILE_SIZE/2,
-                                    TILE_SIZE, TILE_SIZE)
-                
-                safe = True
-                for (ox, oy, xx, yy) in bullet_paths:
-                    if line_rect_intersect(ox, oy, xx, yy, rect2):
-                        safe = False
-                        break
-                if safe:
+                if not is_crossed(tiles.index((nr, nc))):
                     self.r, self.c = nr, nc
                     return True
         
@@ -455,22 +662,278 @@ class Enemy:
 
     def spawn_explosion(self, explosions):
         x, y = tile_center(self.r, self.c)
-        for _ in range(CONFIG["PARTICLE_COUNT"]):
-            angle = random.uniform(0, 2*math.pi)
-            speed = random.uniform(CONFIG["PARTICLE_SPEED_MIN"], CONFIG["PARTICLE_SPEED_MAX"])
-            vx = math.cos(angle)*speed
-            vy = math.sin(angle)*speed
-            particle = Particle(x, y, vx, vy, RED, CONFIG["PARTICLE_LIFETIME"])
-            explosions.append(particle)
-
-    def draw(self, surface):
+        explosions.emit(x, y, CONFIG["PARTICLE_COUNT"],
+                        CONFIG["PARTICLE_SPEED_MIN"], CONFIG["PARTICLE_SPEED_MAX"],
+                        CONFIG["PARTICLE_LIFETIME"], EXPLOSION_COLOR)
+
+    def draw(self, surface, offset=(0, 0)):
         if self.dead:
-            return
+            return None
         ex, ey = tile_center(self.r, self.c)
-        rect = pygame.Rect(ex - TILE_SIZE/2, ey - TILE_SIZE/2,
+        rect = Rect(ex - TILE_SIZE/2 - offset[0], ey - TILE_SIZE/2 - offset[1],
                            TILE_SIZE, TILE_SIZE)
         pygame.draw.rect(surface, RED, rect)
         pygame.draw.rect(surface, WHITE, rect, 2)
+        return rect
+
+
+ENEMY_STATES = ("IDLE", "CHASE", "SEARCH")
+IDLE, CHASE, SEARCH = range(3)
+
+def _batch_field(name, to_python):
+    def get(self):
+        return to_python(getattr(self.batch, name)[self.index])
+    def set(self, value):
+        getattr(self.batch, name)[self.index] = value
+    return property(get, set)
+
+class BatchEnemy(Enemy):
+    """
+    An Enemy whose fields live in an EnemyBatch. Reading and writing them
+    works as on a plain Enemy, so drawing, bullet hits and dodging use the
+    same code.
+    """
+    __slots__ = ("batch", "index")
+
+    def __init__(self, batch, index):
+        self.batch = batch
+        self.index = index
+
+    r = _batch_field("r", int)
+    c = _batch_field("c", int)
+    dead = _batch_field("dead", bool)
+    move_cooldown = _batch_field("move_cooldown", int)
+    path_update_cooldown = _batch_field("path_update_cooldown", int)
+    path_index = _batch_field("path_index", int)
+
+    @property
+    def state(self):
+        return ENEMY_STATES[self.batch.state[self.index]]
+
+    @state.setter
+    def state(self, value):
+        self.batch.state[self.index] = ENEMY_STATES.index(value)
+
+    @property
+    def path(self):
+        return self.batch.paths[self.index]
+
+    @path.setter
+    def path(self, value):
+        self.batch.paths[self.index] = value
+        self.batch.path_len[self.index] = len(value)
+
+class EnemyBatch:
+    """
+    All of a world's enemies as NumPy arrays (position, state, cooldowns and
+    path cursor) updated together, for CONFIG["ENEMY_ENGINE"] = "batch".
+
+    update() gives exactly the same result as calling Enemy.update() on each
+    enemy in turn, random numbers included: detection, state changes and
+    cooldowns are done for everyone at once, path steps are taken together,
+    and only enemies that use the random module (dodging near bullets or
+    wandering) are handled one by one, in list order. Paths come from the
+    shared distance field like the per-object update.
+
+    Iterating yields BatchEnemy views, so code written for a list of Enemy
+    objects (drawing, bullets, observations) keeps working. on_remove(view),
+    if given, is called for each enemy removed (the view is reused later).
+    """
+    FIELDS = ("r", "c", "state", "dead", "move_cooldown", "path_update_cooldown",
+              "path_index", "path_len")
+    DTYPES = (np.int32, np.int32, np.int8, bool, np.int32, np.int32, np.int32, np.int32)
+    TILE_CODE = 1 << 20  # r * TILE_CODE + c numbers tiles for np.isin
+
+    def __init__(self, capacity=64, on_remove=None):
+        self.on_remove = on_remove
+        self.n = 0
+        for name, dtype in zip(self.FIELDS, self.DTYPES):
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        self.paths = []
+        self.views = []
+        self.spare_views = []  # views of removed enemies, reused by append()
+
+    def __len__(self):
+        return self.n
+
+    def clear(self):
+        """Remove every enemy, keeping the arrays for the next round."""
+        self.n = 0
+        self.paths.clear()
+        if self.on_remove is not None:
+            for view in self.views:
+                self.on_remove(view)
+        self.spare_views.extend(self.views)
+        self.views.clear()
+
+    def __iter__(self):
+        return iter(self.views)
+
+    def __getitem__(self, i):
+        return self.views[i]
+
+    def append(self, enemy):
+        """Add an Enemy (copied into the arrays)."""
+        if self.n == len(self.r):
+            for name in self.FIELDS:
+                old = getattr(self, name)
+                new = np.zeros(2 * len(old), dtype=old.dtype)
+                new[:self.n] = old[:self.n]
+                setattr(self, name, new)
+        i = self.n
+        self.n += 1
+        self.paths.append(None)
+        if self.spare_views:
+            view = self.spare_views.pop()
+            view.index = i
+        else:
+            view = BatchEnemy(self, i)
+        self.views.append(view)
+        for name in ("r", "c", "state", "dead", "move_cooldown",
+                     "path_update_cooldown", "path", "path_index"):
+            setattr(view, name, getattr(enemy, name))
+
+    def remove_dead(self):
+        """Drop dead enemies, keeping the order. Returns how many."""
+        n = self.n
+        keep = ~self.dead[:n]
+        k = int(np.count_nonzero(keep))
+        if k == n:
+            return 0
+        for name in self.FIELDS:
+            arr = getattr(self, name)
+            arr[:k] = arr[:n][keep]
+        kept = keep.tolist()
+        self.paths = [p for p, alive in zip(self.paths, kept) if alive]
+        removed = [v for v, alive in zip(self.views, kept) if not alive]
+        if self.on_remove is not None:
+            for view in removed:
+                self.on_remove(view)
+        self.spare_views.extend(removed)
+        self.views = [v for v, alive in zip(self.views, kept) if alive]
+        for i, view in enumerate(self.views):
+            view.index = i
+        self.n = k
+        return n - k
+
+    def near_bullets(self, bullet_hash, idx):
+        """Which enemies in idx have a bullet in bullet_hash on or next to their tile."""
+        found = np.zeros(len(idx), dtype=bool)
+        keys = [key for key, bucket in bullet_hash.buckets.items() if bucket]
+        if not keys:
+            return found
+        # Tiles as one number each (keys may lie just outside the map)
+        keys = np.array(keys, dtype=np.int64)
+        codes = keys[:, 0] * self.TILE_CODE + keys[:, 1]
+        tiles = self.r[idx].astype(np.int64) * self.TILE_CODE + self.c[idx]
+        for dr, dc in ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)):
+            found |= np.isin(tiles + (dr * self.TILE_CODE + dc), codes)
+        return found
+
+    def update(self, grid, player, bullets, distance_field=None, bullet_hash=None,
+               vision=None):
+        """One frame for every enemy. Returns True if one caught the player."""
+        n = self.n
+        if n == 0:
+            return False
+        r, c, state = self.r[:n], self.c[:n], self.state[:n]
+        move_cooldown = self.move_cooldown[:n]
+        path_cooldown = self.path_update_cooldown[:n]
+        path_index, path_len = self.path_index[:n], self.path_len[:n]
+        alive = ~self.dead[:n]
+        pr, pc = player.get_tile_pos()
+
+        caught = bool((alive & (r == pr) & (c == pc)).any())
+
+        # Detection: CHASE when the player is close, SEARCH after losing them
+        if vision is not None:
+            sees = vision.sees_many(pr, pc, r, c)
+        else:
+            sees = (np.abs(r - pr) + np.abs(c - pc)) <= Enemy.detection_radius
+        was_chasing = state == CHASE
+        state[alive & sees] = CHASE
+        state[alive & ~sees & was_chasing] = SEARCH
+
+        # New paths for hunters whose path is due or missing, or with a flow
+        # field ("flow") every enemy's next step in one gather
+        hunting = alive & (state != IDLE)
+        flow = distance_field if isinstance(distance_field, FlowField) else None
+        if flow is not None:
+            flow.update((pr, pc))
+            heading = flow.direction[r, c]
+            state[hunting & (state == SEARCH) & (heading < 0)] = IDLE
+        else:
+            refresh = np.flatnonzero(hunting & ((path_cooldown <= 0) | (path_len == 0)))
+            goal = (pr, pc)
+            for i in refresh.tolist():
+                start = (int(r[i]), int(c[i]))
+                if distance_field is not None:
+                    path = distance_field.path(start, goal, self.views[i])
+                else:
+                    path = bfs_pathfinding(grid, start, goal)
+                self.paths[i] = path
+                path_len[i] = len(path)
+            path_index[refresh] = 0
+            path_cooldown[refresh] = Enemy.path_interval
+            state[hunting & (state == SEARCH) & (path_index >= path_len)] = IDLE
+
+        # Movement cooldown
+        cooling = alive & (move_cooldown > 0)
+        move_cooldown[cooling] -= 1
+        ready = alive & ~cooling
+        if not ready.any():
+            return caught
+
+        if flow is not None:
+            following = ready & (state != IDLE) & (heading >= 0)
+        else:
+            following = ready & (path_index < path_len)
+        wandering = ready & ~following & (state == IDLE)
+        dodging = np.zeros(n, dtype=bool)
+        if bullets:
+            ready_idx = np.flatnonzero(ready)
+            if bullet_hash is not None:
+                dodging[ready_idx] = self.near_bullets(bullet_hash, ready_idx)
+            else:
+                dodging[ready_idx] = True
+
+        # Dodging and wandering use the random module: one by one, in order
+        dodged = np.zeros(n, dtype=bool)
+        for i in np.flatnonzero(dodging | wandering).tolist():
+            if dodging[i] and self.views[i].dodge_bullets_if_possible(bullets, grid, bullet_hash):
+                dodged[i] = True
+            elif wandering[i]:
+                er, ec = int(r[i]), int(c[i])
+                neighbors = [(er-1, ec), (er+1, ec), (er, ec-1), (er, ec+1)]
+                random.shuffle(neighbors)
+                for (nr, nc) in neighbors:
+                    if in_bounds(nr, nc) and grid[nr][nc] != 1:
+                        r[i], c[i] = nr, nc
+                        break
+        following &= ~dodged
+        wandering &= ~dodged
+
+        # One step towards the next path tile (or onto the next one if there)
+        f = np.flatnonzero(following)
+        if len(f) and flow is not None:
+            step = flow.steps[heading[f]]
+            r[f] += step[:, 0]
+            c[f] += step[:, 1]
+        elif len(f):
+            paths = self.paths
+            targets = np.array([paths[i][j] for i, j in zip(f.tolist(), path_index[f].tolist())])
+            fr, fc = r[f], c[f]
+            dr = np.sign(targets[:, 0] - fr)
+            dc = np.where(dr == 0, np.sign(targets[:, 1] - fc), 0)
+            path_index[f] += (dr == 0) & (dc == 0)
+            r[f] = fr + dr
+            c[f] = fc + dc
+
+        moved = following | wandering | dodged
+        move_cooldown[moved] = np.where(state[moved] == CHASE, Enemy.chase_interval,
+                                        Enemy.wander_interval)
+        path_cooldown[ready & ~dodged & (path_cooldown > 0)] -= 1
+        return caught
 
 
 def orientation(px, py, qx, qy, rx, ry):
@@ -509,214 +972,628 @@ def raise_player_caught():
     game_over_flag = True
 
 
-def main():
-    global game_over_flag
-    game_over_flag = False
-    
-    grid = copy_map()
-    
-    # Collect coins & free spots
-    coins = []
-    free_spots = []
-    for r in range(GRID_ROWS):
-        for c in range(GRID_COLS):
-            if grid[r][c] == 2:
-                coins.append((r,c))
-            if grid[r][c] in (0,2,3):
-                free_spots.append((r,c))
-    
-    # Create player in random free spot
-    pr, pc = random.choice(free_spots)
-    player = Player(pr, pc)
-    
-    # Create enemies far from player
-    enemies = []
-    for _ in range(CONFIG["INITIAL_ENEMY_COUNT"]):
-        spawn_enemy_far_from_player(grid, player, enemies, free_spots)
-
-    spawn_timer = 0
-    bullets = []
-    explosions = []
-    
-    game_state = "MENU"
-    start_time = 0
-    time_left = CONFIG["TIME_LIMIT"]
-    
-    running = True
-    while running:
-        dt_ms = clock.tick(CONFIG["FPS"])
-        dt = dt_ms / 1000.0
-        
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            
-            if game_state == "MENU":
-                if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
-                    game_state = "PLAY"
-                    start_time = pygame.time.get_ticks() // 1000
-                    start_sound.play()
-            
-            elif game_state == "PLAY":
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_SPACE:
-                        # Attempt to shoot
-                        if player.ammo > 0:
-                            player.ammo -= 1
-                            bx, by = player.x, player.y
-                            bullet = Bullet(bx, by, player.dir_r, player.dir_c)
-                            bullets.append(bullet)
-                            shoot_sound.play()
-                        else:
-                            empty_sound.play()
-            
-            elif game_state in ("GAMEOVER", "WIN"):
-                if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
-                    main()  # fully restart
-                    return
+class GameWorld:
+    """
+    Everything that changes during one round: grid, player, enemies, bullets,
+    explosions, coins and the clock. There is no drawing or event handling in
+    here, so the same rules run in the window (main) and headless
+    (simulation.py). Pass a seed to make the round reproducible.
+
+    reset() starts another round in the same world. Bullets and enemies are
+    taken from pools and given back when they die or the round ends, and the
+    particle pool and enemy batch are emptied rather than replaced, so
+    playing round after round doesn't keep allocating them.
+    """
+    def __init__(self, seed=None):
+        self.bullet_pool = ObjectPool(Bullet)
+        self.enemy_pool = ObjectPool(Enemy, self.forget_enemy)
+        self.bullets = []
+        self.enemies = []
+        self.explosions = None
+        self.distance_field = None
+        self.enemy_hash = TileHash(TILE_SIZE)
+        self.bullet_hash = TileHash(TILE_SIZE)
+        self.profiler = None  # see step()
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Start a new round (on 'seed' if given), reusing the pools."""
+        global game_over_flag
+        game_over_flag = False
+        if seed is not None:
+            random.seed(seed)
+        Bullet.configure()
+        Enemy.configure()
+
+        self.grid = copy_map()
+        
+        # Collect coins & free spots (free spots as flat indices r * cols + c,
+        # in the same row-major order as before). coins is the set of coin
+        # tiles left, kept up to date by set_tile().
+        self.pickups = Pickups(self.grid)
+        self.coins = self.pickups.coins
+        rows, cols = self.grid.shape
+        self.spawns = SpawnIndex(self.pickups.free_spots(), cols, rows)
+        
+        # Create player in random free spot
+        pr, pc = divmod(int(random.choice(self.free_spots)), cols)
+        self.player = Player(pr, pc)
+        
+        # Last round's bullets and enemies go back to their pools
+        self.bullet_pool.release_all(self.bullets)
+        self.bullets.clear()
+        if isinstance(self.enemies, EnemyBatch):
+            self.enemies.clear()
+        else:
+            self.enemy_pool.release_all(self.enemies)
+            self.enemies.clear()
+        if (CONFIG["ENEMY_ENGINE"] == "batch") != isinstance(self.enemies, EnemyBatch):
+            self.enemies = (EnemyBatch(on_remove=self.forget_enemy)
+                            if CONFIG["ENEMY_ENGINE"] == "batch" else [])
+
+        # Create enemies far from player
+        for _ in range(CONFIG["INITIAL_ENEMY_COUNT"]):
+            spawn_enemy_far_from_player(self.grid, self.player, self.enemies, self.spawns,
+                                        self.enemy_pool)
+
+        self.spawn_timer = 0
+        if (self.explosions is None
+                or self.explosions.capacity != CONFIG["PARTICLE_CAPACITY"]):
+            self.explosions = ParticlePool(CONFIG["PARTICLE_CAPACITY"], PARTICLE_COLORS, seed=seed)
+        else:
+            self.explosions.reset(seed)
+        # "bfs" paths come from one shared distance field, "dstar" from a planner
+        # that keeps each enemy's search, "hpa" from the map's cluster graph,
+        # "astar" searches per enemy; "flow" enemies read a direction grid
+        if CONFIG["PATHFINDING"] == "bfs":
+            self.distance_field = DistanceField(self.grid)
+        elif CONFIG["PATHFINDING"] == "flow":
+            self.distance_field = FlowField(self.grid)
+        elif CONFIG["PATHFINDING"] == "dstar":
+            self.distance_field = IncrementalPlanner(self.grid)
+        elif CONFIG["PATHFINDING"] == "hpa":
+            self.distance_field = HierarchicalPlanner(self.grid, CONFIG["HPA_CLUSTER_SIZE"],
+                                                      CONFIG["HPA_CACHE_DIR"])
+        else:
+            self.distance_field = None
+        # Fields of view from the player's tile, shared by every enemy
+        if CONFIG["ENEMY_VISION"] == "shadowcast":
+            self.vision = FieldOfView(self.grid, CONFIG["DETECTION_RADIUS"])
+        else:
+            self.vision = None
+        self.collision = CollisionIndex(self.grid, TILE_SIZE)
+
+        self.elapsed = 0.0
+        self.frames = 0
+        self.changed_tiles = []  # tiles edited since the renderer last looked
+        self.coins_collected = 0
+        self.enemies_killed = 0
+        self.shots_fired = 0
+        self.result = None  # "WIN" or "GAMEOVER" once the round is decided
+
+    def time_left(self):
+        return CONFIG["TIME_LIMIT"] - int(self.elapsed)
+
+    def forget_enemy(self, enemy):
+        """An enemy died or went back to its pool: drop its D* Lite planner."""
+        if isinstance(self.distance_field, IncrementalPlanner):
+            self.distance_field.forget(enemy)
+
+    @property
+    def free_spots(self):
+        """Flat indices (r * cols + c) of the tiles that aren't walls, in order."""
+        return self.spawns.free
+
+    def set_tile(self, r, c, value):
+        """
+        Change one map tile (0 floor, 1 wall, 2 coin, 3 ammo). Walls built or
+        knocked down are passed on to collisions, spawning and pathfinding.
+        """
+        grid = self.grid
+        was_wall = grid[r][c] == 1
+        grid[r][c] = value
+        self.changed_tiles.append((r, c))
+        self.pickups.tile_changed(r, c)
+        if was_wall != (value == 1):
+            self.collision.set_tile(r, c, value)
+            self.spawns.tile_changed(r, c, value != 1)
+            path_tile_changed(grid, r, c)
+            if self.distance_field is not None:
+                self.distance_field.tile_changed(r, c)
+            if self.vision is not None:
+                self.vision.tile_changed(r, c)
+
+    def shoot(self):
+        """Fire in the player's facing direction. Returns False if out of ammo."""
+        player = self.player
+        if player.ammo > 0:
+            player.ammo -= 1
+            bx, by = player.x, player.y
+            bullet = self.bullet_pool.take(bx, by, player.dir_r, player.dir_c)
+            self.bullets.append(bullet)
+            self.shots_fired += 1
+            shoot_sound.play()
+            return True
+        empty_sound.play()
+        return False
+
+    # Parts of step(), in the order they run. Each is a method named
+    # update_<phase>(dt, keys).
+    PHASES = ("player", "bullets", "enemies", "effects", "pickups", "spawns")
+    UPDATES = tuple("update_" + phase for phase in PHASES)
+
+    def step(self, dt, keys):
+        """
+        Advance one frame. 'keys' is anything indexable by pygame key codes,
+        like pygame.key.get_pressed(). Returns self.result.
 
+        If self.profiler is set, profiler.record(phase, seconds) is called
+        with the time taken by each phase.
+        """
+        self.elapsed += dt
+        self.frames += 1
+        if self.time_left() <= 0:
+            self.result = "GAMEOVER"
+            lose_sound.play()
         
-        if game_state == "PLAY":
-            current_time = pygame.time.get_ticks() // 1000
-            elapsed = current_time - start_time
-            time_left = CONFIG["TIME_LIMIT"] - elapsed
-            if time_left <= 0:
-                game_state = "GAMEOVER"
-                lose_sound.play()
-            
-            # Player
-            keys = pygame.key.get_pressed()
-            player.update(dt, keys, grid)
-            
-            # Bullets
-            for b in bullets:
-                b.update(dt, enemies, explosions, grid)
-            bullets = [b for b in bullets if b.alive]
-            
-            # Enemies
+        profiler = self.profiler
+        for phase, name in zip(self.PHASES, self.UPDATES):
+            update = getattr(self, name)
+            if profiler is None:
+                update(dt, keys)
+            else:
+                start = time.perf_counter()
+                update(dt, keys)
+                profiler.record(phase, time.perf_counter() - start)
+        return self.result
+
+    def update_player(self, dt, keys):
+        self.player.update(dt, keys, self.grid, self.collision)
+
+    def update_bullets(self, dt, keys):
+        if not self.bullets:
+            return
+        # Hit tests only look at enemies on nearby tiles
+        self.enemy_hash.clear()
+        for i, e in enumerate(self.enemies):
+            if not e.dead:
+                self.enemy_hash.add(e.r, e.c, (i, e))
+        for b in self.bullets:
+            b.update(dt, self.enemies, self.explosions, self.grid, self.enemy_hash)
+        compact(self.bullets, self.bullet_pool, lambda b: b.alive)
+
+    def update_enemies(self, dt, keys):
+        # Dodging only looks at bullets that swept nearby tiles
+        global game_over_flag
+        self.bullet_hash.clear()
+        for b in self.bullets:
+            self.bullet_hash.add_segment(b.old_x, b.old_y, b.x, b.y, b)
+        game_over_flag = False
+        batch = isinstance(self.enemies, EnemyBatch)
+        if batch:
+            if self.enemies.update(self.grid, self.player, self.bullets,
+                                   self.distance_field, self.bullet_hash, self.vision):
+                raise_player_caught()
+        else:
             try:
-                for e in enemies:
-                    e.update(grid, player, dt, bullets)
+                for e in self.enemies:
+                    e.update(self.grid, self.player, dt, self.bullets,
+                             self.distance_field, self.bullet_hash, self.vision)
             except:
                 pass
-            
-            if game_over_flag:
-                game_state = "GAMEOVER"
-                lose_sound.play()
-            
-            # Remove dead enemies
-            enemies = [e for e in enemies if not e.dead]
-            
-            # Update explosions
-            new_explosions = []
-            for p in explosions:
-                p.update(dt)
-                if p.lifetime > 0:
-                    new_explosions.append(p)
-            explosions = new_explosions
-            
-            # Coin pickup
-            rr, cc = player.get_tile_pos()
-            if (rr, cc) in coins:
-                coins.remove((rr, cc))
-                grid[rr][cc] = 0
-                coin_sound.play()
-            
-            # Ammo refill
-            if in_bounds(rr, cc) and grid[rr][cc] == 3:
-                if player.ammo < CONFIG["MAX_AMMO"]:
-                    player.ammo = CONFIG["MAX_AMMO"]
-                    ammo_sound.play()
-            
-            # Win condition
-            if len(coins) == 0 and not game_over_flag:
-                game_state = "WIN"
-                win_sound.play()
-            
-            # Enemy spawn
-            spawn_timer += 1
-            if spawn_timer >= CONFIG["ENEMY_SPAWN_INTERVAL"]:
-                spawn_timer = 0
-                spawn_enemy_far_from_player(grid, player, enemies, free_spots)
+        
+        if game_over_flag:
+            self.result = "GAMEOVER"
+            lose_sound.play()
+        
+        # Remove dead enemies
+        if batch:
+            self.enemies_killed += self.enemies.remove_dead()
+        else:
+            self.enemies_killed += compact(self.enemies, self.enemy_pool, lambda e: not e.dead)
+
+    def update_effects(self, dt, keys):
+        self.explosions.update(dt)
+
+    def update_pickups(self, dt, keys):
+        pickups = self.pickups
+        player = self.player
+        
+        # Coin pickup
+        rr, cc = player.get_tile_pos()
+        if pickups.coin_at(rr, cc):
+            self.set_tile(rr, cc, 0)
+            self.coins_collected += 1
+            coin_sound.play()
+        
+        # Ammo refill
+        if pickups.ammo_at(rr, cc):
+            if player.ammo < CONFIG["MAX_AMMO"]:
+                player.ammo = CONFIG["MAX_AMMO"]
+                ammo_sound.play()
+        
+        # Win condition
+        if len(pickups) == 0 and not game_over_flag:
+            self.result = "WIN"
+            win_sound.play()
+
+    def update_spawns(self, dt, keys):
+        self.spawn_timer += 1
+        if self.spawn_timer >= CONFIG["ENEMY_SPAWN_INTERVAL"]:
+            self.spawn_timer = 0
+            spawn_enemy_far_from_player(self.grid, self.player, self.enemies, self.spawns,
+                                        self.enemy_pool)
+
+    def state_digest(self):
+        """
+        Short hash of everything that decides how the round plays out from
+        here (including the random module's state). Two runs are identical
+        when their digests match frame for frame.
+        """
+        p = self.player
+        state = (
+            p.x, p.y, p.dir_r, p.dir_c, p.ammo,
+            [(e.r, e.c, e.state, e.dead, e.move_cooldown, e.path_update_cooldown,
+              e.path, e.path_index)
+             for e in self.enemies],
+            [(b.x, b.y, b.lifetime, b.alive) for b in self.bullets],
+            sorted(self.coins), self.spawn_timer, self.elapsed, self.frames, self.result,
+            random.getstate(),
+        )
+        return hashlib.sha1(repr(state).encode()).hexdigest()[:16]
+
+
+def save_recording(recording, world):
+    """Store the finished (or abandoned) round in RECORD_DIR."""
+    recording.finish(world)
+    os.makedirs(CONFIG["RECORD_DIR"], exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{recording.seed}.rec"
+    recording.save(os.path.join(CONFIG["RECORD_DIR"], name))
+
+def start_profiler(world):
+    """Profiler behind the F3 overlay; times the world's phases and drawing."""
+    global Rect
+    profiler = Profiler()
+    profiler.watch("pathfinding", lambda: path_totals.seconds, kind="timer")
+    profiler.watch("path_calls", lambda: path_totals.calls)
+    profiler.watch("nodes_expanded", lambda: path_totals.nodes_expanded)
+    profiler.watch("rects", rects_created)
+    Rect = CountingRect
+    world.profiler = profiler
+    return profiler
+
+def stop_profiler(world):
+    global Rect
+    Rect = pygame.Rect
+    world.profiler = None
+
+class GameSession:
+    """
+    The windowed game: menu, rounds and the GAMEOVER / WIN screens. Pressing
+    ENTER after a round calls reset(), which starts the next one in the same
+    GameWorld and PlayRenderer, so restarting any number of times uses the
+    same loop and the same memory instead of calling main() again.
+    """
+    def __init__(self):
+        setup_pygame()
+        self.world = None
+        self.renderer = None
+        self.profiler = None
+        self.running = True
+        self.reset()
+
+    def reset(self):
+        """Back to the menu with a new round ready to play."""
+        seed = random.randrange(2**32)  # kept so the round can be replayed
+        if self.world is None:
+            self.world = GameWorld(seed)
+            self.renderer = PlayRenderer(self.world)
+        else:
+            self.world.reset(seed)
+            self.renderer.reset()
+        self.recording = Recording(seed, CONFIG) if CONFIG["RECORD_DIR"] else None
+        self.shots = 0  # SPACE presses this frame
+        if CONFIG["PROFILE"] and self.profiler is None:
+            self.profiler = start_profiler(self.world)
+        self.state = "MENU"
+
+    def handle_event(self, event):
+        if event.type == pygame.QUIT:
+            self.running = False
+        
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            CONFIG["PROFILE"] = self.profiler is None
+            if self.profiler is None:
+                self.profiler = start_profiler(self.world)
+            else:
+                stop_profiler(self.world)
+                self.profiler = None
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F4 and self.profiler is not None:
+            self.profiler.dump(CONFIG["PROFILE_FILE"])
+        
+        if self.state == "MENU":
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+                self.state = "PLAY"
+                start_sound.play()
+        
+        elif self.state == "PLAY":
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    # Attempt to shoot
+                    self.world.shoot()
+                    self.shots += 1
+        
+        elif self.state in ("GAMEOVER", "WIN"):
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+                self.reset()  # fully restart
+
+    def update(self, dt, keys):
+        """Advance the round by one frame while playing."""
+        if self.state != "PLAY":
+            return
+        world = self.world
+        recording = self.recording
+        if recording is not None:
+            recording.add_frame(dt, keys, self.shots)
+        self.shots = 0
+        if world.step(dt, keys):
+            self.state = world.result
+            if recording is not None:
+                save_recording(recording, world)
+
+    def draw(self, frame_start):
+        world = self.world
+        profiler = self.profiler
+        if self.state == "PLAY":
+            info_text = f"Time: {world.time_left()}s  Ammo: {world.player.ammo}/{CONFIG['MAX_AMMO']}  Coins: {len(world.coins)}"
+            rects = self.renderer.draw(screen, info_text)
+            if profiler is None:
+                pygame.display.update(rects)
+                return
+            # Overlay goes on top and is cleared with the actors next frame
+            with profiler.section("overlay"):
+                overlay = profiler.draw(screen)
+            self.renderer.drawn.append(overlay)
+            rects.append(overlay)
+            with profiler.section("display"):
+                pygame.display.update(rects)
+            profiler.record("frame", time.perf_counter() - frame_start)
+            profiler.end_frame()
+            return
         
         screen.fill(BLACK)
         
-        if game_state == "MENU":
+        if self.state == "MENU":
             text = big_font.render("Press ENTER to Start", True, WHITE)
             rect = text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//2))
             screen.blit(text, rect)
         
-        elif game_state == "PLAY":
-            draw_map(screen, grid, coins)
-            
-            for b in bullets:
-                b.draw(screen)
-            
-            player.draw(screen)
-            
-            for e in enemies:
-                e.draw(screen)
-            
-            for p in explosions:
-                p.draw(screen)
-            
-            info_text = f"Time: {int(time_left)}s  Ammo: {player.ammo}/{CONFIG['MAX_AMMO']}  Coins: {len(coins)}"
-            surf = font.render(info_text, True, WHITE)
-            screen.blit(surf, (10, 10))
-        
-        elif game_state == "GAMEOVER":
+        elif self.state == "GAMEOVER":
             screen.fill(BLACK)
             text = big_font.render("GAME OVER! Press ENTER to Restart", True, RED)
             rect = text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//2))
             screen.blit(text, rect)
         
-        elif game_state == "WIN":
+        elif self.state == "WIN":
             screen.fill(BLACK)
             text = big_font.render("YOU WIN! Press ENTER to Restart", True, GREEN)
             rect = text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//2))
             screen.blit(text, rect)
         
         pygame.display.flip()
-    
+
+    def run(self):
+        while self.running:
+            dt_ms = clock.tick(CONFIG["FPS"])
+            dt = dt_ms / 1000.0
+            frame_start = time.perf_counter()
+            for event in pygame.event.get():
+                self.handle_event(event)
+            if self.state == "PLAY":
+                self.update(dt, pygame.key.get_pressed())
+            self.draw(frame_start)
+        
+        recording = self.recording
+        if recording is not None and len(recording) and self.world.result is None:
+            save_recording(recording, self.world)
+
+def main():
+    GameSession().run()
     pygame.quit()
     sys.exit()
 
-def spawn_enemy_far_from_player(grid, player, enemies, free_spots):
-    """Pick a random free spot >= SPAWN_MIN_DISTANCE from player."""
+def spawn_enemy_far_from_player(grid, player, enemies, spawns, pool=None):
+    """
+    Pick a random free spot >= SPAWN_MIN_DISTANCE from player (any free spot
+    if there is none). spawns is the world's SpawnIndex of free tiles; the
+    Enemy comes from pool (an ObjectPool) if given.
+    """
     pr, pc = player.get_tile_pos()
-    candidates = []
-    for (r,c) in free_spots:
-        dist = manhattan_distance((r,c), (pr,pc))
-        if dist >= CONFIG["SPAWN_MIN_DISTANCE"]:
-            candidates.append((r,c))
-    if not candidates:
-        candidates = free_spots[:]
-    r, c = random.choice(candidates)
-    enemies.append(Enemy(r, c))
+    r, c = spawns.pick_far(pr, pc, CONFIG["SPAWN_MIN_DISTANCE"], random)
+    enemy = pool.take(r, c) if pool is not None else Enemy(r, c)
+    enemies.append(enemy)
+    if pool is not None and isinstance(enemies, EnemyBatch):
+        pool.release(enemy)  # the batch copied it
 
 def draw_map(surface, grid, coins):
     for r in range(GRID_ROWS):
         for c in range(GRID_COLS):
-            val = grid[r][c]
-            rect = pygame.Rect(c*TILE_SIZE, r*TILE_SIZE, TILE_SIZE, TILE_SIZE)
-            
-            if val == 1:
-                pygame.draw.rect(surface, BROWN, rect)  # wall
-            elif val == 3:
-                pygame.draw.rect(surface, (70,70,200), rect)  # ammo tile
-            else:
-                pygame.draw.rect(surface, (40,40,40), rect)   # floor
-            
-            pygame.draw.rect(surface, GRAY, rect, 1)
+            draw_tile(surface, grid, r, c)
     
     # Draw coins
     for (rr, cc) in coins:
-        x = cc * TILE_SIZE + TILE_SIZE//4
-        y = rr * TILE_SIZE + TILE_SIZE//4
-        w = TILE_SIZE//2
-        coin_rect = pygame.Rect(x, y, w, w)
-        pygame.draw.ellipse(surface, GOLD, coin_rect)
-        pygame.draw.ellipse(surface, WHITE, coin_rect, 2)
+        draw_coin(surface, rr, cc)
+
+def draw_tile(surface, grid, r, c, offset=(0, 0)):
+    val = grid[r][c]
+    rect = Rect(c*TILE_SIZE - offset[0], r*TILE_SIZE - offset[1], TILE_SIZE, TILE_SIZE)
+    
+    if val == 1:
+        pygame.draw.rect(surface, BROWN, rect)  # wall
+    elif val == 3:
+        pygame.draw.rect(surface, (70,70,200), rect)  # ammo tile
+    else:
+        pygame.draw.rect(surface, (40,40,40), rect)   # floor
+    
+    pygame.draw.rect(surface, GRAY, rect, 1)
+    return rect
+
+def draw_coin(surface, rr, cc, offset=(0, 0)):
+    x = cc * TILE_SIZE + TILE_SIZE//4 - offset[0]
+    y = rr * TILE_SIZE + TILE_SIZE//4 - offset[1]
+    w = TILE_SIZE//2
+    coin_rect = Rect(x, y, w, w)
+    pygame.draw.ellipse(surface, GOLD, coin_rect)
+    pygame.draw.ellipse(surface, WHITE, coin_rect, 2)
+
+# Tiles per side of one off-screen map chunk
+CHUNK_TILES = 16
+
+class PlayRenderer:
+    """
+    Draws the PLAY screen through a camera that follows the player. The map
+    is cut into CHUNK_TILES x CHUNK_TILES chunks that are rendered off-screen
+    when they first come into view and dropped once they are out of it, so
+    memory and drawing cost depend on the window size, not the map size.
+    While the camera stands still only the areas covered by last frame's
+    actors and HUD are restored, tiles the world reports in changed_tiles are
+    repainted, and draw() returns just those rects for pygame.display.update().
+    """
+    def __init__(self, world):
+        self.world = world
+        self.view_w = WINDOW_WIDTH
+        self.view_h = WINDOW_HEIGHT
+        self.chunk_px = CHUNK_TILES * TILE_SIZE
+        self.chunks = {}      # (chunk row, chunk col) -> Surface
+        self.reset()
+
+    def reset(self):
+        """Forget everything drawn, e.g. after world.reset()."""
+        self.chunks.clear()
+        self.camera = None    # top-left of the view in map pixels
+        self.world.changed_tiles.clear()
+        self.drawn = []       # rects drawn over the map last frame
+        self.full = True      # next draw repaints the whole screen
+
+    def follow(self, x, y):
+        """Camera position centred on (x, y), kept inside the map."""
+        cx = min(max(int(x) - self.view_w // 2, 0), MAP_WIDTH - self.view_w)
+        cy = min(max(int(y) - self.view_h // 2, 0), MAP_HEIGHT - self.view_h)
+        return cx, cy
+
+    def visible_chunks(self):
+        cx, cy = self.camera
+        k = self.chunk_px
+        return (range(cy // k, (cy + self.view_h - 1) // k + 1),
+                range(cx // k, (cx + self.view_w - 1) // k + 1))
+
+    def chunk(self, kr, kc):
+        surf = self.chunks.get((kr, kc))
+        if surf is None:
+            grid = self.world.grid
+            r0, c0 = kr * CHUNK_TILES, kc * CHUNK_TILES
+            r1 = min(r0 + CHUNK_TILES, GRID_ROWS)
+            c1 = min(c0 + CHUNK_TILES, GRID_COLS)
+            surf = pygame.Surface(((c1 - c0) * TILE_SIZE, (r1 - r0) * TILE_SIZE)).convert()
+            offset = (c0 * TILE_SIZE, r0 * TILE_SIZE)
+            for r in range(r0, r1):
+                for c in range(c0, c1):
+                    draw_tile(surf, grid, r, c, offset)
+                    if grid[r][c] == 2:
+                        draw_coin(surf, r, c, offset)
+            self.chunks[(kr, kc)] = surf
+        return surf
+
+    def restore(self, surface, rect=None):
+        """Paint the map back over 'rect' of the screen (all of it if None)."""
+        cx, cy = self.camera
+        k = self.chunk_px
+        surface.set_clip(rect)
+        rows, cols = self.visible_chunks()
+        for kr in rows:
+            for kc in cols:
+                surface.blit(self.chunk(kr, kc), (kc * k - cx, kr * k - cy))
+        surface.set_clip(None)
+
+    def move_camera(self, camera):
+        self.camera = camera
+        # Forget chunks more than one chunk away from the view
+        rows, cols = self.visible_chunks()
+        for (kr, kc) in list(self.chunks):
+            if not (rows.start - 1 <= kr <= rows.stop and cols.start - 1 <= kc <= cols.stop):
+                del self.chunks[(kr, kc)]
+
+    def draw(self, surface, hud_text):
+        world = self.world
+        grid = world.grid
+        profiler = world.profiler
+        if profiler is not None:
+            started = time.perf_counter()
+        
+        camera = self.follow(world.player.x, world.player.y)
+        if camera != self.camera:
+            self.move_camera(camera)
+            self.full = True
+        cx, cy = camera
+        
+        if self.full:
+            self.restore(surface)
+            dirty = [surface.get_rect()]
+        else:
+            dirty = self.drawn
+            for rect in dirty:
+                self.restore(surface, rect)
+        
+        # Tiles that changed on the map (e.g. a coin was picked up)
+        for (r, c) in world.changed_tiles:
+            kr, kc = r // CHUNK_TILES, c // CHUNK_TILES
+            surf = self.chunks.get((kr, kc))
+            if surf is None:
+                continue  # drawn fresh if it comes into view
+            offset = (kc * self.chunk_px, kr * self.chunk_px)
+            draw_tile(surf, grid, r, c, offset)
+            if grid[r][c] == 2:
+                draw_coin(surf, r, c, offset)
+            rect = tile_rect(r, c).move(-cx, -cy)
+            if rect.colliderect(surface.get_rect()):
+                self.restore(surface, rect)
+                dirty.append(rect)
+        world.changed_tiles.clear()
+        
+        if profiler is not None:
+            profiler.record("draw_map", time.perf_counter() - started)
+            started = time.perf_counter()
+        
+        # Actors outside the view are skipped
+        left, top = cx - TILE_SIZE, cy - TILE_SIZE
+        right, bottom = cx + self.view_w + TILE_SIZE, cy + self.view_h + TILE_SIZE
+        
+        drawn = []
+        for b in world.bullets:
+            if left < b.x < right and top < b.y < bottom:
+                drawn.append(b.draw(surface, camera))
+        
+        drawn.append(world.player.draw(surface, camera))
+        
+        r0, c0 = top // TILE_SIZE, left // TILE_SIZE
+        r1, c1 = bottom // TILE_SIZE, right // TILE_SIZE
+        for e in world.enemies:
+            if r0 <= e.r <= r1 and c0 <= e.c <= c1:
+                rect = e.draw(surface, camera)
+                if rect is not None:
+                    drawn.append(rect)
+        
+        drawn.extend(world.explosions.draw(surface, camera))
+        
+        surf = font.render(hud_text, True, WHITE)
+        drawn.append(surface.blit(surf, (10, 10)))
+        
+        if profiler is not None:
+            profiler.record("draw_actors", time.perf_counter() - started)
+        
+        self.full = False
+        self.drawn = drawn
+        return dirty + drawn
 
 
 game_over_flag = False
@@ -0,0 +1,346 @@
+"""
+Hierarchical pathfinding (HPA*) for very large maps in game_with_ai.py.
+
+The map is cut into square clusters. Wherever two neighbouring clusters
+touch through open floor there is an entrance, and the tiles on both sides
+of an entrance become nodes of a small abstract graph: the two sides are
+one step apart, and nodes of the same cluster are joined by their walking
+distance inside it. A query searches that graph instead of the tiles and
+then fills in the steps inside each cluster, so its cost grows with the
+number of clusters a path crosses rather than with the size of the map.
+
+Building the abstraction takes a few seconds on a 1000x1000 map, so it can
+be saved under a cache directory (one file per wall layout) and loaded on
+later runs. A tile that turns into or out of a wall only rebuilds the
+clusters around it.
+"""
+import hashlib
+import heapq
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+from pathfinding import totals, walkable_mask
+
+# Entrances at least this wide get a node pair at each end instead of one in
+# the middle, as in the HPA* paper.
+WIDE_ENTRANCE = 6
+CACHE_VERSION = 1
+INF = float("inf")
+
+# Abstractions already built or loaded in this process, by cache key, oldest
+# first. Only the last few are kept: the map changes over a long run, and
+# older layouts can still be loaded from the cache directory.
+KEEP_BUILT = 2
+_built = {}
+
+
+class HierarchicalPlanner:
+    """
+    HPA* over one grid, with the same path(start, goal, agent=None) and
+    tile_changed(r, c) as IncrementalPlanner, so it can stand in for the
+    shared DistanceField (PATHFINDING = "hpa").
+
+    Paths are found by an A* over the entrance graph and are near-shortest
+    rather than shortest: they go through entrance tiles, which can add a
+    few steps. Start and goal in the same cluster are joined directly when
+    possible.
+
+    Tiles are flat indices (r * cols + c) inside; clusters are numbered
+    row by row, and the border to the east of cluster k is 2 * k, the one
+    to the south 2 * k + 1.
+    """
+    def __init__(self, grid, cluster_size=16, cache_dir=None):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        self.size = cluster_size
+        self.crows = -(-self.rows // cluster_size)
+        self.ccols = -(-self.cols // cluster_size)
+        self.walkable = walkable_mask(grid)
+
+        self.nodes = {k: set() for k in range(self.crows * self.ccols)}
+        self.uses = {}       # node -> number of entrances it belongs to
+        self.borders = {}    # border -> [(node, node across)]
+        self.inter = {}      # node -> set of nodes across a border (1 step)
+        self.intra = {}      # node -> {node in the same cluster: distance}
+        self.segments = {}   # cluster -> {(node, node): tiles between them}
+        self.nodes_expanded = 0
+
+        started = time.perf_counter()
+        key = self.cache_key()
+        path = os.path.join(cache_dir, f"hpa-{key}.npz") if cache_dir else None
+        arrays = _built.get(key)
+        if arrays is None and path and os.path.exists(path):
+            with np.load(path) as data:
+                arrays = data["entrances"], data["distances"]
+        self.loaded = arrays is not None
+        if arrays is None:
+            self._build()
+            arrays = self._arrays()
+            if path:
+                os.makedirs(cache_dir, exist_ok=True)
+                np.savez_compressed(path, entrances=arrays[0], distances=arrays[1])
+        else:
+            self._load(*arrays)
+        _built.pop(key, None)
+        _built[key] = arrays
+        while len(_built) > KEEP_BUILT:
+            del _built[next(iter(_built))]
+        self.setup_seconds = time.perf_counter() - started
+
+    def cache_key(self):
+        """Hex digest naming this wall layout and cluster size."""
+        digest = hashlib.sha1(bytes(self.walkable))
+        digest.update(f"{self.rows}x{self.cols}/{self.size}/v{CACHE_VERSION}".encode())
+        return digest.hexdigest()[:20]
+
+    # Building the abstraction
+
+    def _cluster(self, i):
+        r, c = divmod(i, self.cols)
+        return (r // self.size) * self.ccols + c // self.size
+
+    def _bounds(self, k):
+        cr, cc = divmod(k, self.ccols)
+        r0, c0 = cr * self.size, cc * self.size
+        return r0, c0, min(r0 + self.size, self.rows), min(c0 + self.size, self.cols)
+
+    def _border_pairs(self, border):
+        """Entrance node pairs across a border, from the current walls."""
+        k, south = divmod(border, 2)
+        r0, c0, r1, c1 = self._bounds(k)
+        cols = self.cols
+        if south:
+            if r1 >= self.rows:
+                return []
+            first, step, count, across = (r1 - 1) * cols + c0, 1, c1 - c0, cols
+        else:
+            if c1 >= cols:
+                return []
+            first, step, count, across = r0 * cols + c1 - 1, cols, r1 - r0, 1
+
+        walkable = self.walkable
+        pairs = []
+        run = []
+        for n in range(count + 1):
+            a = first + n * step
+            if n < count and walkable[a] and walkable[a + across]:
+                run.append(a)
+                continue
+            if run:
+                ends = [run[len(run) // 2]] if len(run) < WIDE_ENTRANCE else [run[0], run[-1]]
+                pairs.extend((a, a + across) for a in ends)
+                run = []
+        return pairs
+
+    def _set_border(self, border, pairs):
+        for a, b in self.borders.pop(border, ()):
+            self.inter[a].discard(b)
+            self.inter[b].discard(a)
+            for node in (a, b):
+                self.uses[node] -= 1
+                if self.uses[node] == 0:
+                    del self.uses[node], self.inter[node], self.intra[node]
+                    self.nodes[self._cluster(node)].discard(node)
+        for a, b in pairs:
+            for node in (a, b):
+                if node not in self.uses:
+                    self.uses[node] = 0
+                    self.inter[node] = set()
+                    self.intra[node] = {}
+                    self.nodes[self._cluster(node)].add(node)
+                self.uses[node] += 1
+            self.inter[a].add(b)
+            self.inter[b].add(a)
+        if pairs:
+            self.borders[border] = pairs
+
+    def _connect(self, k):
+        """Walking distances between the nodes of cluster k."""
+        nodes = self.nodes[k]
+        for n in nodes:
+            dist, _ = self._search(k, n)
+            self.intra[n] = {m: dist[m] for m in nodes if m != n and m in dist}
+        self.segments.pop(k, None)
+
+    def _build(self):
+        for k in self.nodes:
+            for border in (2 * k, 2 * k + 1):
+                self._set_border(border, self._border_pairs(border))
+        for k in self.nodes:
+            self._connect(k)
+
+    def _arrays(self):
+        entrances = [(border, a, b) for border, pairs in self.borders.items() for a, b in pairs]
+        distances = [(a, b, d) for a, near in self.intra.items() for b, d in near.items()]
+        return (np.array(entrances, dtype=np.int64).reshape(-1, 3),
+                np.array(distances, dtype=np.int64).reshape(-1, 3))
+
+    def _load(self, entrances, distances):
+        by_border = {}
+        for border, a, b in entrances.tolist():
+            by_border.setdefault(border, []).append((a, b))
+        for border, pairs in by_border.items():
+            self._set_border(border, pairs)
+        intra = self.intra
+        for a, b, d in distances.tolist():
+            intra[a][b] = d
+
+    def tile_changed(self, r, c):
+        """Tile (r, c) became or stopped being a wall: rebuild around it."""
+        i = r * self.cols + c
+        walkable = int(self.grid[r][c] != 1)
+        if self.walkable[i] == walkable:
+            return
+        self.walkable[i] = walkable
+
+        k = self._cluster(i)
+        r0, c0, r1, c1 = self._bounds(k)
+        borders = []
+        if r == r0 and k >= self.ccols:
+            borders.append(2 * (k - self.ccols) + 1)
+        if r == r1 - 1:
+            borders.append(2 * k + 1)
+        if c == c0 and k % self.ccols:
+            borders.append(2 * (k - 1))
+        if c == c1 - 1:
+            borders.append(2 * k)
+
+        changed = {k}
+        for border in borders:
+            self._set_border(border, self._border_pairs(border))
+            near, south = divmod(border, 2)
+            changed.update((near, near + (self.ccols if south else 1)))
+        for k in changed:
+            if k in self.nodes:
+                self._connect(k)
+
+    # Queries
+
+    def _search(self, k, source, target=-1):
+        """
+        BFS from tile index 'source' that stays inside cluster k, until
+        'target' is reached or the cluster is done. Returns (dist, parent).
+        """
+        r0, c0, r1, c1 = self._bounds(k)
+        cols = self.cols
+        walkable = self.walkable
+        dist = {source: 0}
+        parent = {source: -1}
+        queue = deque([source])
+        expanded = 0
+        while queue:
+            i = queue.popleft()
+            if i == target:
+                break
+            expanded += 1
+            r, c = divmod(i, cols)
+            d = dist[i] + 1
+            # up, down, left, right
+            for j, ok in ((i - cols, r > r0), (i + cols, r < r1 - 1),
+                          (i - 1, c > c0), (i + 1, c < c1 - 1)):
+                if ok and walkable[j] and j not in dist:
+                    dist[j] = d
+                    parent[j] = i
+                    queue.append(j)
+        self.nodes_expanded += expanded
+        return dist, parent
+
+    def _segment(self, k, a, b):
+        """Tiles from node a to node b inside cluster k, remembered."""
+        segments = self.segments.setdefault(k, {})
+        tiles = segments.get((a, b))
+        if tiles is None:
+            _, parent = self._search(k, a, b)
+            tiles = segments[(a, b)] = _trace(parent, b)[::-1]
+        return tiles
+
+    def path(self, start, goal, agent=None):
+        """
+        Tiles from start to goal inclusive, or [] if there is no path.
+        agent is ignored; it is there to match IncrementalPlanner.
+        """
+        started = time.perf_counter()
+        expanded = self.nodes_expanded
+        path = self._path(start, goal)
+        totals.add(1, self.nodes_expanded - expanded, started)
+        return path
+
+    def _path(self, start, goal):
+        if start == goal:
+            return [start]
+        rows, cols = self.rows, self.cols
+        for r, c in (start, goal):
+            if not (0 <= r < rows and 0 <= c < cols) or not self.walkable[r * cols + c]:
+                return []
+        s = start[0] * cols + start[1]
+        t = goal[0] * cols + goal[1]
+        ks, kt = self._cluster(s), self._cluster(t)
+
+        # Start and goal join the abstract graph through their own clusters
+        from_start, start_parent = self._search(ks, s)
+        if ks == kt and t in from_start:
+            return [divmod(i, cols) for i in _trace(start_parent, t)[::-1]]
+        to_goal, goal_parent = self._search(kt, t)
+        start_edges = [(n, from_start[n]) for n in self.nodes[ks] if n in from_start]
+        goal_edges = {n: to_goal[n] for n in self.nodes[kt] if n in to_goal}
+
+        # A* over the nodes (s and t included)
+        gr, gc = goal
+        inter, intra = self.inter, self.intra
+        cost = {s: 0}
+        parent = {s: -1}
+        h = abs(start[0] - gr) + abs(start[1] - gc)
+        heap = [(h, h, 0, s)]
+        expanded = 0
+        while heap:
+            _, _, d, i = heapq.heappop(heap)
+            if i == t:
+                break
+            if d > cost[i]:
+                continue  # stale entry
+            expanded += 1
+            if i == s:
+                edges = start_edges + [(j, 1) for j in inter.get(s, ())]
+            else:
+                edges = [(j, 1) for j in inter[i]] + list(intra[i].items())
+                if i in goal_edges:
+                    edges.append((t, goal_edges[i]))
+            for j, w in edges:
+                nd = d + w
+                if nd < cost.get(j, INF):
+                    cost[j] = nd
+                    parent[j] = i
+                    r, c = divmod(j, cols)
+                    h = abs(r - gr) + abs(c - gc)
+                    # Ties on f go to the node nearer the goal
+                    heapq.heappush(heap, (nd + h, h, nd, j))
+        self.nodes_expanded += expanded
+        if t not in parent:
+            return []
+
+        # Fill in the tiles between consecutive nodes
+        nodes = _trace(parent, t)[::-1]
+        tiles = [s]
+        for a, b in zip(nodes, nodes[1:]):
+            if self._cluster(a) != self._cluster(b):
+                tiles.append(b)
+            elif a == s:
+                tiles.extend(_trace(start_parent, b)[-2::-1])
+            elif b == t:
+                tiles.extend(_trace(goal_parent, a)[1:])
+            else:
+                tiles.extend(self._segment(self._cluster(a), a, b)[1:])
+        return [divmod(i, cols) for i in tiles]
+
+
+def _trace(parent, i):
+    """Follow parent links from i back to the root: [i, ..., root]."""
+    chain = []
+    while i != -1:
+        chain.append(i)
+        i = parent[i]
+    return chain
@@ -0,0 +1,116 @@
+"""
+Map files and procedurally generated maps for game_with_ai.py.
+
+Maps are 2D uint8 NumPy arrays using the same tile values as CUSTOM_MAP and
+are stored as .npy files, e.g.
+
+    python maps.py 512 512 --seed 3 -o arena.npy
+
+then set CONFIG["MAP_FILE"] = "arena.npy" in game_with_ai.py.
+"""
+import argparse
+
+import numpy as np
+
+FLOOR, WALL, COIN, AMMO = 0, 1, 2, 3
+TILE_VALUES = (FLOOR, WALL, COIN, AMMO)
+
+
+def load_map(path):
+    """Load a .npy tile map, checking its shape and tile values."""
+    grid = np.load(path, allow_pickle=False)
+    if grid.ndim != 2 or 0 in grid.shape:
+        raise ValueError(f"{path}: expected a 2D tile array, got shape {grid.shape}")
+    if not np.isin(grid, TILE_VALUES).all():
+        raise ValueError(f"{path}: tiles must be one of {TILE_VALUES}")
+    return grid.astype(np.uint8)
+
+
+def save_map(path, grid):
+    np.save(path, np.asarray(grid, dtype=np.uint8))
+
+
+def generate_map(rows, cols, seed=None, room_size=6, loop_chance=0.15,
+                 coin_density=0.01, ammo_density=0.002):
+    """
+    Seeded random map of square rooms separated by 1-tile walls. Doors follow
+    a random spanning tree between neighbouring rooms, so every floor tile is
+    reachable, and loop_chance of the remaining walls get a door too so there
+    is more than one way around. Coins and ammo tiles are scattered over the
+    floor (at least one coin).
+    """
+    step = room_size + 1
+    room_rows = (rows - 1) // step
+    room_cols = (cols - 1) // step
+    if room_rows < 1 or room_cols < 1:
+        raise ValueError(f"map must be at least {step + 1}x{step + 1} tiles for room_size={room_size}")
+
+    rng = np.random.default_rng(seed)
+    grid = np.full((rows, cols), WALL, dtype=np.uint8)
+
+    # Rooms: every tile whose offset inside its room block is < room_size
+    r_in = np.arange(rows) - 1
+    c_in = np.arange(cols) - 1
+    r_room = (r_in >= 0) & (r_in % step < room_size) & (r_in < room_rows * step)
+    c_room = (c_in >= 0) & (c_in % step < room_size) & (c_in < room_cols * step)
+    grid[np.ix_(r_room, c_room)] = FLOOR
+
+    # Candidate doors between neighbouring rooms, as (room a, room b) ids
+    ids = np.arange(room_rows * room_cols).reshape(room_rows, room_cols)
+    edges = np.concatenate([
+        np.stack([ids[:, :-1].ravel(), ids[:, 1:].ravel()], axis=1),   # east
+        np.stack([ids[:-1, :].ravel(), ids[1:, :].ravel()], axis=1),   # south
+    ])
+    edges = edges[rng.permutation(len(edges))]
+    extra = rng.random(len(edges)) < loop_chance
+
+    # Kruskal: a door goes in wherever it joins two unconnected groups
+    parent = list(range(room_rows * room_cols))
+    def find(a):
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    door_width = max(1, room_size // 2)
+    offsets = rng.integers(0, room_size - door_width + 1, len(edges))
+    for (a, b), loop, offset in zip(edges.tolist(), extra.tolist(), offsets.tolist()):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[ra] = rb
+        elif not loop:
+            continue
+        i, j = divmod(a, room_cols)
+        top = 1 + i * step
+        left = 1 + j * step
+        if b == a + 1:   # east wall of room a
+            grid[top + offset:top + offset + door_width, left + room_size] = FLOOR
+        else:            # south wall of room a
+            grid[top + room_size, left + offset:left + offset + door_width] = FLOOR
+
+    floor = np.flatnonzero(grid == FLOOR)
+    n_coins = max(1, int(len(floor) * coin_density))
+    n_ammo = int(len(floor) * ammo_density)
+    picks = rng.choice(floor, n_coins + n_ammo, replace=False)
+    grid.flat[picks[:n_coins]] = COIN
+    grid.flat[picks[n_coins:]] = AMMO
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a random map and save it as .npy")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("cols", type=int)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--room-size", type=int, default=6)
+    parser.add_argument("-o", "--output", default="map.npy")
+    args = parser.parse_args()
+
+    grid = generate_map(args.rows, args.cols, args.seed, args.room_size)
+    save_map(args.output, grid)
+    print(f"Saved {args.rows}x{args.cols} map to {args.output} "
+          f"({int((grid == COIN).sum())} coins, {int((grid == AMMO).sum())} ammo tiles)")
+
+
+if __name__ == "__main__":
+    main()
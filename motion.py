@@ -0,0 +1,135 @@
+"""
+Motion detection for red_light_green_light.py.
+"""
+import cv2
+import numpy as np
+
+SCORES = ("contours", "pixels", "grid")
+
+
+class MotionDetector:
+    """
+    Finds what moved in each camera frame with background subtraction
+    (MOG2). Frames wider than width are shrunk to that width first, keeping
+    their shape, and only the grayscale copy is looked at, so a big camera
+    costs little more than a small one (the blur shrinks along with the
+    frame, or the moving edges would be smoothed away). roi, if given, is a
+    polygon of (x, y) corners as fractions of the frame's width and height
+    (0 to 1); motion outside it is ignored.
+
+    How much moved is scored one of three ways:
+      "contours"  area inside the outlines of the moving regions
+      "pixels"    number of moving pixels (cv2.countNonZero, no outlines)
+      "grid"      moving pixels counted per cell of a grid (rows, cols),
+                  from an integral image; the outer edge_cells rings of
+                  cells, and cells less than noise (a fraction) moving,
+                  don't count, so it scores small moves lower than the
+                  other two and won't always make the same lose calls
+
+    detect(frame, outline=None) returns (foreground mask, contours of the
+    moving regions, total movement, movement per grid cell). The mask and
+    contours are at the detection size, but movement is scaled back up to
+    camera pixels so it can be compared with the same DETECTION_AREA
+    whatever the detection size. Movement much thinner than a detection
+    pixel (a slight sway) is the exception: how much of it shows up depends
+    on the width. Contours are only found for the "contours" score or when
+    outline is true (self.outline if not given; None otherwise); cells is
+    None except for the "grid" score, and holds 0 for the cells that didn't
+    count.
+    """
+    def __init__(self, sensitivity, width=None, roi=None, score="contours",
+                 grid=(6, 8), edge_cells=0, noise=0.0):
+        if score not in SCORES:
+            raise ValueError(f"score must be one of {SCORES}, not {score!r}")
+        self.fgbg = cv2.createBackgroundSubtractorMOG2(history=5, varThreshold=sensitivity)
+        self.width = width
+        self.roi = roi
+        self.score = score
+        self.grid = grid
+        self.edge_cells = edge_cells
+        self.noise = noise
+        self.outline = True       # find contours even when the score doesn't need them
+        self.frame_shape = None
+        self.size = None          # (width, height) detection runs at
+        self.area_scale = 1.0     # camera pixels per detection pixel
+        self.blur = 5             # blur kernel size at the detection size
+        self.roi_outline = None   # roi in detection pixels, drawable as a contour
+        self.roi_mask = None
+        self.cell_edges = None    # (row edges, column edges) of the grid in detection pixels
+        self._cell_floor = None   # moving pixels a cell needs to count, 255 per pixel
+        self._counted = None      # cells that can count at all
+
+    def _resize_for(self, frame):
+        """Works out the detection size, ROI mask and grid for frames shaped like this one."""
+        height, width = frame.shape[:2]
+        self.frame_shape = frame.shape
+        if self.width and self.width < width:
+            self.size = (self.width, max(1, round(height * self.width / width)))
+        else:
+            self.size = (width, height)
+        self.area_scale = width * height / (self.size[0] * self.size[1])
+        self.blur = 2 * round((5 * self.size[0] / width - 1) / 2) + 1
+        if self.roi is not None:
+            corners = np.array(self.roi, dtype=float) * (self.size[0] - 1, self.size[1] - 1)
+            self.roi_outline = corners.round().astype(np.int32).reshape(-1, 1, 2)
+            self.roi_mask = np.zeros((self.size[1], self.size[0]), dtype=np.uint8)
+            cv2.fillPoly(self.roi_mask, [self.roi_outline], 255)
+
+        rows, cols = self.grid
+        ys = np.linspace(0, self.size[1], rows + 1).round().astype(int)
+        xs = np.linspace(0, self.size[0], cols + 1).round().astype(int)
+        self.cell_edges = (ys, xs)
+        self._cell_floor = np.outer(np.diff(ys), np.diff(xs)) * self.noise * 255
+        self._counted = np.zeros((rows, cols), dtype=bool)
+        edge = self.edge_cells
+        self._counted[edge:rows - edge, edge:cols - edge] = True
+
+    def cell_outlines(self, cells):
+        """Rectangles, as contours in detection pixels, around the cells with movement."""
+        ys, xs = self.cell_edges
+        return [np.array([[[xs[c], ys[r]]], [[xs[c + 1] - 1, ys[r]]],
+                          [[xs[c + 1] - 1, ys[r + 1] - 1]], [[xs[c], ys[r + 1] - 1]]], dtype=np.int32)
+                for r, c in zip(*np.nonzero(cells))]
+
+    def detect(self, frame, outline=None):
+        if outline is None:
+            outline = self.outline
+        if frame.shape != self.frame_shape:
+            self._resize_for(frame)
+        if self.size != (frame.shape[1], frame.shape[0]):
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.blur > 1:
+            gray_frame = cv2.GaussianBlur(gray_frame, (self.blur, self.blur), 0)
+        fgmask = self.fgbg.apply(gray_frame)
+        _, thresh = cv2.threshold(fgmask, 25, 255, cv2.THRESH_BINARY)
+        if self.roi_mask is not None:
+            cv2.bitwise_and(thresh, self.roi_mask, dst=thresh)
+
+        contours = cells = None
+        if self.score == "contours" or outline:
+            contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        if self.score == "contours":
+            if self.area_scale == 1:
+                total_movement = sum(cv2.contourArea(c) for c in contours)
+            else:
+                # contourArea() runs through the middle of the edge pixels, so it
+                # leaves out half a pixel all around: much more of a region,
+                # relatively, once it is shrunk. Count those pixels back in, scale
+                # up, then leave out half a camera pixel around the edge instead.
+                k = self.area_scale ** 0.5
+                total_movement = sum(cv2.contourArea(c) * k * k + cv2.arcLength(c, True) * k * (k - 1) / 2 + k * k
+                                     for c in contours)
+        elif self.score == "pixels":
+            total_movement = cv2.countNonZero(thresh) * self.area_scale
+        else:
+            # Moving pixels (255 each) in every cell, from the integral image
+            # at the cell corners
+            ys, xs = self.cell_edges
+            corners = cv2.integral(thresh)[np.ix_(ys, xs)]
+            sums = corners[1:, 1:] - corners[:-1, 1:] - corners[1:, :-1] + corners[:-1, :-1]
+            counted = self._counted & (sums > 0) & (sums >= self._cell_floor)
+            cells = np.where(counted, sums, 0) * (self.area_scale / 255)
+            total_movement = cells.sum()
+        return fgmask, contours, total_movement, cells
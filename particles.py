@@ -0,0 +1,105 @@
+"""
+Particle effects (explosions) stored as NumPy arrays instead of one Python
+object per particle.
+"""
+import numpy as np
+import pygame
+
+
+class ParticlePool:
+    """
+    Fixed-capacity pool of particles kept in preallocated arrays (x, y, vx, vy,
+    life, color index). Live particles always occupy the first 'count' slots:
+    update() moves and ages them all in one vectorized step and packs the
+    survivors to the front, so nothing is allocated per particle. Particles
+    emitted while the pool is full are dropped.
+    """
+    def __init__(self, capacity, palette, radius=3, seed=None):
+        self.capacity = capacity
+        self.palette = list(palette)
+        self.radius = radius
+        self.rng = np.random.default_rng(seed)
+        self.count = 0
+
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.life = np.zeros(capacity)
+        self.color = np.zeros(capacity, dtype=np.uint8)
+        self._sprites = None
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def reset(self, seed=None):
+        """Empty the pool and reseed it for a new round."""
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+
+    def emit(self, x, y, n, speed_min, speed_max, lifetime, color=0):
+        """Burst of n particles from (x, y) in random directions."""
+        start = self.count
+        end = min(start + n, self.capacity)
+        n = end - start
+        if n <= 0:
+            return
+        angle = self.rng.uniform(0, 2*np.pi, n)
+        speed = self.rng.uniform(speed_min, speed_max, n)
+        self.x[start:end] = x
+        self.y[start:end] = y
+        self.vx[start:end] = np.cos(angle) * speed
+        self.vy[start:end] = np.sin(angle) * speed
+        self.life[start:end] = lifetime
+        self.color[start:end] = color
+        self.count = end
+
+    def update(self, dt):
+        n = self.count
+        if n == 0:
+            return
+        self.x[:n] += self.vx[:n] * dt
+        self.y[:n] += self.vy[:n] * dt
+        self.life[:n] -= dt
+
+        alive = self.life[:n] > 0
+        kept = int(np.count_nonzero(alive))
+        if kept < n:
+            for arr in (self.x, self.y, self.vx, self.vy, self.life, self.color):
+                arr[:kept] = arr[:n][alive]
+            self.count = kept
+
+    def _build_sprites(self):
+        # Same pixels as pygame.draw.circle(surface, color, center, radius)
+        r = self.radius
+        sprites = []
+        for color in self.palette:
+            sprite = pygame.Surface((2*r + 1, 2*r + 1))
+            key = (0, 0, 0) if color != (0, 0, 0) else (255, 255, 255)
+            sprite.fill(key)
+            sprite.set_colorkey(key)
+            pygame.draw.circle(sprite, color, (r, r), r)
+            sprites.append(sprite)
+        return sprites
+
+    def draw(self, surface, offset=(0, 0)):
+        """
+        Draw every live particle with one blits() call, shifted by -offset
+        (the camera position). Returns the rects.
+        """
+        n = self.count
+        if n == 0:
+            return []
+        if self._sprites is None:
+            self._sprites = self._build_sprites()
+        sprites = self._sprites
+        r = self.radius
+        # int() truncation, like the per-particle draw it replaces
+        xs = (self.x[:n].astype(int) - (r + offset[0])).tolist()
+        ys = (self.y[:n].astype(int) - (r + offset[1])).tolist()
+        colors = self.color[:n].tolist()
+        return surface.blits([(sprites[k], (px, py))
+                              for k, px, py in zip(colors, xs, ys)])
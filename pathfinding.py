@@ -0,0 +1,783 @@
+"""
+Pathfinding helpers used by game_with_ai.py.
+
+Tiles are addressed as (row, col) like the rest of the game, and a tile is
+walkable when its grid value is anything other than 1 (wall).
+"""
+import heapq
+import time
+import weakref
+from array import array
+from collections import deque
+
+import numpy as np
+
+# Same neighbour order as bfs_pathfinding: up, down, left, right.
+NEIGHBOR_OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+def manhattan_distance(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+class SearchTotals:
+    """
+    Running totals over every path request made through find_path() or
+    DistanceField.path(), read by the profiler.
+    """
+    def __init__(self):
+        self.calls = 0           # path requests
+        self.searches = 0        # searches started (a DistanceField reuses one)
+        self.nodes_expanded = 0
+        self.seconds = 0.0
+
+    def add(self, searches, nodes_expanded, started):
+        self.calls += 1
+        self.searches += searches
+        self.nodes_expanded += nodes_expanded
+        self.seconds += time.perf_counter() - started
+
+totals = SearchTotals()
+
+
+def walkable_mask(grid):
+    """Flat bytearray indexed by r * cols + c, 1 where the tile isn't a wall."""
+    return bytearray((np.asarray(grid) != 1).astype(np.uint8).ravel())
+
+
+class GridSearch:
+    """
+    Reusable BFS / A* search buffers for one grid size.
+
+    Tiles are stored as flat indices (r * cols + c). Instead of clearing the
+    visited buffer between searches, every search gets a new stamp and a tile
+    counts as visited when its entry equals the current stamp. Paths are
+    rebuilt from parent pointers, so nothing is copied while searching.
+
+    Walls are read into a flat mask the first time a grid is searched and
+    reused while the same grid object is passed in, so a wall added or
+    removed in place must be reported with tile_changed().
+    """
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        size = rows * cols
+        self.seen = array("I", bytes(4 * size))
+        self.parent = array("i", bytes(4 * size))
+        self.cost = array("i", bytes(4 * size))
+        self.stamp = 0
+        self.nodes_expanded = 0
+        self.grid = None
+        self.walkable = None
+
+    def _walkable(self, grid):
+        if grid is not self.grid:
+            self.grid = grid
+            self.walkable = walkable_mask(grid)
+        return self.walkable
+
+    def _next_stamp(self):
+        self.stamp += 1
+        return self.stamp
+
+    def _build_path(self, start_i, goal_i):
+        cols = self.cols
+        parent = self.parent
+        path = []
+        i = goal_i
+        while i != start_i:
+            path.append(divmod(i, cols))
+            i = parent[i]
+        path.append(divmod(start_i, cols))
+        path.reverse()
+        return path
+
+    def bfs(self, grid, start, goal):
+        """
+        Breadth-first search. Returns exactly the same tiles as the original
+        path-copying bfs_pathfinding.
+        """
+        if start == goal:
+            return [start]
+        rows, cols = self.rows, self.cols
+        gr, gc = goal
+        walkable = self._walkable(grid)
+        if not (0 <= gr < rows and 0 <= gc < cols) or not walkable[gr * cols + gc]:
+            return []
+
+        stamp = self._next_stamp()
+        seen = self.seen
+        parent = self.parent
+        start_i = start[0] * cols + start[1]
+        goal_i = gr * cols + gc
+        seen[start_i] = stamp
+        queue = deque([start_i])
+        expanded = 0
+
+        while queue:
+            i = queue.popleft()
+            expanded += 1
+            cr, cc = divmod(i, cols)
+            for dr, dc in NEIGHBOR_OFFSETS:
+                nr, nc = cr + dr, cc + dc
+                if 0 <= nr < rows and 0 <= nc < cols:
+                    ni = nr * cols + nc
+                    if walkable[ni] and seen[ni] != stamp:
+                        seen[ni] = stamp
+                        parent[ni] = i
+                        if ni == goal_i:
+                            self.nodes_expanded += expanded
+                            return self._build_path(start_i, goal_i)
+                        queue.append(ni)
+
+        self.nodes_expanded += expanded
+        return []
+
+    def astar(self, grid, start, goal):
+        """
+        A* with the Manhattan distance heuristic. Returns a shortest path, but
+        when several exist it may pick a different one than bfs().
+        """
+        if start == goal:
+            return [start]
+        rows, cols = self.rows, self.cols
+        gr, gc = goal
+        walkable = self._walkable(grid)
+        if not (0 <= gr < rows and 0 <= gc < cols) or not walkable[gr * cols + gc]:
+            return []
+
+        stamp = self._next_stamp()
+        seen = self.seen      # stamp => tile has been queued this search
+        parent = self.parent
+        cost = self.cost
+        start_i = start[0] * cols + start[1]
+        goal_i = gr * cols + gc
+        seen[start_i] = stamp
+        cost[start_i] = 0
+        h = manhattan_distance(start, goal)
+        heap = [(h, h, start_i)]
+        expanded = 0
+
+        while heap:
+            f, h, i = heapq.heappop(heap)
+            if i == goal_i:
+                self.nodes_expanded += expanded
+                return self._build_path(start_i, goal_i)
+            if f - h != cost[i]:
+                continue  # stale entry, a shorter route was queued later
+            expanded += 1
+            cr, cc = divmod(i, cols)
+            ng = cost[i] + 1
+            for dr, dc in NEIGHBOR_OFFSETS:
+                nr, nc = cr + dr, cc + dc
+                if 0 <= nr < rows and 0 <= nc < cols:
+                    ni = nr * cols + nc
+                    if walkable[ni] and (seen[ni] != stamp or ng < cost[ni]):
+                        seen[ni] = stamp
+                        cost[ni] = ng
+                        parent[ni] = i
+                        h = abs(nr - gr) + abs(nc - gc)
+                        # Ties on f go to the tile nearer the goal
+                        heapq.heappush(heap, (ng + h, h, ni))
+
+        self.nodes_expanded += expanded
+        return []
+
+
+_searches = {}
+
+def tile_changed(grid, r, c):
+    """Tell find_path() that tile (r, c) of grid became or stopped being a wall."""
+    for search in _searches.values():
+        if search.grid is grid:
+            search.walkable[r * search.cols + c] = int(grid[r][c] != 1)
+
+
+def find_path(grid, start, goal, method="bfs"):
+    """
+    Tiles from start to goal inclusive, or [] if unreachable.
+    method is "bfs" (same paths as always) or "astar".
+    """
+    started = time.perf_counter()
+    shape = (len(grid), len(grid[0]))
+    search = _searches.get(shape)
+    if search is None:
+        search = _searches[shape] = GridSearch(*shape)
+    expanded = search.nodes_expanded
+    if method == "astar":
+        path = search.astar(grid, start, goal)
+    elif method == "bfs":
+        path = search.bfs(grid, start, goal)
+    else:
+        raise ValueError(f"Unknown pathfinding method: {method!r}")
+    totals.add(1, search.nodes_expanded - expanded, started)
+    return path
+
+
+class DistanceField:
+    """
+    Walking distance from every tile to one goal tile (usually the player).
+
+    One reverse BFS from the goal replaces a separate BFS per enemy: a path
+    from any start is rebuilt by repeatedly stepping to the first neighbour
+    (up, down, left, right) that is one tile closer. That is exactly the path
+    bfs_pathfinding(grid, start, goal) returns, so enemies move the same way.
+
+    The search restarts only when the goal tile changes (or after
+    invalidate()), and it is grown lazily: it only runs until the tiles that
+    have been asked about are reached, so on a big map the work depends on
+    how far away the chasers are rather than on the size of the map.
+    """
+    def __init__(self, grid):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        size = self.rows * self.cols
+        self.walkable = walkable_mask(grid)
+        self.dist = array("i", bytes(4 * size))
+        self.seen = array("I", bytes(4 * size))  # == stamp once dist is set
+        self.stamp = 0
+        self.queue = deque()
+        self.goal = None
+        self.searches = 0
+        self.nodes_expanded = 0
+
+    def invalidate(self):
+        """Re-read the walls and start a new search next time."""
+        self.walkable = walkable_mask(self.grid)
+        self.goal = None
+
+    def tile_changed(self, r, c):
+        """Tile (r, c) became or stopped being a wall: search again next time."""
+        self.walkable[r * self.cols + c] = int(self.grid[r][c] != 1)
+        self.goal = None
+
+    def update(self, goal):
+        """Start a new search if the goal tile moved. Returns True if it did."""
+        if goal == self.goal:
+            return False
+        self.goal = goal
+        self.stamp += 1
+        self.searches += 1
+        self.queue.clear()
+
+        gr, gc = goal
+        if 0 <= gr < self.rows and 0 <= gc < self.cols:
+            i = gr * self.cols + gc
+            if self.walkable[i]:  # nothing can reach a wall
+                self.seen[i] = self.stamp
+                self.dist[i] = 0
+                self.queue.append(i)
+        return True
+
+    def _grow(self, target=-1):
+        """
+        Carry on the BFS until tile index 'target' has its distance (which
+        means every closer tile has one too), or to the end if target is -1.
+        """
+        queue = self.queue
+        seen = self.seen
+        dist = self.dist
+        walkable = self.walkable
+        stamp = self.stamp
+        rows, cols = self.rows, self.cols
+        expanded = 0
+
+        while queue:
+            if target >= 0 and seen[target] == stamp:
+                break
+            i = queue.popleft()
+            expanded += 1
+            nd = dist[i] + 1
+            r, c = divmod(i, cols)
+            # up, down, left, right
+            for j, ok in ((i - cols, r > 0), (i + cols, r < rows - 1),
+                          (i - 1, c > 0), (i + 1, c < cols - 1)):
+                if ok and walkable[j] and seen[j] != stamp:
+                    seen[j] = stamp
+                    dist[j] = nd
+                    queue.append(j)
+
+        self.nodes_expanded += expanded
+
+    def _known(self, r, c):
+        if 0 <= r < self.rows and 0 <= c < self.cols:
+            i = r * self.cols + c
+            if self.seen[i] == self.stamp:
+                return self.dist[i]
+        return -1
+
+    def _reach(self, r, c):
+        if 0 <= r < self.rows and 0 <= c < self.cols and self.walkable[r * self.cols + c]:
+            self._grow(r * self.cols + c)
+        else:
+            self._grow()  # walls are never reached, so finish the search
+
+    def distance(self, r, c):
+        """Tiles to walk from (r, c) to the goal, or -1 if unreachable."""
+        self._reach(r, c)
+        return self._known(r, c)
+
+    def next_step(self, r, c):
+        """
+        The neighbour of (r, c) to step onto, or None if the goal can't be
+        reached. (r, c) itself may be a wall; only its neighbours are used.
+        """
+        self._reach(r, c)
+        best = None
+        best_d = -1
+        for dr, dc in NEIGHBOR_OFFSETS:
+            d = self._known(r + dr, c + dc)
+            if d >= 0 and (best is None or d < best_d):
+                best, best_d = (r + dr, c + dc), d
+        return best
+
+    def path(self, start, goal, agent=None):
+        """
+        Same result as bfs_pathfinding(grid, start, goal): tiles from start to
+        goal inclusive, or [] if there is no path. agent is ignored (the one
+        field serves every enemy); it is there to match IncrementalPlanner.
+        """
+        started = time.perf_counter()
+        searches, expanded = self.searches, self.nodes_expanded
+        path = self._path(start, goal)
+        totals.add(self.searches - searches, self.nodes_expanded - expanded, started)
+        return path
+
+    def _path(self, start, goal):
+        self.update(goal)
+        if start == goal:
+            return [start]
+
+        step = self.next_step(*start)
+        if step is None:
+            return []
+
+        path = [start, step]
+        r, c = step
+        d = self._known(r, c)
+        while d > 0:
+            d -= 1
+            for dr, dc in NEIGHBOR_OFFSETS:
+                nr, nc = r + dr, c + dc
+                if self._known(nr, nc) == d:
+                    r, c = nr, nc
+                    break
+            path.append((r, c))
+        return path
+
+
+class FlowField:
+    """
+    Direction to step in from every tile towards one goal tile (usually the
+    player), as an int8 grid: an index into NEIGHBOR_OFFSETS, or -1 where
+    there is no step (the goal itself, or no way there).
+
+    It is rebuilt from a whole-map BFS only when the goal tile changes, with
+    NumPy working a frontier at a time, and picks the same neighbour as
+    DistanceField.next_step(), so following it walks the same shortest path
+    bfs_pathfinding() returns. An enemy then moves with one lookup in
+    'direction', and a whole batch of enemies with one gather.
+    """
+    def __init__(self, grid):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        self.goal = None
+        self.searches = 0
+        self.nodes_expanded = 0
+        # Walls around the edge, so neighbours never leave the array
+        self.width = self.cols + 2
+        self.open = np.zeros((self.rows + 2, self.width), dtype=bool)
+        self.open[1:-1, 1:-1] = np.asarray(grid) != 1
+        self.dist = np.full(self.open.shape, -1, dtype=np.int32)
+        self.direction = np.full((self.rows, self.cols), -1, dtype=np.int8)
+        self.steps = np.array(NEIGHBOR_OFFSETS + ((0, 0),), dtype=np.int32)  # [-1] -> stay
+
+    def invalidate(self):
+        """Re-read the walls and rebuild next time."""
+        self.open[1:-1, 1:-1] = np.asarray(self.grid) != 1
+        self.goal = None
+
+    def tile_changed(self, r, c):
+        """Tile (r, c) became or stopped being a wall: rebuild next time."""
+        self.open[r + 1, c + 1] = self.grid[r][c] != 1
+        self.goal = None
+
+    def update(self, goal):
+        """Rebuild if the goal tile moved. Returns True if it did."""
+        if goal == self.goal:
+            return False
+        self.goal = goal
+        self.searches += 1
+        dist = self.dist
+        dist.fill(-1)
+
+        gr, gc = goal
+        reached = 0 <= gr < self.rows and 0 <= gc < self.cols and self.open[gr + 1, gc + 1]
+        if reached:
+            flat_dist = dist.ravel()
+            flat_open = self.open.ravel()
+            w = self.width
+            frontier = np.array([(gr + 1) * w + gc + 1])
+            flat_dist[frontier] = 0
+            d = 0
+            while len(frontier):
+                self.nodes_expanded += len(frontier)
+                d += 1
+                near = np.concatenate((frontier - w, frontier + w, frontier - 1, frontier + 1))
+                near = near[flat_open[near] & (flat_dist[near] < 0)]
+                # Drop duplicates: np.maximum.at applies every index in turn
+                # (a plain fancy assignment makes no promise which repeat
+                # wins), so each tile ends up holding its last position
+                # in 'near' and only that copy of it matches
+                positions = np.arange(len(near), dtype=np.int32)
+                np.maximum.at(flat_dist, near, positions)
+                frontier = near[flat_dist[near] == positions]
+                flat_dist[frontier] = d
+
+        # First neighbour (up, down, left, right) with the smallest distance
+        far = np.iinfo(np.int32).max
+        known = np.where(dist >= 0, dist, far)
+        around = np.stack((known[:-2, 1:-1], known[2:, 1:-1], known[1:-1, :-2], known[1:-1, 2:]))
+        best = around.argmin(axis=0)
+        closest = np.take_along_axis(around, best[None], axis=0)[0]
+        self.direction[...] = best
+        self.direction[closest == far] = -1
+        if reached:
+            self.direction[gr, gc] = -1
+        return True
+
+    def distance(self, r, c):
+        """Tiles to walk from (r, c) to the goal, or -1 if unreachable."""
+        return int(self.dist[r + 1, c + 1])
+
+    def next_step(self, r, c):
+        """The neighbour of (r, c) to step onto, or None (see DistanceField)."""
+        k = self.direction[r, c]
+        if k < 0:
+            return None
+        dr, dc = NEIGHBOR_OFFSETS[k]
+        return r + dr, c + dc
+
+    def path(self, start, goal, agent=None):
+        """
+        Same result as DistanceField.path(), by following the directions.
+        agent is ignored; it is there to match IncrementalPlanner.
+        """
+        started = time.perf_counter()
+        searches, expanded = self.searches, self.nodes_expanded
+        self.update(goal)
+        path = [start]
+        if start != goal:
+            step = self.next_step(*start)
+            while step is not None:
+                path.append(step)
+                step = self.next_step(*step)
+            if path[-1] != goal:
+                path = []
+        totals.add(self.searches - searches, self.nodes_expanded - expanded, started)
+        return path
+
+
+INF = float("inf")
+
+
+class DStarLite:
+    """
+    Incremental shortest paths for one agent (D* Lite, Koenig & Likhachev).
+
+    The search runs backwards from the goal and keeps its g/rhs values
+    between calls, so after the agent moves (move_start), the goal moves
+    (move_goal) or a tile turns into or out of a wall (tile_changed), path()
+    only repairs the values the change made wrong, and only as far as this
+    agent's path needs them.
+
+    Moving the goal changes where distances are measured from. Values are
+    only compared with each other, so the new goal gets whatever base value
+    leaves most of them right: the one it already had if it stepped onto a
+    shortest path from the agent (everything between it and the agent stays
+    correct), otherwise the old base minus the distance moved (tiles the
+    goal moved away from stay correct and only values that went down are
+    passed on).
+
+    Tiles are flat indices (r * cols + c) and 'walkable' is a mask like
+    walkable_mask()'s, which may be shared with other planners on the same
+    grid. Values are kept in dicts, so a planner costs memory in proportion
+    to the tiles it has touched rather than to the size of the map.
+    """
+    def __init__(self, walkable, rows, cols, start, goal):
+        self.walkable = walkable
+        self.rows = rows
+        self.cols = cols
+        self.g = {}
+        self.rhs = {}
+        self.heap = []
+        self.open = {}   # tile -> its current key in heap (older entries are stale)
+        self.km = 0
+        self.start = start
+        self.goal_i = -1
+        self.base = 0   # the goal's value; a tile's distance is its value - base
+        self.nodes_expanded = 0
+        self.move_goal(goal)
+
+    def _neighbors(self, i):
+        # up, down, left, right
+        cols = self.cols
+        r, c = divmod(i, cols)
+        found = []
+        if r > 0:
+            found.append(i - cols)
+        if r < self.rows - 1:
+            found.append(i + cols)
+        if c > 0:
+            found.append(i - 1)
+        if c < cols - 1:
+            found.append(i + 1)
+        return found
+
+    def _key(self, i):
+        m = min(self.g.get(i, INF), self.rhs.get(i, INF))
+        r, c = divmod(i, self.cols)
+        sr, sc = self.start
+        return (m + abs(r - sr) + abs(c - sc) + self.km, m)
+
+    def _update_vertex(self, i):
+        """Recompute rhs(i) and queue i if it is now inconsistent."""
+        walkable = self.walkable
+        g = self.g
+        cols = self.cols
+        r, c = divmod(i, cols)
+        if i == self.goal_i:
+            rhs = self.base if walkable[i] else INF
+        elif walkable[i]:
+            best = INF
+            if r > 0 and walkable[i - cols]:
+                best = g.get(i - cols, INF)
+            if r < self.rows - 1 and walkable[i + cols]:
+                v = g.get(i + cols, INF)
+                if v < best:
+                    best = v
+            if c > 0 and walkable[i - 1]:
+                v = g.get(i - 1, INF)
+                if v < best:
+                    best = v
+            if c < cols - 1 and walkable[i + 1]:
+                v = g.get(i + 1, INF)
+                if v < best:
+                    best = v
+            rhs = best + 1
+        else:
+            rhs = INF
+        if rhs == INF:
+            self.rhs.pop(i, None)
+        else:
+            self.rhs[i] = rhs
+
+        gi = g.get(i, INF)
+        if gi != rhs:
+            m = gi if gi < rhs else rhs
+            sr, sc = self.start
+            key = (m + abs(r - sr) + abs(c - sc) + self.km, m)
+            self.open[i] = key
+            heapq.heappush(self.heap, (key[0], key[1], i))
+        else:
+            self.open.pop(i, None)
+
+    def move_start(self, start):
+        """The agent moved to tile 'start'."""
+        if start != self.start:
+            self.km += manhattan_distance(self.start, start)
+            self.start = start
+
+    def move_goal(self, goal):
+        """The goal moved to tile 'goal'."""
+        gr, gc = goal
+        if not (0 <= gr < self.rows and 0 <= gc < self.cols):
+            goal_i = -1
+        else:
+            goal_i = gr * self.cols + gc
+        if goal_i == self.goal_i:
+            return
+        old = self.goal_i
+        if old >= 0 and goal_i >= 0:
+            value = self.g.get(goal_i, INF)
+            if (value != INF and value == self.rhs.get(goal_i, INF)
+                    and self._on_shortest_path(goal_i)):
+                self.base = value
+            else:
+                self.base -= manhattan_distance(divmod(old, self.cols), goal)
+        self.goal_i = goal_i
+        if old >= 0:
+            self._update_vertex(old)
+        if goal_i >= 0:
+            self._update_vertex(goal_i)
+
+    def _on_shortest_path(self, target):
+        """
+        True if, by the current values, a shortest path from the agent to
+        the goal passes through tile index 'target'.
+        """
+        sr, sc = self.start
+        if not (0 <= sr < self.rows and 0 <= sc < self.cols):
+            return False
+        g, cols = self.g, self.cols
+        walkable = self.walkable
+        tr, tc = divmod(target, cols)
+        target_g = g[target]
+        start_i = sr * cols + sc
+        value = self.rhs.get(start_i, INF)
+        if value == INF:
+            return False
+        # Walk downhill from the agent, only where target can still be reached
+        stack = [(start_i, value)]
+        seen = {start_i}
+        while stack:
+            i, value = stack.pop()
+            if i == target:
+                return True
+            r, c = divmod(i, cols)
+            if value - target_g < abs(r - tr) + abs(c - tc):
+                continue
+            for j in self._neighbors(i):
+                if j not in seen and walkable[j] and g.get(j, INF) == value - 1:
+                    seen.add(j)
+                    stack.append((j, value - 1))
+        return False
+
+    def tile_changed(self, i):
+        """Tile index i became or stopped being a wall (walkable already updated)."""
+        self._update_vertex(i)
+        for j in self._neighbors(i):
+            self._update_vertex(j)
+
+    def _compute(self, start_i):
+        if len(self.heap) > 4 * len(self.open) + 64:
+            # Mostly stale entries: rebuild from the live keys
+            self.heap = [(k1, k2, i) for i, (k1, k2) in self.open.items()]
+            heapq.heapify(self.heap)
+        heap = self.heap
+        open_keys = self.open
+        g, rhs = self.g, self.rhs
+        pop, push = heapq.heappop, heapq.heappush
+        neighbors = self._neighbors
+        update_vertex = self._update_vertex
+        km = self.km
+        expanded = 0
+
+        while heap:
+            k1, k2, i = heap[0]
+            if open_keys.get(i) != (k1, k2):
+                pop(heap)  # stale entry
+                continue
+            gs, rs = g.get(start_i, INF), rhs.get(start_i, INF)
+            ms = gs if gs < rs else rs
+            if (k1, k2) >= (ms + km, ms) and rs <= gs:
+                break  # the agent's value is final
+            pop(heap)
+            expanded += 1
+            key = self._key(i)
+            gi, ri = g.get(i, INF), rhs.get(i, INF)
+            if (k1, k2) < key:
+                open_keys[i] = key
+                push(heap, (key[0], key[1], i))
+            elif gi > ri:
+                # Overconsistent: the distance went down, pass it on
+                g[i] = ri
+                del open_keys[i]
+                for j in neighbors(i):
+                    update_vertex(j)
+            else:
+                # Underconsistent: the distance went up, redo this tile too
+                g.pop(i, None)
+                del open_keys[i]
+                update_vertex(i)
+                for j in neighbors(i):
+                    update_vertex(j)
+
+        self.nodes_expanded += expanded
+
+    def path(self):
+        """Tiles from the agent to the goal inclusive, or [] if unreachable."""
+        sr, sc = self.start
+        if not (0 <= sr < self.rows and 0 <= sc < self.cols) or self.goal_i < 0:
+            return []
+        cols = self.cols
+        start_i = sr * cols + sc
+        if start_i == self.goal_i:
+            return [self.start]
+        if not self.walkable[start_i]:
+            return []
+
+        self._compute(start_i)
+        if self.rhs.get(start_i, INF) == INF:
+            return []
+
+        # Walk downhill: each step goes to the neighbour nearest the goal
+        g = self.g
+        walkable = self.walkable
+        path = [self.start]
+        i = start_i
+        while i != self.goal_i:
+            best, best_g = -1, INF
+            for j in self._neighbors(i):
+                if walkable[j]:
+                    gj = g.get(j, INF)
+                    if gj < best_g:
+                        best, best_g = j, gj
+            if best < 0 or len(path) > len(g):
+                return []
+            i = best
+            path.append(divmod(i, cols))
+        return path
+
+
+class IncrementalPlanner:
+    """
+    Drop-in for DistanceField (PATHFINDING = "dstar") that keeps a DStarLite
+    per agent, so a path refresh repairs the agent's last search instead of
+    starting over. Report wall edits with tile_changed(); every agent's
+    planner is patched right away and repaired on its next path() call.
+
+    Planners are dropped along with their agent (any object that can be
+    weakly referenced, e.g. an Enemy), or with forget(agent) for agents that
+    live on after they are done, like pooled enemies. Without an agent,
+    path() is a one-off D* Lite search.
+    """
+    def __init__(self, grid):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        self.walkable = walkable_mask(grid)
+        self.planners = weakref.WeakKeyDictionary()
+
+    def tile_changed(self, r, c):
+        i = r * self.cols + c
+        walkable = int(self.grid[r][c] != 1)
+        if self.walkable[i] == walkable:
+            return
+        self.walkable[i] = walkable
+        for planner in self.planners.values():
+            planner.tile_changed(i)
+
+    def forget(self, agent):
+        """Drop agent's planner (it died or went back to a pool)."""
+        self.planners.pop(agent, None)
+
+    def path(self, start, goal, agent=None):
+        """Tiles from start to goal inclusive, or [] if there is no path."""
+        started = time.perf_counter()
+        planner = self.planners.get(agent) if agent is not None else None
+        if planner is None:
+            planner = DStarLite(self.walkable, self.rows, self.cols, start, goal)
+            if agent is not None:
+                self.planners[agent] = planner
+            searches = 1
+        else:
+            planner.move_start(start)
+            planner.move_goal(goal)
+            searches = 0
+        expanded = planner.nodes_expanded
+        path = planner.path()
+        totals.add(searches, planner.nodes_expanded - expanded, started)
+        return path
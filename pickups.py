@@ -0,0 +1,44 @@
+"""
+Coin and ammo tiles for game_with_ai.py.
+"""
+import numpy as np
+
+from maps import AMMO, COIN, FLOOR
+
+
+class Pickups:
+    """
+    Where the coins and ammo are on one grid, kept up to date as tiles are
+    edited (report them with tile_changed()).
+
+    The grid, a NumPy array of tile types, is the bitmap everything is read
+    from with vectorized comparisons when the round starts. Coin and ammo
+    tiles are also kept in sets of (r, c), so a pickup test is a set lookup
+    and len() (coins left) is the size of a set, rather than a list scan.
+    """
+    def __init__(self, grid):
+        self.tiles = np.asarray(grid)
+        self.coins = {tuple(rc) for rc in np.argwhere(self.tiles == COIN).tolist()}
+        self.ammo = {tuple(rc) for rc in np.argwhere(self.tiles == AMMO).tolist()}
+
+    def __len__(self):
+        return len(self.coins)
+
+    def free_spots(self):
+        """Flat indices (r * cols + c) of every tile that isn't a wall, row by row."""
+        return np.flatnonzero(np.isin(self.tiles, (FLOOR, COIN, AMMO)))
+
+    def coin_at(self, r, c):
+        return (r, c) in self.coins
+
+    def ammo_at(self, r, c):
+        return (r, c) in self.ammo
+
+    def tile_changed(self, r, c):
+        """Re-read tile (r, c) after it was edited."""
+        value = self.tiles[r, c]
+        for kind, tiles in ((COIN, self.coins), (AMMO, self.ammo)):
+            if value == kind:
+                tiles.add((r, c))
+            else:
+                tiles.discard((r, c))
@@ -0,0 +1,58 @@
+"""
+Object pools for game_with_ai.py, so entities that come and go every round
+(bullets, enemies) are reused instead of allocated again.
+"""
+
+
+class ObjectPool:
+    """
+    Free list of objects of one class. take(*args) hands back a released
+    object after calling its reset(*args), or makes a new one with
+    cls(*args) if none is free; release() puts objects back once nothing
+    refers to them any more. on_release(obj), if given, is called for each
+    object released, e.g. to drop what other code kept about it.
+    """
+    def __init__(self, cls, on_release=None):
+        self.cls = cls
+        self.on_release = on_release
+        self.free = []
+        self.created = 0
+
+    def __len__(self):
+        return len(self.free)
+
+    def take(self, *args):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args)
+            return obj
+        self.created += 1
+        return self.cls(*args)
+
+    def release(self, obj):
+        if self.on_release is not None:
+            self.on_release(obj)
+        self.free.append(obj)
+
+    def release_all(self, objs):
+        if self.on_release is not None:
+            for obj in objs:
+                self.on_release(obj)
+        self.free.extend(objs)
+
+
+def compact(items, pool, alive):
+    """
+    Keep the items for which alive(item) is true in place, in order, and
+    release the rest to pool. Returns how many were released.
+    """
+    keep = 0
+    for item in items:
+        if alive(item):
+            items[keep] = item
+            keep += 1
+        else:
+            pool.release(item)
+    dropped = len(items) - keep
+    del items[keep:]
+    return dropped
@@ -0,0 +1,175 @@
+"""
+Frame profiler for game_with_ai.py: scoped timers, per-frame counters, an
+on-screen overlay with rolling percentiles and CSV/JSON dumps.
+
+Nothing here runs unless a Profiler has been created and handed to the game
+(press F3 in game_with_ai.py), so the game pays only an `is None` check per
+timed section while profiling is off.
+"""
+import csv
+import json
+import time
+from collections import deque
+
+import numpy as np
+import pygame
+
+PERCENTILES = (50, 95, 99)
+
+
+class _Section:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+
+
+class Profiler:
+    """
+    Collects, per frame, the seconds spent in named sections and the value of
+    named counters, keeping the last 'window' frames of each (all of them if
+    window is None). Call end_frame() once per frame.
+
+        with profiler.section("draw"):
+            ...
+        profiler.count("bullets", len(bullets))
+        profiler.watch("bfs_calls", lambda: totals.calls)  # running total
+    """
+    def __init__(self, window=300):
+        self.window = window
+        self.timers = {}     # name -> deque of seconds per frame
+        self.counters = {}   # name -> deque of values per frame
+        self.frames = 0
+        self._times = {}     # this frame so far
+        self._counts = {}
+        self._watched = {}   # name -> (kind, total(), last total)
+        self._font = None
+        self._panel = None
+        self._panel_frame = 0
+
+    def section(self, name):
+        """Context manager timing its body under 'name'."""
+        return _Section(self, name)
+
+    def record(self, name, seconds):
+        self._times[name] = self._times.get(name, 0.0) + seconds
+
+    def count(self, name, n=1):
+        self._counts[name] = self._counts.get(name, 0) + n
+
+    def watch(self, name, total, kind="counter"):
+        """
+        Sample a running total (e.g. nodes expanded so far) every frame and
+        store how much it grew, as a counter or (kind="timer", in seconds) a
+        timer.
+        """
+        self._watched[name] = (kind, total, total())
+
+    def end_frame(self):
+        for name, (kind, total, last) in self._watched.items():
+            now = total()
+            self._watched[name] = (kind, total, now)
+            if kind == "timer":
+                self.record(name, now - last)
+            else:
+                self.count(name, now - last)
+
+        for history, values in ((self.timers, self._times), (self.counters, self._counts)):
+            for name in values:
+                if name not in history:
+                    # Frames before the name first showed up count as 0
+                    missed = self.frames if self.window is None else min(self.frames, self.window)
+                    history[name] = deque([0] * missed, maxlen=self.window)
+            for name, samples in history.items():
+                samples.append(values.get(name, 0))
+            values.clear()
+        self.frames += 1
+
+    def stats(self):
+        """
+        {"timers": {name: {"p50", "p95", "p99", "mean", "max"}} in ms,
+         "counters": {name: same keys, per frame}}
+        """
+        result = {}
+        for kind, history, scale in (("timers", self.timers, 1000), ("counters", self.counters, 1)):
+            result[kind] = {}
+            for name, samples in history.items():
+                values = np.array(samples, dtype=float) * scale
+                if len(values) == 0:
+                    continue
+                entry = {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+                entry["mean"] = float(values.mean())
+                entry["max"] = float(values.max())
+                result[kind][name] = entry
+        return result
+
+    def dump(self, path):
+        """Write stats() to a .json file, or to CSV for any other extension."""
+        stats = self.stats()
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump({"frames": self.frames, **stats}, f, indent=2)
+            return
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["kind", "name", "p50", "p95", "p99", "mean", "max"])
+            for kind in ("timers", "counters"):
+                for name, entry in stats[kind].items():
+                    writer.writerow([kind, name] + [f"{entry[k]:.4f}" for k in
+                                                    ("p50", "p95", "p99", "mean", "max")])
+
+    def draw(self, surface, pos=(10, 40), every=15):
+        """
+        Overlay of the rolling percentiles, rebuilt every 'every' frames.
+        Returns the rect it covered.
+        """
+        if self._panel is None or self.frames - self._panel_frame >= every:
+            self._panel = self._build_panel()
+            self._panel_frame = self.frames
+        return surface.blit(self._panel, pos)
+
+    def _build_panel(self):
+        if self._font is None:
+            self._font = pygame.font.SysFont("couriernew,monospace", 14, bold=True)
+        font = self._font
+        stats = self.stats()
+        lines = [f"{'':<14}{'p50':>8}{'p95':>8}{'p99':>8}"]
+        for name, entry in stats["timers"].items():
+            lines.append(f"{name + ' ms':<14}{entry['p50']:8.2f}{entry['p95']:8.2f}{entry['p99']:8.2f}")
+        for name, entry in stats["counters"].items():
+            lines.append(f"{name:<14}{entry['p50']:8.0f}{entry['p95']:8.0f}{entry['p99']:8.0f}")
+
+        images = [font.render(line, True, (255, 255, 255)) for line in lines]
+        width = max(image.get_width() for image in images) + 8
+        height = sum(image.get_height() for image in images) + 8
+        panel = pygame.Surface((width, height))
+        panel.set_alpha(200)
+        panel.fill((0, 0, 0))
+        y = 4
+        for image in images:
+            panel.blit(image, (4, y))
+            y += image.get_height()
+        return panel
+
+
+class CountingRect(pygame.Rect):
+    """
+    pygame.Rect that counts how many are made (rects_created()). Nothing
+    swaps it in globally: a module that wants its Rects counted builds
+    them through a name of its own and points that name here while
+    profiling, so pygame.Rect and every other module are left alone.
+    """
+    created = 0
+
+    def __init__(self, *args):
+        CountingRect.created += 1
+        super().__init__(*args)
+
+
+def rects_created():
+    return CountingRect.created
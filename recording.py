@@ -0,0 +1,116 @@
+"""
+Session recordings for game_with_ai.py: the seed, the CONFIG in use and the
+player's input on every frame, which is all it takes to play a round again
+exactly (see replay.py).
+
+A recording file is a short JSON header line followed by the frames as a
+zlib-compressed array of (dt, keys, shots) records, about 10 bytes a frame
+before compression.
+"""
+import json
+import zlib
+
+import numpy as np
+import pygame
+
+MAGIC = b"AIWREC1\n"
+
+FRAME_DTYPE = np.dtype([("dt", "<f8"), ("keys", "u1"), ("shots", "u1")])
+
+# Bit per direction; WASD and the arrow keys are stored the same way since the
+# game treats them the same.
+KEY_BITS = (
+    (1, (pygame.K_UP, pygame.K_w)),
+    (2, (pygame.K_DOWN, pygame.K_s)),
+    (4, (pygame.K_LEFT, pygame.K_a)),
+    (8, (pygame.K_RIGHT, pygame.K_d)),
+)
+
+
+def pack_keys(keys):
+    """Direction bits from anything indexable by key code."""
+    bits = 0
+    for bit, codes in KEY_BITS:
+        if any(keys[code] for code in codes):
+            bits |= bit
+    return bits
+
+
+class RecordedKeys:
+    """Stands in for pygame.key.get_pressed() when replaying packed keys."""
+    def __init__(self, bits):
+        self.pressed = set()
+        for bit, codes in KEY_BITS:
+            if bits & bit:
+                self.pressed.update(codes)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+class Recording:
+    """
+    One round: seed, CONFIG overrides, per-frame input and, once finished,
+    the outcome to check a replay against.
+
+    Each frame is (dt, keys, shots): the frame time passed to
+    GameWorld.step(), the packed direction keys and how many times SPACE was
+    pressed before the step.
+    """
+    def __init__(self, seed, config=None):
+        self.seed = seed
+        self.config = dict(config or {})
+        self.outcome = None
+        self._frames = []
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __iter__(self):
+        """(dt, keys, shots) per frame, with keys indexable like get_pressed()."""
+        keys = [RecordedKeys(bits) for bits in range(16)]
+        for dt, bits, shots in self._frames:
+            yield dt, keys[bits], shots
+
+    def add_frame(self, dt, keys, shots=0):
+        self._frames.append((dt, pack_keys(keys), min(shots, 255)))
+
+    def frames(self):
+        """Frames as a structured array with fields dt, keys and shots."""
+        return np.array(self._frames, dtype=FRAME_DTYPE)
+
+    def finish(self, world):
+        """Remember how the round ended, for replay.verify()."""
+        self.outcome = {
+            "result": world.result,
+            "frames": world.frames,
+            "coins_collected": world.coins_collected,
+            "enemies_killed": world.enemies_killed,
+            "shots_fired": world.shots_fired,
+            "digest": world.state_digest(),
+        }
+
+    def save(self, path):
+        header = {"seed": self.seed, "config": self.config, "outcome": self.outcome}
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(json.dumps(header).encode() + b"\n")
+            f.write(zlib.compress(self.frames().tobytes(), 9))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path}: not a recording")
+            header = json.loads(f.readline())
+            data = zlib.decompress(f.read())
+
+        # JSON turns tuples (MAP_SIZE, VIEWPORT_TILES) into lists
+        config = {key: tuple(value) if isinstance(value, list) else value
+                  for key, value in header["config"].items()}
+        recording = cls(header["seed"], config)
+        recording.outcome = header["outcome"]
+        frames = np.frombuffer(data, dtype=FRAME_DTYPE)
+        recording._frames = list(zip(frames["dt"].tolist(), frames["keys"].tolist(),
+                                     frames["shots"].tolist()))
+        return recording
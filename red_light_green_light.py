@@ -1,9 +1,13 @@
 import cv2
-import numpy as np
+import threading
 import time
 import pygame
 import random
 
+from camera import CaptureThread, DetectionWorker, FrameBuffer, StageStats
+from canvas import Canvas
+from motion import MotionDetector
+
 # -----------------------------------------------------------------------------
 # PLEASE READ BEFORE YOU EDIT!
 # This code has been written for a course in AI. Try not to change anything
@@ -21,6 +25,18 @@ GREEN_LIGHT_MAX = 7
 RED_LIGHT_DURATION = 5
 GRACE_RED = 0.7
 PREPARATION_TIME = 10  # Time to wait during the preparation phase
+DETECTION_WIDTH = 960  # Camera frames wider than this are shrunk to it to look for motion (None = never);
+                       # smaller is faster but may see a slight sway as a move (see bench_motion)
+DETECTION_ROI = None  # Only look for motion inside this polygon of (x, y) corners, as fractions of the
+                      # frame's width and height, e.g. [(0.2, 0), (0.8, 0), (0.8, 1), (0.2, 1)] (None = everywhere)
+MOTION_SCORE = "contours"  # How movement is measured: "contours" (area of the moving shapes), "pixels" or "grid"
+                           # ("grid" misses small moves the others see)
+MOTION_GRID = (6, 8)  # Rows and columns of cells for the "grid" score
+GRID_EDGE_CELLS = 1  # Rings of cells around the edge of the picture the "grid" score ignores
+GRID_NOISE = 0.02  # Fraction of a cell that must move for the "grid" score to count it
+SHOW_DETECTION = True  # Outline what moved on the bottom left view (costs a little time per frame)
+FRAME_BUFFER = 2  # Frames each camera stage keeps for the next (older ones are dropped)
+SHOW_STATS = True  # Show the FPS and queue depth of each camera stage in the title bar
 
 pygame.mixer.init()
 pygame.mixer.music.load('./assets/greenlight.mp3')
@@ -29,6 +45,45 @@ lose_sound = pygame.mixer.Sound('./assets/lose.mp3')
 win_sound = pygame.mixer.Sound('./assets/win.mp3')
 preparation_sound = pygame.mixer.Sound('./assets/preparation.mp3')
 
+def detect_motion(detector, frame, outline):
+    """Runs on the detection worker: (frame, foreground mask, contours, total movement, cells)."""
+    return (frame, *detector.detect(frame, outline))
+
+def handle_key(key, game_active, game_over, game_state):
+    """
+    'R' starts (or restarts) the game, SPACE wins it during a green light.
+    Returns the new (game_active, game_over, game_state).
+    """
+    if CAMERA_MODE:
+        # Only relevant if not in Demo mode
+        return game_active, game_over, game_state
+
+    if key == ord('r'):
+        print("Starting (or Restarting) the game...")
+        # Reset game variables
+        return True, False, "Preparation"
+
+    if key == ord(' '):
+        # Force a win if in green light
+        if game_active and (game_state == "Green Light") and not game_over:
+            print("You win! Congratulations!")
+            win_sound.play()
+            return False, True, "Idle"
+    return game_active, game_over, game_state
+
+def stop_camera(cap, *stages):
+    """Stops the pipeline threads, then releases the camera they read from."""
+    for stage in stages:
+        stage.stop()
+    for stage in stages:
+        stage.join(timeout=1.0)
+    # Releasing the camera while a thread is still inside cap.read() isn't
+    # safe; a stuck (daemon) thread goes away with the process instead
+    if any(stage.is_alive() for stage in stages):
+        print("Camera did not stop in time; it will be released on exit.")
+        return
+    cap.release()
+
 def game_loop():
     # Camera capture
     cap = cv2.VideoCapture(0)
@@ -36,8 +91,26 @@ def game_loop():
         print("ERROR: Could not open camera.")
         return
     
-    # Background subtractor
-    fgbg = cv2.createBackgroundSubtractorMOG2(history=5, varThreshold=SENSITIVITY_THRESHOLD)
+    # Background subtractor, run on a shrunk copy of each frame
+    detector = MotionDetector(SENSITIVITY_THRESHOLD, DETECTION_WIDTH, DETECTION_ROI, MOTION_SCORE,
+                              MOTION_GRID, GRID_EDGE_CELLS, GRID_NOISE)
+    # Set while what moved is outlined; the detection worker reads it for
+    # every frame, so the detector itself is only touched on that thread
+    outline = threading.Event()
+    if SHOW_DETECTION:
+        outline.set()
+
+    # Camera pipeline: the capture thread reads frames, the detection worker
+    # looks for motion in the newest one, and this thread displays the newest
+    # result, so a slow stage never leaves the game deciding on stale frames
+    frames = FrameBuffer(FRAME_BUFFER)
+    results = FrameBuffer(FRAME_BUFFER)
+    capture = CaptureThread(cap, frames)
+    detection = DetectionWorker(frames, results,
+                                lambda frame: detect_motion(detector, frame, outline.is_set()))
+    display = StageStats("display")
+    capture.start()
+    detection.start()
 
     cv2.namedWindow("Game Window", cv2.WND_PROP_FULLSCREEN)
     cv2.setWindowProperty("Game Window", cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
@@ -47,9 +120,11 @@ def game_loop():
     screen_height = 1080
 
     title_bar_height = 120
-    grid_height = screen_height - title_bar_height
-    cell_width = screen_width // 2
-    cell_height = grid_height // 2
+
+    # The window image, drawn into in place every frame
+    canvas = Canvas(screen_width, screen_height, title_bar_height)
+    stats_line = ()
+    stats_time = 0
 
     game_active = False
     game_over = False
@@ -61,76 +136,81 @@ def game_loop():
     print("Press 'R' to start the game (if not in CAMERA_MODE). Press ESC to exit.")
 
     while True:
-        # Grab a camera frame
-        ret, frame = cap.read()
-        if not ret:
-            print("Failed to read from camera. Exiting...")
-            break
-
-        # Create the top title bar
-        title_bar = np.full((title_bar_height, screen_width, 3), (30, 30, 30), dtype=np.uint8)
-        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        blurred_frame = cv2.GaussianBlur(gray_frame, (5, 5), 0)
-        fgmask = fgbg.apply(blurred_frame)
-        _, thresh = cv2.threshold(fgmask, 25, 255, cv2.THRESH_BINARY)
-        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-        # For the detection overlay
-        detection_display = frame.copy()
-        cv2.drawContours(detection_display, contours, -1, (0, 0, 255), 2)
-
-        # 2x2 camera layout
-        frame_resized = cv2.resize(frame, (cell_width, cell_height))
-        fgmask_bgr = cv2.cvtColor(fgmask, cv2.COLOR_GRAY2BGR)
-        fgmask_resized = cv2.resize(fgmask_bgr, (cell_width, cell_height))
-        detection_resized = cv2.resize(detection_display, (cell_width, cell_height))
-        bottom_right_cell = np.zeros((cell_height, cell_width, 3), dtype=np.uint8)
+        # Take the newest result of the detection worker
+        result = results.get(timeout=1.0)
+        if result is None:
+            if results.closed:
+                print("Failed to read from camera. Exiting...")
+                break
+            # Keep the window responsive (and the keys working) while the camera stalls
+            key = cv2.waitKey(1) & 0xFF
+            if key == 27:
+                print("Exiting...")
+                break
+            game_active, game_over, game_state = handle_key(key, game_active, game_over, game_state)
+            continue
+        display.tick(results.backlog)
+        frame, fgmask, contours, total_movement, cells = result
+
+        # Stage stats under the title, refreshed twice a second so the title
+        # bar isn't drawn again every frame
+        if SHOW_STATS and time.time() - stats_time > 0.5:
+            stats = " | ".join(str(stage) for stage in (capture.stats, detection.stats, display))
+            stats_line = ((stats, (50, 110), 0.6, (160, 160, 160), 1),)
+            stats_time = time.time()
+
+        # 2x2 camera layout: the detection overlay is drawn over a copy of
+        # the camera cell
+        canvas.draw_frame(0, frame)
+        canvas.draw_mask(1, fgmask)
+        canvas.copy_cell(0, 2)
+        if SHOW_DETECTION:
+            detection_size = (fgmask.shape[1], fgmask.shape[0])
+            if cells is not None:
+                canvas.draw_contours(2, detector.cell_outlines(cells), detection_size, (0, 165, 255), 1)
+            if contours is not None:
+                canvas.draw_contours(2, contours, detection_size, (0, 0, 255), 2)
+            if detector.roi_outline is not None:
+                canvas.draw_contours(2, [detector.roi_outline], detection_size, (0, 255, 255), 2)
+        light_color = (0, 0, 0)
 
         if CAMERA_MODE:
-            cv2.putText(title_bar, "Demo Mode", (50, 80),
-                        cv2.FONT_HERSHEY_SIMPLEX, 2.0, (255, 255, 255), 4, cv2.LINE_AA)
-
-            top_row = np.hstack([frame_resized, fgmask_resized])
-            bottom_row = np.hstack([detection_resized, bottom_right_cell])
-            grid = np.vstack([top_row, bottom_row])
-            combined_frame = np.vstack([title_bar, grid])
-            cv2.imshow("Game Window", combined_frame)
+            canvas.set_title(("Demo Mode", (50, 80), 2.0, (255, 255, 255), 4), *stats_line)
+            canvas.fill(3, light_color)
+            cv2.imshow("Game Window", canvas.image)
 
         else:
-            total_movement = sum(cv2.contourArea(c) for c in contours)
-
             if game_active:
                 if game_state == "Preparation":
                     print("Preparation phase started.")
                     preparation_sound.play()
                     prep_start_time = time.time()
 
+                    # Nothing is outlined until the game starts
+                    outline.clear()
+
+                    # Build the grid (camera feed optional)
+                    for cell in range(3):
+                        canvas.fill(cell, (0, 0, 0))
+                    canvas.fill(3, (50, 50, 50))
+
                     while time.time() - prep_start_time < PREPARATION_TIME:
                         remaining_prep_time = PREPARATION_TIME - int(time.time() - prep_start_time)
-                        black_panel = np.zeros((cell_height, cell_width, 3), dtype=np.uint8)
-                        waiting_cell = np.full((cell_height, cell_width, 3), (50, 50, 50), dtype=np.uint8)
 
                         # Title bar showing "PREPARATION"
-                        prep_title_bar = title_bar.copy()
-                        cv2.putText(prep_title_bar, f"Preparation - Starting in {remaining_prep_time}s",
-                                    (50, 80), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 
-                                    (255, 255, 255), 3, cv2.LINE_AA)
-
-                        # Build the grid (camera feed optional)
-                        top_row = np.hstack([black_panel, black_panel])
-                        bottom_row = np.hstack([black_panel, waiting_cell])
-                        grid = np.vstack([top_row, bottom_row])
-
-                        prep_frame = np.vstack([prep_title_bar, grid])
-                        cv2.imshow("Game Window", prep_frame)
+                        canvas.set_title((f"Preparation - Starting in {remaining_prep_time}s",
+                                          (50, 80), 1.5, (255, 255, 255), 3), *stats_line)
+                        cv2.imshow("Game Window", canvas.image)
                         if cv2.waitKey(1) & 0xFF == 27:
                             # ESC to exit early
-                            cap.release()
+                            stop_camera(cap, capture, detection)
                             cv2.destroyAllWindows()
                             return
 
                     # After prep, switch to Green Light
                     print("Preparation phase over. Game starting!")
+                    if SHOW_DETECTION:
+                        outline.set()
                     pygame.mixer.music.play()
                     game_state = "Green Light"
                     start_time = time.time()
@@ -148,7 +228,7 @@ def game_loop():
                 # RED / GREEN logic if not game_over
                 if not game_over:
                     if game_state == "Red Light":
-                        bottom_right_cell[:] = (0, 0, 255)  # Red
+                        light_color = (0, 0, 255)  # Red
                         # If past grace period, movement => lose
                         if (time.time() - red_light_start_time > GRACE_RED) and (total_movement > DETECTION_AREA):
                             print("Movement detected! You lose.")
@@ -164,7 +244,7 @@ def game_loop():
                             print("GREEN LIGHT! You can move.")
 
                     elif game_state == "Green Light":
-                        bottom_right_cell[:] = (0, 255, 0)  # Green
+                        light_color = (0, 255, 0)  # Green
                         # Random switch to red
                         if (time.time() - last_state_change_time) > random.uniform(GREEN_LIGHT_MIN, GREEN_LIGHT_MAX):
                             game_state = "Red Light"
@@ -175,8 +255,7 @@ def game_loop():
 
                 # Update the title bar with game state & time
                 title_str = f"State: {game_state} | Time Left: {max(0, GAME_TIMER - int(elapsed_time))}s"
-                cv2.putText(title_bar, title_str, (50, 80),
-                            cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 4, cv2.LINE_AA)
+                canvas.set_title((title_str, (50, 80), 2, (255, 255, 255), 4), *stats_line)
 
             else:
                 # Game inactive (Idle/Over)
@@ -185,43 +264,20 @@ def game_loop():
                 else:
                     title_text = "Idle - Press R to Start"
 
-                cv2.putText(title_bar, title_text, (50, 80),
-                            cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 4, cv2.LINE_AA)
+                canvas.set_title((title_text, (50, 80), 2, (255, 255, 255), 4), *stats_line)
 
-            # Build the final 2x2 grid in game mode
-            top_row = np.hstack([frame_resized, fgmask_resized])
-            bottom_row = np.hstack([detection_resized, bottom_right_cell])
-            grid = np.vstack([top_row, bottom_row])
-
-            # Combine the title bar and grid
-            combined_frame = np.vstack([title_bar, grid])
-            cv2.imshow("Game Window", combined_frame)
+            # The final 2x2 grid in game mode
+            canvas.fill(3, light_color)
+            cv2.imshow("Game Window", canvas.image)
 
         key = cv2.waitKey(1) & 0xFF
         if key == 27:  # ESC to quit
             print("Exiting...")
             break
-
-        if not CAMERA_MODE:
-            # Only relevant if not in Demo mode
-            if key == ord('r'):
-                print("Starting (or Restarting) the game...")
-                # Reset game variables
-                game_active = True
-                game_over = False
-                game_state = "Preparation"
-
-            elif key == ord(' '):
-                # Force a win if in green light
-                if game_active and (game_state == "Green Light") and not game_over:
-                    print("You win! Congratulations!")
-                    win_sound.play()
-                    game_over = True
-                    game_state = "Idle"
-                    game_active = False
+        game_active, game_over, game_state = handle_key(key, game_active, game_over, game_state)
 
     # Cleanup
-    cap.release()
+    stop_camera(cap, capture, detection)
     cv2.destroyAllWindows()
 
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+"""
+Replays recorded rounds of game_with_ai.py headlessly, either to check that
+they still play out identically or as a frame-time benchmark.
+
+Record rounds by setting CONFIG["RECORD_DIR"] before playing, or headlessly
+with `python simulation.py --record DIR`. Then:
+
+    python replay.py recordings/                   # check every recording
+    python replay.py recordings/ --bench --render  # frame-time percentiles
+    python replay.py recordings/ --bench --save before.json
+    python replay.py recordings/ --bench --compare before.json
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+# Keep SDL away from real video/audio devices
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import game_with_ai
+from pathfinding import totals as path_totals
+from profiler import Profiler
+from recording import Recording
+
+
+def replay(recording, profiler=None, render=False):
+    """
+    Play a recording again with the CONFIG it was made with and return the
+    finished GameWorld. With a profiler (see profiler.py), step() phases are
+    timed, plus the whole frame ("frame") and, if render is True, drawing
+    ("render").
+    """
+    with game_with_ai.config_overrides(recording.config):
+        world = game_with_ai.GameWorld(recording.seed)
+        world.profiler = profiler
+        renderer = None
+        if render:
+            game_with_ai.setup_pygame()
+            renderer = game_with_ai.PlayRenderer(world)
+
+        for dt, keys, shots in recording:
+            start = time.perf_counter()
+            for _ in range(shots):
+                world.shoot()
+            world.step(dt, keys)
+            if renderer is not None:
+                drawn = time.perf_counter()
+                renderer.draw(game_with_ai.screen, f"Time: {world.time_left()}s")
+                if profiler is not None:
+                    profiler.record("render", time.perf_counter() - drawn)
+            if profiler is not None:
+                profiler.record("frame", time.perf_counter() - start)
+                profiler.end_frame()
+            if world.result is not None:
+                break
+    return world
+
+
+def verify(recording):
+    """
+    Replay and compare with the recorded outcome. Returns a list of
+    mismatches (empty if the replay was identical).
+    """
+    if recording.outcome is None:
+        return ["recording has no outcome"]
+    world = replay(recording)
+    replayed = {
+        "result": world.result,
+        "frames": world.frames,
+        "coins_collected": world.coins_collected,
+        "enemies_killed": world.enemies_killed,
+        "shots_fired": world.shots_fired,
+        "digest": world.state_digest(),
+    }
+    return [f"{key}: recorded {value!r}, replayed {replayed[key]!r}"
+            for key, value in recording.outcome.items() if replayed[key] != value]
+
+
+def benchmark(recordings, render=False, repeat=1):
+    """
+    Replay every recording 'repeat' times. Returns a Profiler holding every
+    frame's timings and pathfinding counters.
+    """
+    profiler = Profiler(window=None)
+    profiler.watch("pathfinding", lambda: path_totals.seconds, kind="timer")
+    profiler.watch("path_calls", lambda: path_totals.calls)
+    profiler.watch("nodes_expanded", lambda: path_totals.nodes_expanded)
+    for _ in range(repeat):
+        for recording in recordings:
+            replay(recording, profiler, render)
+    return profiler
+
+
+def find_recordings(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.rec"))))
+        else:
+            files.append(path)
+    return files
+
+
+def print_table(stats, baseline=None):
+    header = f"{'':>15} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"
+    if baseline:
+        header += f" {'p95 vs base':>12}"
+    print(header)
+    order = list(game_with_ai.GameWorld.PHASES) + ["pathfinding", "render", "draw_map",
+                                                   "draw_actors", "frame"]
+    for kind, unit in (("timers", " ms"), ("counters", "")):
+        entries = stats[kind]
+        for name in sorted(entries, key=lambda n: order.index(n) if n in order else len(order)):
+            s = entries[name]
+            line = f"{name + unit:>15} {s['p50']:9.3f} {s['p95']:9.3f} {s['p99']:9.3f} {s['max']:9.3f}"
+            base = (baseline or {}).get(kind, {}).get(name)
+            if base and base["p95"] > 0:
+                line += f" {s['p95'] / base['p95']:11.2f}x"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="recording files or directories of *.rec")
+    parser.add_argument("--bench", action="store_true", help="report frame-time percentiles")
+    parser.add_argument("--render", action="store_true", help="also time drawing (offscreen)")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--save", metavar="JSON", help="write the percentiles to a file")
+    parser.add_argument("--compare", metavar="JSON", help="show p95 relative to a saved run")
+    args = parser.parse_args()
+
+    files = find_recordings(args.paths)
+    if not files:
+        parser.error("no recordings found")
+    recordings = [Recording.load(path) for path in files]
+
+    if not args.bench:
+        failed = 0
+        for path, recording in zip(files, recordings):
+            problems = verify(recording)
+            print(f"{'OK  ' if not problems else 'FAIL'} {path} ({len(recording)} frames)")
+            for problem in problems:
+                print(f"     {problem}")
+            failed += bool(problems)
+        raise SystemExit(1 if failed else 0)
+
+    profiler = benchmark(recordings, args.render, args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print(f"{len(recordings)} recordings x {args.repeat}, {profiler.frames} frames")
+    print_table(profiler.stats(), baseline)
+    if args.save:
+        profiler.dump(args.save)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Headless, fixed-timestep runs of game_with_ai.py for tuning CONFIG.
+
+No window is opened and no sounds are played, so games run as fast as the CPU
+allows. Example (1000 games on every core with a bigger detection radius):
+
+    python simulation.py --games 1000 --set DETECTION_RADIUS=8
+"""
+import argparse
+import ast
+import multiprocessing
+import os
+import random
+import time
+
+# Keep SDL away from real video/audio devices in worker processes
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+import game_with_ai
+from recording import Recording
+
+MOVE_KEYS = {
+    "up": pygame.K_UP,
+    "down": pygame.K_DOWN,
+    "left": pygame.K_LEFT,
+    "right": pygame.K_RIGHT,
+}
+
+
+class KeyState:
+    """Stands in for pygame.key.get_pressed(): keys[code] -> bool."""
+    def __init__(self, pressed=()):
+        self.pressed = set(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+class RandomPolicy:
+    """
+    Walks in a random direction for a random number of frames and fires now
+    and then. Has its own RNG so it doesn't change the game's random stream.
+    """
+    def __init__(self, seed=None, min_hold=10, max_hold=60, shoot_chance=0.02):
+        self.rng = random.Random(seed)
+        self.min_hold = min_hold
+        self.max_hold = max_hold
+        self.shoot_chance = shoot_chance
+        self.keys = KeyState()
+        self.hold = 0
+
+    def __call__(self, world):
+        if self.hold <= 0:
+            move = self.rng.choice([None] + list(MOVE_KEYS))
+            self.keys = KeyState([MOVE_KEYS[move]] if move else [])
+            self.hold = self.rng.randint(self.min_hold, self.max_hold)
+        self.hold -= 1
+        return self.keys, self.rng.random() < self.shoot_chance
+
+
+class ScriptedPolicy:
+    """
+    Plays back a fixed list of (moves, shoot) per frame, where moves is a
+    sequence of "up"/"down"/"left"/"right". Stands still once it runs out.
+    """
+    def __init__(self, actions):
+        self.actions = [(KeyState(MOVE_KEYS[m] for m in moves), shoot)
+                        for moves, shoot in actions]
+        self.frame = 0
+
+    def __call__(self, world):
+        if self.frame < len(self.actions):
+            action = self.actions[self.frame]
+        else:
+            action = (KeyState(), False)
+        self.frame += 1
+        return action
+
+
+def run_game(seed, policy=None, dt=None, config=None, record_path=None):
+    """
+    Play one round headless and return its outcome as a dict.
+
+    policy(world) -> (keys, shoot) is called once per frame (RandomPolicy by
+    default). dt is the fixed frame time in seconds (1/FPS by default).
+    config overrides CONFIG entries for this game only (including the map,
+    e.g. {"MAP_SIZE": (512, 512)}); TILE_SIZE is read at import and can't be
+    changed this way. With record_path the game's input is saved there for
+    replay.py.
+    """
+    if policy is None:
+        policy = RandomPolicy(seed)
+    if dt is None:
+        dt = 1.0 / game_with_ai.CONFIG["FPS"]
+
+    with game_with_ai.config_overrides(config or {}):
+        world = game_with_ai.GameWorld(seed)
+        recording = Recording(seed, game_with_ai.CONFIG) if record_path else None
+        coins_total = len(world.coins)
+        while world.result is None:
+            keys, shoot = policy(world)
+            if shoot:
+                world.shoot()
+            if recording is not None:
+                recording.add_frame(dt, keys, int(shoot))
+            world.step(dt, keys)
+        if recording is not None:
+            recording.finish(world)
+            recording.save(record_path)
+
+    return {
+        "seed": seed,
+        "result": world.result,
+        "won": world.result == "WIN",
+        "coins_collected": world.coins_collected,
+        "coins_total": coins_total,
+        "enemies_killed": world.enemies_killed,
+        "shots_fired": world.shots_fired,
+        "frames": world.frames,
+        "game_time": world.elapsed,
+    }
+
+
+def _run_seed(args):
+    seed, policy_factory, dt, config, record_dir = args
+    record_path = os.path.join(record_dir, f"seed-{seed}.rec") if record_dir else None
+    return run_game(seed, policy_factory(seed), dt, config, record_path)
+
+
+def run_batch(seeds, policy_factory=RandomPolicy, dt=None, config=None, processes=None,
+              record_dir=None):
+    """
+    Run one game per seed on a multiprocessing pool (all cores by default).
+    policy_factory(seed) builds each game's policy and must be picklable,
+    e.g. a module-level class or function. With record_dir every game is
+    saved there as seed-<seed>.rec.
+    """
+    if record_dir:
+        os.makedirs(record_dir, exist_ok=True)
+    jobs = [(seed, policy_factory, dt, config, record_dir) for seed in seeds]
+    if processes == 1:
+        return [_run_seed(job) for job in jobs]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(_run_seed, jobs, chunksize=max(1, len(jobs) // 64))
+
+
+def summarize(results):
+    n = len(results)
+    return {
+        "games": n,
+        "win_rate": sum(r["won"] for r in results) / n,
+        "avg_coins": sum(r["coins_collected"] for r in results) / n,
+        "avg_kills": sum(r["enemies_killed"] for r in results) / n,
+        "avg_game_time": sum(r["game_time"] for r in results) / n,
+    }
+
+
+def parse_value(text):
+    """Python literal (6, 0.5, (512, 512), None, ...), else the plain string."""
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="first seed")
+    parser.add_argument("--processes", type=int, default=None, help="default: all cores")
+    parser.add_argument("--dt", type=float, default=None, help="fixed frame time (s)")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="override a CONFIG value, may be repeated")
+    parser.add_argument("--record", metavar="DIR", help="save every game for replay.py")
+    args = parser.parse_args()
+
+    config = {}
+    for item in args.set:
+        key, value = item.split("=", 1)
+        if key not in game_with_ai.CONFIG:
+            parser.error(f"unknown CONFIG key: {key}")
+        config[key] = parse_value(value)
+
+    seeds = range(args.seed, args.seed + args.games)
+    start = time.perf_counter()
+    results = run_batch(seeds, dt=args.dt, config=config, processes=args.processes,
+                        record_dir=args.record)
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(results)
+    print(f"{summary['games']} games in {elapsed:.1f}s "
+          f"({summary['games'] / elapsed:.1f} games/s)")
+    print(f"win rate:  {summary['win_rate']:.1%}")
+    print(f"coins:     {summary['avg_coins']:.2f} avg")
+    print(f"kills:     {summary['avg_kills']:.2f} avg")
+    print(f"game time: {summary['avg_game_time']:.1f}s avg")
+
+
+if __name__ == "__main__":
+    main()
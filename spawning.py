@@ -0,0 +1,96 @@
+"""
+Picking enemy spawn tiles far from the player in game_with_ai.py.
+"""
+import random
+
+import numpy as np
+
+
+class SpawnIndex:
+    """
+    Free tiles (flat indices r * cols + c, a sorted NumPy array) split into
+    rows.
+
+    Tiles closer to the player than the minimum distance form a diamond
+    that only covers a few rows, so the far tiles can be counted and the
+    k-th of them found from those rows alone, without listing candidates.
+    pick_far() draws exactly like random.choice() over the far tiles in
+    row-major order did, with the same random numbers.
+
+    Walls built or knocked down (tile_changed()) only update a mask of free
+    tiles; free and row_start are rebuilt from it the next time they are
+    read, once however many tiles changed in between.
+    """
+    def __init__(self, free_spots, cols, rows=None):
+        self.cols = cols
+        free_spots = np.asarray(free_spots, dtype=np.int64)
+        if rows is None:
+            rows = int(free_spots.max()) // cols + 1 if len(free_spots) else 0
+        self.mask = np.zeros(rows * cols, dtype=bool)
+        self.mask[free_spots] = True
+        self._rebuild()
+
+    def __len__(self):
+        return len(self.free)
+
+    def _rebuild(self):
+        self._free = np.flatnonzero(self.mask)
+        # _row_start[r]: position in free of the first tile in row >= r
+        rows = len(self.mask) // self.cols
+        self._row_start = np.searchsorted(self._free, np.arange(rows + 1) * self.cols)
+        self._stale = False
+
+    @property
+    def free(self):
+        if self._stale:
+            self._rebuild()
+        return self._free
+
+    @property
+    def row_start(self):
+        if self._stale:
+            self._rebuild()
+        return self._row_start
+
+    def tile_changed(self, r, c, free):
+        """Adds or removes tile (r, c) after a wall was knocked down or built there."""
+        i = r * self.cols + c
+        if i >= len(self.mask):
+            # Below the rows the index was made with
+            self.mask = np.concatenate(
+                (self.mask, np.zeros((r + 1) * self.cols - len(self.mask), dtype=bool)))
+        if self.mask[i] != free:
+            self.mask[i] = free
+            self._stale = True
+
+    def _near(self, pr, pc, min_distance):
+        """(first, end) arrays of positions in self.free of the tiles too close, row by row."""
+        last = len(self.row_start) - 2
+        rows = np.arange(max(pr - min_distance + 1, 0), min(pr + min_distance - 1, last) + 1)
+        w = min_distance - 1 - np.abs(rows - pr)
+        first = np.searchsorted(self.free, rows * self.cols + np.maximum(pc - w, 0))
+        end = np.searchsorted(self.free, rows * self.cols + np.minimum(pc + w, self.cols - 1),
+                              side="right")
+        keep = end > first
+        return first[keep], end[keep]
+
+    def pick_far(self, pr, pc, min_distance, rng=random):
+        """
+        (r, c) of a free tile at least min_distance from (pr, pc), uniformly,
+        or of any free tile if none is that far.
+        """
+        if min_distance > 0:
+            first, end = self._near(pr, pc, min_distance)
+        else:
+            first = end = np.empty(0, dtype=np.int64)
+        count = len(self.free) - int((end - first).sum())
+        if count <= 0:
+            k = rng.randrange(len(self.free))
+        else:
+            # The k-th far tile: skip over each near run it comes after
+            k = rng.randrange(count)
+            for f, e in zip(first.tolist(), end.tolist()):
+                if k < f:
+                    break
+                k += e - f
+        return divmod(int(self.free[k]), self.cols)
@@ -0,0 +1,123 @@
+"""
+Line of sight for enemy detection in game_with_ai.py.
+
+What the player can see is worked out once per player tile with recursive
+shadowcasting and kept, so asking whether an enemy sees the player is a
+lookup in that tile's bitmap instead of a raycast per enemy per frame.
+Sight is symmetric enough for the game: an enemy sees the player when the
+enemy's tile is in the player's field of view.
+"""
+import numpy as np
+
+# (xx, xy, yx, yy) for each of the eight octants
+OCTANTS = ((1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+           (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1))
+
+
+class FieldOfView:
+    """
+    Fields of view of the given Manhattan radius on one grid, cached by the
+    tile they are seen from.
+
+    A field of view is a (2 * radius + 1)^2 bitmap centred on its tile,
+    stored flat in a bytearray: 1 where a tile is within the radius and not
+    hidden behind walls. Tiles off the map count as walls. Walls built or
+    knocked down must be reported with tile_changed(), which forgets the
+    fields of view they could have changed.
+    """
+    def __init__(self, grid, radius, capacity=4096):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        self.radius = radius
+        self.side = 2 * radius + 1
+        self.capacity = capacity
+        self.opaque = bytearray((np.asarray(grid) == 1).astype(np.uint8).ravel())
+        self.cache = {}  # (r, c) -> bitmap
+        self.computed = 0
+
+        # Tiles the radius allows at all, in bitmap order
+        d = np.abs(np.arange(self.side) - radius)
+        self.diamond = (d[:, None] + d[None, :]) <= radius
+
+    def tile_changed(self, r, c):
+        """Tile (r, c) became or stopped being a wall."""
+        self.opaque[r * self.cols + c] = int(self.grid[r][c] == 1)
+        radius = self.radius
+        for key in [k for k in self.cache
+                    if abs(k[0] - r) + abs(k[1] - c) <= radius]:
+            del self.cache[key]
+
+    def from_tile(self, r, c):
+        """Bitmap of the tiles visible from (r, c), computed on first use."""
+        bitmap = self.cache.get((r, c))
+        if bitmap is None:
+            if len(self.cache) >= self.capacity:
+                del self.cache[next(iter(self.cache))]  # oldest first
+            bitmap = self.cache[(r, c)] = self._shadowcast(r, c)
+        return bitmap
+
+    def sees(self, r, c, tr, tc):
+        """True if tile (tr, tc) is in sight of tile (r, c)."""
+        radius = self.radius
+        dr, dc = tr - r, tc - c
+        if abs(dr) + abs(dc) > radius:
+            return False
+        return self.from_tile(r, c)[(dr + radius) * self.side + dc + radius] == 1
+
+    def sees_many(self, r, c, rows, cols):
+        """sees() for NumPy arrays of tiles; returns a boolean array."""
+        radius, side = self.radius, self.side
+        dr, dc = rows - r, cols - c
+        near = (np.abs(dr) + np.abs(dc)) <= radius
+        # Far tiles are clipped onto the bitmap's edge and then masked out
+        index = np.clip(dr + radius, 0, side - 1) * side + np.clip(dc + radius, 0, side - 1)
+        bitmap = np.frombuffer(self.from_tile(r, c), dtype=np.uint8)
+        return near & (bitmap[index] == 1)
+
+    def _shadowcast(self, r, c):
+        self.computed += 1
+        visible = np.zeros((self.side, self.side), dtype=bool)
+        visible[self.radius, self.radius] = True
+        for octant in OCTANTS:
+            self._cast(visible, r, c, 1, 1.0, 0.0, *octant)
+        return bytearray((visible & self.diamond).astype(np.uint8).ravel())
+
+    def _cast(self, visible, cr, cc, row, start, end, xx, xy, yx, yy):
+        """
+        Recursive shadowcasting of one octant, from 'row' outwards, between
+        the slopes 'start' and 'end' (1.0 is the diagonal, 0.0 straight out).
+        """
+        if start < end:
+            return
+        radius, rows, cols, opaque = self.radius, self.rows, self.cols, self.opaque
+        new_start = 0.0
+        for j in range(row, radius + 1):
+            dy = -j
+            blocked = False
+            for dx in range(-j, 1):
+                left = (dx - 0.5) / (dy + 0.5)
+                right = (dx + 0.5) / (dy - 0.5)
+                if start < right:
+                    continue
+                if end > left:
+                    break
+                # Map offsets for this octant
+                vc = dx * xx + dy * xy
+                vr = dx * yx + dy * yy
+                visible[vr + radius, vc + radius] = True
+                tr, tc = cr + vr, cc + vc
+                wall = not (0 <= tr < rows and 0 <= tc < cols) or opaque[tr * cols + tc]
+                if blocked:
+                    if wall:
+                        new_start = right
+                    else:
+                        blocked = False
+                        start = new_start
+                elif wall and j < radius:
+                    # Start of a shadow: what lies past it is cast separately
+                    blocked = True
+                    self._cast(visible, cr, cc, j + 1, start, left, xx, xy, yx, yy)
+                    new_start = right
+            if blocked:
+                break